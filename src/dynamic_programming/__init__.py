@@ -0,0 +1,3 @@
+# dynamic programming
+# 動的計画法
+# (src ディレクトリで python -m dynamic_programming.knapsack_problem のように実行する)
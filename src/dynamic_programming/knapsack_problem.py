@@ -2,30 +2,35 @@
 # 動的計画法
 
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
 
-# --- 日本語フォント設定 ---
-plt.rcParams['font.family']\
-    = ['Meiryo', 'MS Gothic', 'Yu Gothic', 'DejaVu Sans']
-plt.rcParams['font.sans-serif']\
-    = ['Meiryo', 'MS Gothic', 'Yu Gothic', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
-# -------------------------
+from plotting import pyplot
+from profiling import Profiler
 
-# 品物の定義: (重さ, 価値) のリスト
-# 0番目はダミーとして空けておく
-items = [(0, 0), (2, 3), (3, 4), (4, 5), (5, 8)]
-W = 7  # ナップサックの最大容量
 
-# 品物の数と容量
-N = len(items) - 1
-Capacity = W
+def solve_knapsack(items, W):
+    """
+    描画せずに DP テーブルと選択テーブルを作る関数
+    - items: (重さ, 価値) のリスト（0番目はダミー）
+    - 戻り値: (DP, CHOICE) で、visualize_knapsack() が作るものと同じ内容
+    """
+    N = len(items) - 1
+    DP = np.zeros((N + 1, W + 1), dtype=int)
+    CHOICE = np.full((N + 1, W + 1), 'N/A', dtype=object)
+    capacities = np.arange(1, W + 1)
 
-# DPテーブルの初期化 (最大価値を記録)
-DP = np.zeros((N + 1, Capacity + 1), dtype=int)
-# 選択を記録するテーブル: 'IN' (入れた) または 'OUT' (入れなかった)
-CHOICE = np.full((N + 1, Capacity + 1), 'N/A', dtype=object)
+    # 品物ごとに、全容量を一度に更新する
+    for i in range(1, N + 1):
+        weight_i, value_i = items[i]
+        value_not_included = DP[i - 1, 1:]
+        fits = capacities >= weight_i
+        value_included = np.where(
+            fits, DP[i - 1, np.maximum(capacities - weight_i, 0)] + value_i,
+            -1)
+        take = fits & (value_included > value_not_included)
+        DP[i, 1:] = np.where(take, value_included, value_not_included)
+        CHOICE[i, 1:] = np.where(take, 'IN',
+                                 np.where(fits, 'OUT', 'OUT_CAP'))
+    return DP, CHOICE
 
 
 def reconstruct_solution(N, W, CHOICE, items):
@@ -52,10 +57,186 @@ def reconstruct_solution(N, W, CHOICE, items):
     return selected_items[::-1]
 
 
-def visualize_knapsack(items, W, DP, CHOICE, pause_time=0.5):
+# 選択テーブルの値と、記録 (step_trace) に使う番号の対応
+CHOICE_CODES = {'N/A': 0, 'IN': 1, 'OUT': 2, 'OUT_CAP': 3}
+CHOICE_NAMES = list(CHOICE_CODES)
+
+# draw_table() の描画段階: 計算前 / 計算後 / 最終結果
+PHASE_BEFORE, PHASE_AFTER, PHASE_FINAL = 0, 1, 2
+
+
+def draw_table(items, W, DP, CHOICE, cell, phase, title, vmax):
+    """
+    DPテーブルの1フレームを描画する関数（可視化と記録の再生で共通）
+    - cell: 処理中のセル (i, j)
+    - phase: PHASE_BEFORE（処理中セルを赤枠）/ PHASE_AFTER（更新したセルを青枠と
+      選択肢ラベル）/ PHASE_FINAL（最終結果と解の再構築）
+    """
+    plt = pyplot()
+    from matplotlib.patches import Rectangle
+
+    N = len(items) - 1
+    Capacity = W
+    i, j = cell
+
+    # x軸とy軸のラベルを設定
+    item_labels = [f"品物 {i}\n(W:{items[i][0]}, V:{items[i][1]})"
+                   for i in range(N + 1)]
+
+    if phase == PHASE_BEFORE:
+        # ----------------------------------------------------
+        # STEP 1: 計算前の状態を描画（処理中セルをハイライト）
+        # ----------------------------------------------------
+
+        plt.clf()
+        ax = plt.gca()
+
+        # ヒートマップ描画 (vmin=0, vmax=最大価値でスケール固定)
+        im = ax.imshow(DP, cmap="Blues", vmin=0, vmax=vmax)
+
+        # カラーバーの追加 (一度だけ)
+        if i == 1 and j == 1:
+            plt.gcf().colorbar(im, ax=ax, label='最大価値')
+
+        # --- 描画のカスタマイズ ---
+        ax.set_title(title)
+
+        # セルに数値を書き込む
+        for row in range(N + 1):
+            for col in range(Capacity + 1):
+                # 現在処理中のセルを赤枠で囲む
+                if row == i and col == j:
+                    rect = Rectangle((col - 0.5, row - 0.5),
+                                     1, 1, fill=False,
+                                     edgecolor='red', linewidth=3)
+                    ax.add_patch(rect)
+                    text_color = 'red'
+                else:
+                    text_color = 'black'
+
+                ax.text(col, row, f"{DP[row, col]}",
+                        ha="center", va="center",
+                        color=text_color, fontsize=12)
+
+        plt.xticks(np.arange(Capacity + 1), np.arange(Capacity + 1))
+        plt.yticks(np.arange(N + 1), item_labels)
+        ax.set_xlabel("ナップサック容量 (j)")
+        ax.set_ylabel("品物 (i)")
+
+    elif phase == PHASE_AFTER:
+        # ----------------------------------------------------
+        # STEP 3: 更新後の状態を描画（青枠と選択肢ラベル）
+        # ----------------------------------------------------
+
+        plt.clf()
+        ax = plt.gca()
+
+        ax.imshow(DP, cmap="Blues", vmin=0, vmax=vmax)
+
+        # セルに数値を書き込む (更新後の値 + 選択肢ラベル)
+        for row in range(N + 1):
+            for col in range(Capacity + 1):
+
+                text = f"{DP[row, col]}"
+                text_color = 'black'
+
+                # 更新されたセルを強調
+                if row == i and col == j:
+                    rect = Rectangle((col - 0.5, row - 0.5), 1, 1,
+                                     fill=False, edgecolor='blue',
+                                     linewidth=3)
+                    ax.add_patch(rect)
+                    text_color = 'blue'
+                    # 選択肢をセル内に小さく表示
+                    choice_label = CHOICE[row, col]
+                    if choice_label == 'OUT_CAP':
+                        choice_label = 'OUT(Cap)'
+                    text += f"\n({choice_label})"
+
+                ax.text(col, row, text, ha="center", va="center",
+                        color=text_color, fontsize=10)
+
+        plt.xticks(np.arange(Capacity + 1), np.arange(Capacity + 1))
+        plt.yticks(np.arange(N + 1), item_labels)
+
+        # 凡例として選択肢を表示
+        ax.text(1.05, 0.95,
+                "【選択肢】\nIN: 入れた\nOUT: 入れなかった\nOUT(Cap): 容量不足",
+                transform=ax.transAxes,
+                fontsize=10,
+                verticalalignment='top',
+                bbox=dict(boxstyle="round,pad=0.5",
+                          fc="white", alpha=0.8, ec="black"))
+
+        ax.set_title(title)
+        ax.set_xlabel("ナップサック容量 (j)")
+        ax.set_ylabel("品物 (i)")
+
+    else:
+        # ----------------------------------------------------
+        # FINAL STEP: 最終結果の表示と解の再構築 (トレースバック)
+        # ----------------------------------------------------
+        plt.clf()
+        ax = plt.gca()
+        ax.imshow(DP, cmap="Greens", vmin=0, vmax=vmax)
+
+        # 最終的な解の再構築を実行
+        final_solution = reconstruct_solution(N, Capacity, CHOICE, items)
+
+        # セルに数値と選択肢を書き込む
+        for row in range(N + 1):
+            for col in range(Capacity + 1):
+                text = f"{DP[row, col]}"
+                choice_label = CHOICE[row, col]
+                if choice_label == 'OUT_CAP':
+                    choice_label = 'OUT(Cap)'
+
+                # 最終セルの強調
+                if row == N and col == Capacity:
+                    rect = Rectangle((col - 0.5, row - 0.5),
+                                     1, 1, fill=False,
+                                     edgecolor='red', linewidth=4)
+                    ax.add_patch(rect)
+
+                if choice_label != 'N/A':
+                    text += f"\n({choice_label})"
+                ax.text(col, row, text, ha="center",
+                        va="center", color='black', fontsize=10)
+
+        plt.xticks(np.arange(Capacity + 1), np.arange(Capacity + 1))
+        plt.yticks(np.arange(N + 1), item_labels)
+
+        solution_text = "\n".join(final_solution) if final_solution\
+            else "なし"
+
+        # 最終結果のサマリーをグラフの右側に表示
+        ax.text(1.05, 0.95,
+                f"【最終解 (トレースバック)】\n"
+                f"最大価値: {DP[N, Capacity]}\n"
+                f"容量 {W} の\nナップサックに選ばれた品物:\n"
+                f"{solution_text}",
+                transform=ax.transAxes,
+                fontsize=10,
+                verticalalignment='top',
+                bbox=dict(boxstyle="round,pad=0.5",
+                          fc="white", alpha=0.9, ec="black"))
+
+        ax.set_title(title)
+
+
+def visualize_knapsack(items, W, DP, CHOICE, pause_time=0.5, recorder=None,
+                       profiler=None):
     """
     ナップサック問題のDPテーブル構築と解の記録を可視化する関数
+    - recorder: step_trace.StepRecorder を渡すと各ステップを記録する
+      (保存した記録は python -m step_trace で再生できる)
+    - profiler: profiling.Profiler を渡すと、計算・描画・待ち時間・出力の時間を
+      計測し、ステップごとの出力の方法を切り替える
     """
+    plt = pyplot()
+    if profiler is None:
+        profiler = Profiler()
+
     N = len(items) - 1
     Capacity = W
 
@@ -63,199 +244,168 @@ def visualize_knapsack(items, W, DP, CHOICE, pause_time=0.5):
     fig, ax = plt.subplots(figsize=(Capacity + 3, N + 2))
     plt.subplots_adjust(right=0.75)  # 凡例スペースの確保
 
-    # x軸とy軸のラベルを設定
-    item_labels = [f"品物 {i}\n(W:{items[i][0]}, V:{items[i][1]})"
-                   for i in range(N + 1)]
-
     ax.set_xlabel("ナップサック容量 (j)")
     ax.set_ylabel("品物 (i)")
 
     # 最大価値のスケールを固定 (0から最終的な最大価値まで)
     vmax = sum(item[1] for item in items)
 
+    if recorder is not None:
+        recorder.describe(
+            'knapsack', items=[list(map(int, item)) for item in items], W=W,
+            vmax=vmax, figsize=fig.get_size_inches().tolist())
+        recorder.add_channel('dp', DP.ravel())
+        recorder.add_channel('choice', [CHOICE_CODES[c]
+                                        for c in CHOICE.ravel()])
+        recorder.add_channel('cell', [0, 0])
+        recorder.add_channel('phase', [PHASE_BEFORE])
+        recorder.add_text_channel('title', [''])
+
+    def record_frame(i, j, phase, title):
+        if recorder is not None:
+            recorder.set('cell', 0, i)
+            recorder.set('cell', 1, j)
+            recorder.set('phase', 0, phase)
+            recorder.set_text('title', 0, title)
+
     print(f"--- 0/1ナップサック問題開始: 容量W={W}, 品物数N={N} ---")
 
     # DPテーブルの構築
+    profiler.start()
     for i in range(1, N + 1):
         weight_i = items[i][0]
         value_i = items[i][1]
 
-        print(f"\n[品物 {i} 処理開始] (W:{weight_i}, V:{value_i})")
+        profiler.log(f"\n[品物 {i} 処理開始] (W:{weight_i}, V:{value_i})",
+                     always=True)
 
         for j in range(1, Capacity + 1):
+            profiler.step()
 
             # ----------------------------------------------------
             # STEP 1: 計算前の状態を描画（処理中セルをハイライト）
             # ----------------------------------------------------
+            title = (f"品物 {i} 処理中 - 容量 {j} | 品物 {i} "
+                     f"(W:{weight_i}, V:{value_i})を考慮")
+            with profiler.phase('draw'):
+                draw_table(items, W, DP, CHOICE, (i, j), PHASE_BEFORE, title,
+                           vmax)
+            record_frame(i, j, PHASE_BEFORE, title)
 
-            plt.clf()
-            ax = plt.gca()
-
-            # ヒートマップ描画 (vmin=0, vmax=最大価値でスケール固定)
-            im = ax.imshow(DP, cmap="Blues", vmin=0, vmax=vmax)
-
-            # カラーバーの追加 (一度だけ)
-            if i == 1 and j == 1:
-                fig.colorbar(im, ax=ax, label='最大価値')
-
-            # --- 描画のカスタマイズ ---
-            ax.set_title(f"品物 {i} 処理中 - 容量 {j} | 品物 {i} "
-                         f"(W:{weight_i}, V:{value_i})を考慮")
-
-            # セルに数値を書き込む
-            for row in range(N + 1):
-                for col in range(Capacity + 1):
-                    # 現在処理中のセルを赤枠で囲む
-                    if row == i and col == j:
-                        rect = Rectangle((col - 0.5, row - 0.5),
-                                         1, 1, fill=False,
-                                         edgecolor='red', linewidth=3)
-                        ax.add_patch(rect)
-                        text_color = 'red'
-                    else:
-                        text_color = 'black'
-
-                    ax.text(col, row, f"{DP[row, col]}",
-                            ha="center", va="center",
-                            color=text_color, fontsize=12)
-
-            plt.xticks(np.arange(Capacity + 1), np.arange(Capacity + 1))
-            plt.yticks(np.arange(N + 1), item_labels)
-            ax.set_xlabel("ナップサック容量 (j)")
-            ax.set_ylabel("品物 (i)")
-
-            plt.pause(pause_time / 2)  # 短めのポーズ
+            profiler.pause(pause_time / 2, recorder)  # 短めのポーズ
 
             # ----------------------------------------------------
             # STEP 2: DP遷移の計算と選択の記録
             # ----------------------------------------------------
 
-            # (1) 品物 i を入れない場合 (上の行の同じ容量の値)
-            value_not_included = DP[i - 1, j]
-            choice = 'OUT'
+            with profiler.phase('compute'):
+                # (1) 品物 i を入れない場合 (上の行の同じ容量の値)
+                value_not_included = DP[i - 1, j]
+                choice = 'OUT'
 
-            # (2) 品物 i を入れる場合
-            if j >= weight_i:
-                # i-1番目までで、残りの容量 (j - weight_i) での最大価値 + 品物 i の価値
-                value_included = DP[i - 1, j - weight_i] + value_i
+                # (2) 品物 i を入れる場合
+                if j >= weight_i:
+                    # i-1番目までで、残りの容量 (j - weight_i) での最大価値 + 品物 i の価値
+                    value_included = DP[i - 1, j - weight_i] + value_i
 
-                if value_included > value_not_included:
-                    # 入れた方が価値が高い場合
-                    DP[i, j] = value_included
-                    choice = 'IN'
+                    if value_included > value_not_included:
+                        # 入れた方が価値が高い場合
+                        DP[i, j] = value_included
+                        choice = 'IN'
+                    else:
+                        # 入れなかった方が価値が高い、または同じ場合
+                        DP[i, j] = value_not_included
+                        choice = 'OUT'
                 else:
-                    # 入れなかった方が価値が高い、または同じ場合
+                    # 容量が足りない場合は入れられない
                     DP[i, j] = value_not_included
-                    choice = 'OUT'
-            else:
-                # 容量が足りない場合は入れられない
-                DP[i, j] = value_not_included
-                choice = 'OUT_CAP'  # 容量不足による「入れない」
+                    choice = 'OUT_CAP'  # 容量不足による「入れない」
 
-            # 決定を記録
-            CHOICE[i, j] = choice
-            print(f"   -> 容量 {j}: 選択: {choice} (Value: {DP[i, j]})")
+                # 決定を記録
+                CHOICE[i, j] = choice
+            profiler.log(f"   -> 容量 {j}: 選択: {choice} (Value: {DP[i, j]})")
 
             # ----------------------------------------------------
             # STEP 3: 更新後の状態を描画（青枠と選択肢ラベル）
             # ----------------------------------------------------
+            title = f"品物 {i} 処理完了 - 容量 {j} | 決定: {CHOICE[i, j]}"
+            with profiler.phase('draw'):
+                draw_table(items, W, DP, CHOICE, (i, j), PHASE_AFTER, title,
+                           vmax)
+            if recorder is not None:
+                recorder.set('dp', i * (Capacity + 1) + j, DP[i, j])
+                recorder.set('choice', i * (Capacity + 1) + j,
+                             CHOICE_CODES[choice])
+            record_frame(i, j, PHASE_AFTER, title)
+
+            profiler.pause(pause_time, recorder)
 
-            plt.clf()
-            ax = plt.gca()
+    # ----------------------------------------------------
+    # FINAL STEP: 最終結果の表示と解の再構築 (トレースバック)
+    # ----------------------------------------------------
+    title = f"DPテーブル構築完了 | 最大価値: {DP[N, Capacity]}"
+    with profiler.phase('draw'):
+        draw_table(items, W, DP, CHOICE, (N, Capacity), PHASE_FINAL, title,
+                   vmax)
+    record_frame(N, Capacity, PHASE_FINAL, title)
+    profiler.stop()
+    plt.show()
 
-            im = ax.imshow(DP, cmap="Blues", vmin=0, vmax=vmax)
 
-            # セルに数値を書き込む (更新後の値 + 選択肢ラベル)
-            for row in range(N + 1):
-                for col in range(Capacity + 1):
+def make_trace_drawer(trace):
+    """
+    visualize_knapsack で記録したステップを、現在の Figure に再生する描画関数を作る
+    """
+    meta = trace.meta
+    items = [tuple(item) for item in meta['items']]
+    W = meta['W']
+    shape = (len(items), W + 1)
+    pyplot().subplots_adjust(right=0.75)  # 凡例スペースの確保
 
-                    text = f"{DP[row, col]}"
-                    text_color = 'black'
+    def draw(state, changed):
+        DP = state['dp'].astype(int).reshape(shape)
+        CHOICE = np.array([CHOICE_NAMES[c] for c in
+                           state['choice'].astype(np.int64)],
+                          dtype=object).reshape(shape)
+        i, j = state['cell'].astype(np.int64).tolist()
+        draw_table(items, W, DP, CHOICE, (i, j), int(state['phase'][0]),
+                   trace.text(state, 'title', 0), meta['vmax'])
 
-                    # 更新されたセルを強調
-                    if row == i and col == j:
-                        rect = Rectangle((col - 0.5, row - 0.5), 1, 1,
-                                         fill=False, edgecolor='blue',
-                                         linewidth=3)
-                        ax.add_patch(rect)
-                        text_color = 'blue'
-                        # 選択肢をセル内に小さく表示
-                        choice_label = CHOICE[row, col]
-                        if choice_label == 'OUT_CAP':
-                            choice_label = 'OUT(Cap)'
-                        text += f"\n({choice_label})"
-
-                    ax.text(col, row, text, ha="center", va="center",
-                            color=text_color, fontsize=10)
-
-            plt.xticks(np.arange(Capacity + 1), np.arange(Capacity + 1))
-            plt.yticks(np.arange(N + 1), item_labels)
-
-            # 凡例として選択肢を表示
-            ax.text(1.05, 0.95,
-                    "【選択肢】\nIN: 入れた\nOUT: 入れなかった\nOUT(Cap): 容量不足",
-                    transform=ax.transAxes,
-                    fontsize=10,
-                    verticalalignment='top',
-                    bbox=dict(boxstyle="round,pad=0.5",
-                              fc="white", alpha=0.8, ec="black"))
-
-            ax.set_title(f"品物 {i} 処理完了 - 容量 {j} | 決定: {CHOICE[i, j]}")
-            ax.set_xlabel("ナップサック容量 (j)")
-            ax.set_ylabel("品物 (i)")
-
-            plt.pause(pause_time)
+    return draw
 
-    # ----------------------------------------------------
-    # FINAL STEP: 最終結果の表示と解の再構築 (トレースバック)
-    # ----------------------------------------------------
-    plt.clf()
-    ax = plt.gca()
-    im = ax.imshow(DP, cmap="Greens", vmin=0, vmax=vmax)
-
-    # 最終的な解の再構築を実行
-    final_solution = reconstruct_solution(N, Capacity, CHOICE, items)
-
-    # セルに数値と選択肢を書き込む
-    for row in range(N + 1):
-        for col in range(Capacity + 1):
-            text = f"{DP[row, col]}"
-            choice_label = CHOICE[row, col]
-            if choice_label == 'OUT_CAP':
-                choice_label = 'OUT(Cap)'
-
-            # 最終セルの強調
-            if row == N and col == Capacity:
-                rect = Rectangle((col - 0.5, row - 0.5),
-                                 1, 1, fill=False,
-                                 edgecolor='red', linewidth=4)
-                ax.add_patch(rect)
-
-            if choice_label != 'N/A':
-                text += f"\n({choice_label})"
-            ax.text(col, row, text, ha="center",
-                    va="center", color='black', fontsize=10)
-
-    plt.xticks(np.arange(Capacity + 1), np.arange(Capacity + 1))
-    plt.yticks(np.arange(N + 1), item_labels)
-
-    solution_text = "\n".join(final_solution) if final_solution else "なし"
-
-    # 最終結果のサマリーをグラフの右側に表示
-    ax.text(1.05, 0.95,
-            f"【最終解 (トレースバック)】\n"
-            f"最大価値: {DP[N, Capacity]}\n"
-            f"容量 {W} の\nナップサックに選ばれた品物:\n"
-            f"{solution_text}",
-            transform=ax.transAxes,
-            fontsize=10,
-            verticalalignment='top',
-            bbox=dict(boxstyle="round,pad=0.5",
-                      fc="white", alpha=0.9, ec="black"))
-
-    ax.set_title(f"DPテーブル構築完了 | 最大価値: {DP[N, Capacity]}")
-    plt.show()
 
+if __name__ == '__main__':
+    import sys
+
+    # 品物の定義: (重さ, 価値) のリスト
+    # 0番目はダミーとして空けておく
+    items = [(0, 0), (2, 3), (3, 4), (4, 5), (5, 8)]
+    W = 7  # ナップサックの最大容量
+
+    # 品物の数と容量
+    N = len(items) - 1
+    Capacity = W
 
-# 実行
-visualize_knapsack(items, W, DP, CHOICE, pause_time=0.5)
+    # DPテーブルの初期化 (最大価値を記録)
+    DP = np.zeros((N + 1, Capacity + 1), dtype=int)
+    # 選択を記録するテーブル: 'IN' (入れた) または 'OUT' (入れなかった)
+    CHOICE = np.full((N + 1, Capacity + 1), 'N/A', dtype=object)
+
+    # 引数に .npz ファイルのパスを渡すと、各ステップを記録して保存する
+    # (ウィンドウを閉じた後に保存する。python -m step_trace で再生できる)
+    recorder = None
+    if len(sys.argv) > 1:
+        from step_trace import StepRecorder
+        recorder = StepRecorder()
+
+    # 環境変数 ALGO_PROFILE を設定すると、計算・描画・待ち時間・出力の内訳を表示する
+    # (例: ALGO_PROFILE=1 / ALGO_PROFILE=sampled:5,cprofile)
+    profiler = Profiler.from_env()
+
+    # 実行
+    visualize_knapsack(items, W, DP, CHOICE, pause_time=0.5,
+                       recorder=recorder, profiler=profiler)
+    if recorder is not None:
+        recorder.save(sys.argv[1])
+    if profiler is not None:
+        print(profiler.report())
@@ -0,0 +1,5 @@
+# graph algorithms
+# グラフアルゴリズム
+# - csr_graph, bfs_csr, dijkstra_csr, mst などは NumPy だけで動く（描画なし）
+# - bfs, dfs, dijkstra, prims_algorithm は可視化スクリプト
+#   (src ディレクトリで python -m graph_algorithm.bfs のように実行する)
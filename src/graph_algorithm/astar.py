@@ -0,0 +1,170 @@
+# A* search and ALT (A*, Landmarks, Triangle inequality)
+# 2点間の最短経路探索（ヒューリスティック付き）
+
+import numpy as np
+
+from .dijkstra_csr import dijkstra, shortest_path
+from .priority_queues import IndexedHeap
+
+
+def astar(graph, source, target, heuristic=None, stats=None):
+    """
+    A* 探索で source から target までの最短距離と経路を求める関数
+    - graph: CSRGraph（重みは 0 以上）
+    - heuristic: ノードID -> target までの距離の下界 を返す関数
+      (None の場合は常に 0 で、終点で打ち切るダイクストラ法と同じ)
+      一貫性のある (consistent) ヒューリスティックなら各ノードは1回だけ確定する
+    - stats: 辞書を渡すと 'settled'（確定ノード数）を書き込む
+    - 戻り値: (距離, ノード名のリスト)。到達不可の場合は (inf, [])
+    """
+    n = graph.num_nodes
+    s = graph.id_of(source)
+    t = graph.id_of(target)
+    if heuristic is None:
+        def heuristic(_):
+            return 0.0
+
+    distances = {s: 0.0}
+    predecessors = {s: -1}
+    settled = set()
+    indptr = graph.indptr
+    indices = graph.indices
+    weights = graph.weights
+
+    # キーは「始点からの距離 + 終点までの推定距離」
+    pq = IndexedHeap(n)
+    pq.push(s, heuristic(s))
+
+    found = False
+    while len(pq):
+        _, u = pq.pop()
+        settled.add(u)
+        if u == t:
+            found = True
+            break
+
+        dist_u = distances[u]
+        start, end = indptr[u], indptr[u + 1]
+        for v, w in zip(indices[start:end].tolist(),
+                        weights[start:end].tolist()):
+            if v in settled:
+                continue
+            new_dist = dist_u + w
+            if new_dist < distances.get(v, float('inf')):
+                distances[v] = new_dist
+                predecessors[v] = u
+                pq.push(v, new_dist + heuristic(v))
+
+    if stats is not None:
+        stats['settled'] = len(settled)
+
+    if not found:
+        return float('inf'), []
+
+    path = []
+    node = t
+    while node != -1:
+        path.append(graph.label_of(node))
+        node = predecessors[node]
+    return distances[t], path[::-1]
+
+
+def euclidean_heuristic(graph, pos, target, scale=1.0):
+    """
+    ノード座標 pos（nx.spring_layout などの {ノード名: (x, y)}）による
+    ユークリッド距離のヒューリスティックを作る関数
+    - 全てのエッジで「重み >= scale * 座標間の距離」が成り立つときに下界になる
+    """
+    coords = np.array([pos[graph.label_of(i)] for i in range(graph.num_nodes)],
+                      dtype=np.float64)
+    target_xy = coords[graph.id_of(target)]
+    # 全ノード分をまとめて計算しておき、探索中は配列を引くだけにする
+    estimates = (scale * np.hypot(*(coords - target_xy).T)).tolist()
+
+    def heuristic(node_id):
+        return estimates[node_id]
+
+    return heuristic
+
+
+class ALTIndex:
+    """
+    ALT 法の前処理結果（ランドマークからの / への最短距離表）
+    - 三角不等式により、任意のランドマーク L について
+        d(v, t) >= d(L, t) - d(L, v)   および   d(v, t) >= d(v, L) - d(t, L)
+      が成り立つので、その最大値を A* のヒューリスティックに使う
+    - 距離表は (ノード数, ランドマーク数) の配列で、ノードごとに連続して並ぶ
+    """
+
+    def __init__(self, graph, num_landmarks=8, seed=0):
+        self.graph = graph
+        self.landmarks = []
+        reverse = graph.reverse()
+
+        from_columns = []
+        to_columns = []
+        rng = np.random.default_rng(seed)
+
+        # 最遠点選択: 既存のランドマークから最も遠いノードを次のランドマークにする
+        min_dist = None
+        candidate = int(rng.integers(graph.num_nodes))
+        for _ in range(min(num_landmarks, graph.num_nodes)):
+            if min_dist is not None:
+                reachable = np.where(np.isfinite(min_dist), min_dist, -1.0)
+                candidate = int(np.argmax(reachable))
+                if reachable[candidate] <= 0:
+                    break
+            self.landmarks.append(candidate)
+
+            label = graph.label_of(candidate)
+            from_landmark, _ = dijkstra(graph, label)
+            to_landmark = from_landmark if not graph.directed\
+                else dijkstra(reverse, label)[0]
+            from_columns.append(from_landmark)
+            to_columns.append(to_landmark)
+
+            min_dist = from_landmark if min_dist is None\
+                else np.minimum(min_dist, from_landmark)
+
+        self.from_landmark = np.column_stack(from_columns)
+        self.to_landmark = np.column_stack(to_columns)
+
+    def heuristic(self, target):
+        """
+        target までの距離の下界を返す関数を作る
+        - 到達できないランドマーク (inf) を含む項は下界に使わない
+        """
+        t = self.graph.id_of(target)
+        from_t = self.from_landmark[t]
+        to_t = self.to_landmark[t]
+
+        def lower_bound(node_id):
+            with np.errstate(invalid='ignore'):
+                bounds = np.concatenate([
+                    from_t - self.from_landmark[node_id],
+                    self.to_landmark[node_id] - to_t,
+                ])
+            bounds = bounds[np.isfinite(bounds)]
+            return max(float(bounds.max()), 0.0) if len(bounds) else 0.0
+
+        return lower_bound
+
+    def query(self, source, target, stats=None):
+        """
+        ALT ヒューリスティックによる A* で2点間の最短距離と経路を求める
+        """
+        return astar(self.graph, source, target, self.heuristic(target), stats)
+
+
+def dijkstra_query(graph, source, target, stats=None):
+    """
+    終点の距離が確定した時点で打ち切るダイクストラ法による2点間クエリ
+    - 戻り値: (距離, ノード名のリスト)。到達不可の場合は (inf, [])
+    """
+    distances, predecessors = dijkstra(graph, source, stats=stats,
+                                       target=target)
+    t = graph.id_of(target)
+    if not np.isfinite(distances[t]):
+        return float('inf'), []
+    path = shortest_path(predecessors, t)
+    return float(distances[t]), [graph.label_of(v) for v in path]
@@ -0,0 +1,113 @@
+# batch multi-source Dijkstra
+# 多数の始点からのダイクストラ法をプロセスプールで並列に実行する
+# - グラフの CSR 配列は共有メモリに1回だけ置き、各プロセスはコピーせずに参照する
+# - 結果は始点のチャンクごとに (距離, 親) の配列として順に返す
+# 実行するとコア数ごとのスループットを表示する:
+#   python -m graph_algorithm.batch_dijkstra (src ディレクトリで実行する)
+
+import os
+import time
+from collections import deque
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .csr_graph import CSRGraph
+from .dijkstra_csr import dijkstra
+from .shared_arrays import attach_arrays, release_arrays, share_arrays
+
+# ワーカープロセス内で共有メモリ上の配列から作ったグラフ
+_worker_graph = None
+_worker_buffers: list[SharedMemory] = []
+
+
+def batch_dijkstra(graph, sources, processes=None, chunk_size=16,
+                   queue='indexed', max_pending=None):
+    """
+    複数の始点からの最短経路木をまとめて求めるジェネレータ
+    - graph: CSRGraph
+    - sources: 始点のノード名のリスト
+    - processes: プロセス数（None は CPU 数）
+    - chunk_size: 1回のタスクで処理する始点の数
+    - max_pending: 同時に処理中にするチャンク数の上限（None は processes * 2）
+      受け取り側が処理し終えるまで次のチャンクを投入しないので、
+      使用メモリは max_pending * chunk_size * ノード数 程度に収まる
+    - yield: (始点のノード名のリスト, distances (k, n), predecessors (k, n))
+    """
+    processes = processes or os.cpu_count() or 1
+    max_pending = max_pending or processes * 2
+    source_ids = [graph.id_of(s) for s in sources]
+    chunks = [source_ids[i:i + chunk_size]
+              for i in range(0, len(source_ids), chunk_size)]
+
+    blocks, specs = share_arrays(
+        [graph.indptr, graph.indices, graph.weights])
+    try:
+        with Pool(processes, initializer=_init_worker,
+                  initargs=(specs, graph.directed)) as pool:
+            pending = deque()
+            next_chunk = 0
+            while next_chunk < len(chunks) or pending:
+                # 上限まで投入してから、先頭のチャンクの完了を待つ（順序を保つ）
+                while next_chunk < len(chunks) and len(pending) < max_pending:
+                    pending.append(pool.apply_async(
+                        _run_chunk, (chunks[next_chunk], queue)))
+                    next_chunk += 1
+                chunk_index = next_chunk - len(pending)
+                distances, predecessors = pending.popleft().get()
+                labels = [graph.label_of(s) for s in chunks[chunk_index]]
+                yield labels, distances, predecessors
+    finally:
+        release_arrays(blocks)
+
+
+def _init_worker(specs, directed):
+    """
+    ワーカープロセスの初期化: 共有メモリに接続してグラフを組み立てる
+    """
+    global _worker_graph
+    arrays = attach_arrays(specs, _worker_buffers)
+    _worker_graph = CSRGraph(*arrays, directed=directed)
+
+
+def _run_chunk(source_ids, queue):
+    """
+    ワーカープロセスで始点のチャンクを処理する
+    """
+    n = _worker_graph.num_nodes
+    distances = np.empty((len(source_ids), n), dtype=np.float64)
+    predecessors = np.empty((len(source_ids), n),
+                            dtype=_worker_graph.indices.dtype)
+    for i, s in enumerate(source_ids):
+        distances[i], predecessors[i] = dijkstra(_worker_graph, s, queue=queue)
+    return distances, predecessors
+
+
+def measure_scaling(graph, sources, process_counts, chunk_size=16):
+    """
+    プロセス数ごとの実行時間とスループット（始点数 / 秒）を表示する関数
+    """
+    print(f"{'processes':>10}{'time [s]':>10}{'sources/s':>12}{'speedup':>10}")
+    baseline = None
+    for processes in process_counts:
+        start = time.perf_counter()
+        for _ in batch_dijkstra(graph, sources, processes, chunk_size):
+            pass
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{processes:>10}{elapsed:>10.2f}"
+              f"{len(sources) / elapsed:>12.1f}{baseline / elapsed:>10.2f}")
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    num_nodes = 20_000
+    m = num_nodes * 3
+    G = CSRGraph.from_arrays(rng.integers(0, num_nodes, m),
+                             rng.integers(0, num_nodes, m),
+                             rng.integers(1, 100, m), num_nodes=num_nodes)
+
+    cpu = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, 8, cpu} & set(range(1, cpu + 1)))
+    measure_scaling(G, list(range(64)), counts)
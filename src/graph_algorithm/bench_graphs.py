@@ -0,0 +1,446 @@
+# グラフアルゴリズムのベンチマーク
+# 乱数の種を固定した合成グラフ（Erdős–Rényi / Barabási–Albert / 格子 / 完全グラフ）の
+# 各サイズで、探索・最短経路・最小全域木の各実装を実行し、
+# 処理速度（エッジ/秒）・ピーク RSS・networkx の結果との一致を JSON で出力する
+# 実行: python -m graph_algorithm.bench_graphs [出力先.json] [--family 系列 ...]
+#         [--algorithm 実装 ...] [--sizes ノード数 ...] [--repeat N] [--seed N]
+#         [--no-check]
+#       (src ディレクトリで実行する。出力先を省略すると標準出力に書く)
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from .astar import ALTIndex, astar
+from .bfs_csr import bfs_levels, bidirectional_bfs
+from .contraction_hierarchy import ContractionHierarchy
+from .csr_graph import CSRGraph
+from .dfs_csr import connected_components
+from .dijkstra_csr import dijkstra
+from .floyd_warshall import floyd_warshall
+from .ms_bfs import ms_bfs_distances
+from .mst import boruvka, graph_edge_arrays, kruskal, prim_dense, prim_heap
+
+# 重みは 1 .. MAX_WEIGHT の整数
+MAX_WEIGHT = 100
+
+# 系列ごとのノード数
+SIZES = {
+    'erdos_renyi': [1_000, 10_000, 100_000],
+    'barabasi_albert': [1_000, 10_000, 100_000],
+    'grid': [1_024, 10_000, 99_856],
+    'complete': [100, 300, 1_000],
+}
+
+# エッジ数がこの値を超えるグラフは networkx との照合を省く（networkx が遅いため）
+REFERENCE_LIMIT = 500_000
+
+# 距離行列を作るプリム法は、ノード数がこの値以下のときだけ実行する
+DENSE_LIMIT = 5_000
+
+# 実装ごとの実行条件 (対象の系列 (None は全て), ノード数の上限)
+# - Floyd-Warshall は O(V^3)、ALT と縮約階層は前処理が重いため小さいグラフだけにする
+# - 縮約階層は道路網向けの手法なので格子だけで測る（ランダムグラフでは
+#   ショートカットが増えすぎて前処理が終わらない）
+LIMITS = {
+    'prim_dense': (None, DENSE_LIMIT),
+    'floyd_warshall': (None, 1_000),
+    'astar_alt': (None, 10_000),
+    'contraction_hierarchy': (('grid',), 1_100),
+}
+
+# 多始点 BFS の始点の数（0 .. MULTI_SOURCES - 1 のノード）
+MULTI_SOURCES = 64
+
+
+# ----------------------------------------------------
+# グラフの生成（いずれも自己ループと多重辺の無い無向グラフ）
+# ----------------------------------------------------
+
+def erdos_renyi(num_nodes, avg_degree=8, seed=0):
+    """
+    平均次数 avg_degree のランダムグラフ (G(n, m) 型)
+    """
+    rng = np.random.default_rng(seed)
+    m = num_nodes * avg_degree // 2
+    return _simple_graph(rng.integers(0, num_nodes, m),
+                         rng.integers(0, num_nodes, m), num_nodes, rng)
+
+
+def barabasi_albert(num_nodes, m=4, seed=0):
+    """
+    優先的選択によるスケールフリーグラフ
+    - 各ノードは、それまでのエッジの端点の一覧から一様に選んだ m 個のノードとつながる
+      (選ばれる確率が次数に比例する)
+    """
+    rng = np.random.default_rng(seed)
+    m = min(m, num_nodes - 1)
+    if m < 1:
+        return CSRGraph.from_arrays([], [], num_nodes=num_nodes)
+    # 最初の m + 1 ノードは完全グラフにする
+    first_src, first_dst = np.triu_indices(m + 1, k=1)
+    endpoints = np.empty(2 * (len(first_src) + m * num_nodes), dtype=np.int64)
+    size = 2 * len(first_src)
+    endpoints[:size] = np.concatenate([first_src, first_dst])
+
+    src = [first_src]
+    dst = [first_dst]
+    for u in range(m + 1, num_nodes):
+        targets = np.unique(endpoints[rng.integers(0, size, m)])
+        src.append(np.full(len(targets), u))
+        dst.append(targets)
+        k = len(targets)
+        endpoints[size:size + k] = u
+        endpoints[size + k:size + 2 * k] = targets
+        size += 2 * k
+    return _simple_graph(np.concatenate(src), np.concatenate(dst),
+                         num_nodes, rng)
+
+
+def grid_graph(num_nodes, seed=0):
+    """
+    道路網に見立てた正方格子（ノード数は num_nodes 以下の最大の平方数）
+    """
+    rng = np.random.default_rng(seed)
+    side = math.isqrt(num_nodes)
+    ids = np.arange(side * side).reshape(side, side)
+    src = np.concatenate([ids[:, :-1].ravel(), ids[:-1, :].ravel()])
+    dst = np.concatenate([ids[:, 1:].ravel(), ids[1:, :].ravel()])
+    return _simple_graph(src, dst, side * side, rng)
+
+
+def complete_graph(num_nodes, seed=0):
+    """
+    ランダムな重みの完全グラフ
+    """
+    rng = np.random.default_rng(seed)
+    src, dst = np.triu_indices(num_nodes, k=1)
+    return _simple_graph(src, dst, num_nodes, rng)
+
+
+def _simple_graph(src, dst, num_nodes, rng):
+    # 自己ループと重複するエッジを除き、重みを付ける
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    low, high = np.minimum(src, dst), np.maximum(src, dst)
+    keys = np.unique((low * num_nodes + high)[low != high])
+    weights = rng.integers(1, MAX_WEIGHT + 1, len(keys))
+    return CSRGraph.from_arrays(keys // num_nodes, keys % num_nodes, weights,
+                                num_nodes=num_nodes)
+
+
+GRAPH_FAMILIES = {
+    'erdos_renyi': erdos_renyi,
+    'barabasi_albert': barabasi_albert,
+    'grid': grid_graph,
+    'complete': complete_graph,
+}
+
+
+# ----------------------------------------------------
+# 計測対象の実装と、networkx による正解の確認
+# ----------------------------------------------------
+
+def _check_bfs(graph, level, reference):
+    return bool(np.array_equal(level, _hop_levels(graph, reference, 0)))
+
+
+def _check_ms_bfs(graph, levels, reference):
+    return all(np.array_equal(row, _hop_levels(graph, reference, source))
+               for source, row in enumerate(levels))
+
+
+def _hop_levels(graph, reference, source):
+    nx = _networkx()
+    expected = np.full(graph.num_nodes, -1)
+    for node, depth in nx.single_source_shortest_path_length(
+            reference, source).items():
+        expected[node] = depth
+    return expected
+
+
+def _check_components(graph, result, reference):
+    nx = _networkx()
+    # 成分の番号の付け方は実装ごとに違うので、成分内の最小のノードIDで比べる
+    _, labels = result
+    smallest = np.full(labels.max() + 1 if len(labels) else 0,
+                       graph.num_nodes)
+    np.minimum.at(smallest, labels, np.arange(graph.num_nodes))
+    expected = np.empty(graph.num_nodes, dtype=np.int64)
+    for component in nx.connected_components(reference):
+        members = np.fromiter(component, dtype=np.int64)
+        expected[members] = members.min()
+    return bool(np.array_equal(smallest[labels], expected))
+
+
+def _check_distances(graph, distances, reference):
+    nx = _networkx()
+    expected = np.full(graph.num_nodes, np.inf)
+    for node, distance in nx.single_source_dijkstra_path_length(
+            reference, 0).items():
+        expected[node] = distance
+    return bool(np.allclose(distances, expected))
+
+
+def _check_hops(graph, result, reference):
+    # 2点間のホップ数と、その経路が実際にたどれること
+    hops, path = result
+    target = _target(graph)
+    expected = _query_reference(reference, target, weight=None)
+    if math.isinf(expected):
+        return hops == -1 and not path
+    return hops == expected\
+        and _path_length(reference, path, target, None) == expected
+
+
+def _check_query(graph, result, reference):
+    # 2点間の最短距離と、経路の重みの合計がその距離になること
+    distance, path = result
+    target = _target(graph)
+    expected = _query_reference(reference, target, weight='weight')
+    if math.isinf(expected):
+        return math.isinf(distance) and not path
+    return math.isclose(distance, expected, rel_tol=1e-9)\
+        and math.isclose(_path_length(reference, path, target, 'weight'),
+                         expected, rel_tol=1e-9)
+
+
+def _query_reference(reference, target, weight):
+    nx = _networkx()
+    try:
+        return nx.shortest_path_length(reference, 0, target, weight=weight)
+    except nx.NetworkXNoPath:
+        return math.inf
+
+
+def _path_length(reference, path, target, weight):
+    # 経路が 0 から target までつながっていない場合は -1
+    if not path or path[0] != 0 or path[-1] != target:
+        return -1
+    if not all(reference.has_edge(u, v) for u, v in zip(path, path[1:])):
+        return -1
+    if weight is None:
+        return len(path) - 1
+    return sum(reference[u][v][weight] for u, v in zip(path, path[1:]))
+
+
+def _check_mst(graph, total_weight, reference):
+    nx = _networkx()
+    expected = nx.minimum_spanning_tree(reference).size(weight='weight')
+    return bool(math.isclose(total_weight, expected, rel_tol=1e-9))
+
+
+def _target(graph):
+    # 2点間の探索の終点（格子では始点 0 の対角の角）
+    return graph.num_nodes - 1
+
+
+# 名前 -> (実行する関数, 結果を networkx と照合する関数)
+# 2点間の探索 (bfs_bidirectional / astar / astar_alt / contraction_hierarchy) は
+# 0 から _target() への1回の問い合わせで、ALT と縮約階層は前処理の時間を含む
+ALGORITHMS = {
+    'bfs': (lambda g: bfs_levels(g, 0)[0], _check_bfs),
+    'bfs_top_down': (lambda g: bfs_levels(g, 0, direction='top-down')[0],
+                     _check_bfs),
+    'bfs_bottom_up': (lambda g: bfs_levels(g, 0, direction='bottom-up')[0],
+                      _check_bfs),
+    'bfs_bidirectional': (lambda g: bidirectional_bfs(g, 0, _target(g)),
+                          _check_hops),
+    'ms_bfs': (lambda g: ms_bfs_distances(
+        g, list(range(min(MULTI_SOURCES, g.num_nodes)))), _check_ms_bfs),
+    'dfs_components': (connected_components, _check_components),
+    'dijkstra_lazy': (lambda g: dijkstra(g, 0, queue='lazy')[0],
+                      _check_distances),
+    'dijkstra_indexed': (lambda g: dijkstra(g, 0, queue='indexed')[0],
+                         _check_distances),
+    'dijkstra_bucket': (lambda g: dijkstra(g, 0, queue='bucket')[0],
+                        _check_distances),
+    'astar': (lambda g: astar(g, 0, _target(g)), _check_query),
+    'astar_alt': (lambda g: ALTIndex(g).query(0, _target(g)), _check_query),
+    'contraction_hierarchy': (
+        lambda g: ContractionHierarchy.build(g).query(0, _target(g)),
+        _check_query),
+    'floyd_warshall': (lambda g: floyd_warshall(g)[0], _check_distances),
+    'prim_heap': (lambda g: prim_heap(g)[1], _check_mst),
+    'prim_dense': (lambda g: prim_dense(g)[1], _check_mst),
+    'kruskal': (lambda g: kruskal(g)[1], _check_mst),
+    'boruvka': (lambda g: boruvka(g)[1], _check_mst),
+}
+
+
+def _networkx():
+    import networkx as nx
+    return nx
+
+
+def to_networkx(graph):
+    """
+    照合用に networkx のグラフへ変換する（ノード名は整数ID）
+    """
+    nx = _networkx()
+    reference = nx.Graph()
+    reference.add_nodes_from(range(graph.num_nodes))
+    src, dst, weights = graph_edge_arrays(graph)
+    reference.add_weighted_edges_from(
+        zip(src.tolist(), dst.tolist(), weights.tolist()))
+    return reference
+
+
+# ----------------------------------------------------
+# メモリ使用量
+# ----------------------------------------------------
+
+def peak_rss():
+    """
+    プロセスのピーク RSS（バイト）
+    - Linux では /proc/self/status の VmHWM（reset_peak_rss() で戻せる）
+    - それ以外では getrusage の ru_maxrss
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS はバイト単位、Linux などは KiB 単位
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def reset_peak_rss():
+    """
+    ピーク RSS を現在の RSS に戻す（Linux 以外では何もしない）
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+# ----------------------------------------------------
+# 計測
+# ----------------------------------------------------
+
+def run_benchmark(families=None, algorithms=None, sizes=None, repeat=3,
+                  seed=0, check=True):
+    """
+    全ての (グラフ, 実装) の組を計測し、JSON に変換できる辞書で返す関数
+    - families / algorithms: 計測する系列・実装の名前のリスト（None は全て）
+    - sizes: {系列名: ノード数のリスト}（None は SIZES）
+    - 各結果の 'seconds' は repeat 回のうちの最良値、'edges_per_second' は
+      エッジ数をそれで割った値、'peak_rss_mib' は計測中のピーク RSS
+    - 'correct' は networkx の結果と一致すれば true、照合しなかった場合は null
+    """
+    if repeat < 1:
+        raise ValueError(f"repeat は 1 以上にしてください: {repeat}")
+    families = families or list(GRAPH_FAMILIES)
+    algorithms = algorithms or list(ALGORITHMS)
+    sizes = sizes or SIZES
+    if check:
+        try:
+            _networkx()
+        except ImportError:
+            check = False
+
+    results = []
+    for family in families:
+        for num_nodes in sizes[family]:
+            graph = GRAPH_FAMILIES[family](num_nodes, seed=seed)
+            reference = None
+            if check and graph.num_edges <= REFERENCE_LIMIT:
+                reference = to_networkx(graph)
+
+            for name in algorithms:
+                only, max_nodes = LIMITS.get(name, (None, None))
+                if only is not None and family not in only\
+                        or max_nodes is not None\
+                        and graph.num_nodes > max_nodes:
+                    continue
+                run, verify = ALGORITHMS[name]
+                reset_peak_rss()
+                rss_before = peak_rss()
+                best = float('inf')
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    result = run(graph)
+                    best = min(best, time.perf_counter() - start)
+
+                results.append({
+                    'family': family,
+                    'num_nodes': graph.num_nodes,
+                    'num_edges': graph.num_edges,
+                    'algorithm': name,
+                    'seconds': best,
+                    'edges_per_second': graph.num_edges / best,
+                    'peak_rss_mib': peak_rss() / 2**20,
+                    'rss_before_mib': rss_before / 2**20,
+                    'correct': None if reference is None
+                    else verify(graph, result, reference),
+                })
+                _print_result(results[-1])
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'settings': {'seed': seed, 'repeat': repeat,
+                     'max_weight': MAX_WEIGHT},
+        'results': results,
+    }
+
+
+def _print_result(result):
+    # 進捗は標準エラーに出す（標準出力は JSON 用）
+    correct = {True: 'ok', False: 'NG', None: '-'}[result['correct']]
+    print(f"{result['family']:<16}{result['num_nodes']:>9}"
+          f"{result['num_edges']:>10}  {result['algorithm']:<16}"
+          f"{result['seconds']:>9.4f} s{result['edges_per_second']:>14,.0f}"
+          f" edges/s{result['peak_rss_mib']:>9.1f} MiB  {correct}",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="合成グラフでグラフアルゴリズムの実装を計測する")
+    parser.add_argument('output', nargs='?',
+                        help="JSON の出力先（省略すると標準出力）")
+    parser.add_argument('--family', nargs='+', choices=list(GRAPH_FAMILIES),
+                        help="計測する系列（省略すると全て）")
+    parser.add_argument('--algorithm', nargs='+', choices=list(ALGORITHMS),
+                        help="計測する実装（省略すると全て）")
+    parser.add_argument('--sizes', nargs='+', type=int,
+                        help="全ての系列で使うノード数（省略すると SIZES）")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="各計測の繰り返し回数（最良値を使う）")
+    parser.add_argument('--seed', type=int, default=0, help="乱数の種")
+    parser.add_argument('--no-check', action='store_true',
+                        help="networkx の結果との照合を省く")
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat は 1 以上にしてください")
+
+    report = run_benchmark(
+        args.family, args.algorithm,
+        sizes=args.sizes and {family: args.sizes for family in GRAPH_FAMILIES},
+        repeat=args.repeat, seed=args.seed, check=not args.no_check)
+    if any(result['correct'] is False for result in report['results']):
+        print("networkx の結果と一致しない実装があります", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
@@ -0,0 +1,56 @@
+# ダイクストラ法の優先度付きキュー比較ベンチマーク
+# 同じグラフ・同じ始点で 'lazy' / 'indexed' / 'bucket' の実行時間とキューの最大要素数を測る
+# 実行: python -m graph_algorithm.bench_priority_queues
+#       (src ディレクトリで実行する)
+
+import time
+
+import numpy as np
+
+from .csr_graph import CSRGraph
+from .dijkstra_csr import QUEUE_TYPES, dijkstra
+
+
+def random_graph(num_nodes, avg_degree, max_weight, seed=0):
+    """
+    整数重み (1 .. max_weight) のランダムな無向グラフを作る関数
+    """
+    rng = np.random.default_rng(seed)
+    m = num_nodes * avg_degree // 2
+    src = rng.integers(0, num_nodes, m)
+    dst = rng.integers(0, num_nodes, m)
+    weights = rng.integers(1, max_weight + 1, m)
+    return CSRGraph.from_arrays(src, dst, weights, num_nodes=num_nodes)
+
+
+def run_benchmark(cases, repeat=3):
+    """
+    各グラフについてキューごとの実行時間（最良値）と最大要素数を表示する関数
+    """
+    print(f"{'graph':<28}{'queue':<10}{'time [s]':>10}{'peak size':>12}")
+    for name, graph in cases:
+        reference = None
+        for queue in QUEUE_TYPES:
+            best = float('inf')
+            for _ in range(repeat):
+                stats = {}
+                start = time.perf_counter()
+                distances, _ = dijkstra(graph, 0, queue=queue, stats=stats)
+                best = min(best, time.perf_counter() - start)
+            peak = stats['queue_peak']
+
+            # 全てのキューで同じ距離になることを確認
+            if reference is None:
+                reference = distances
+            assert np.array_equal(reference, distances), queue
+
+            print(f"{name:<28}{queue:<10}{best:>10.3f}{peak:>12}")
+
+
+if __name__ == '__main__':
+    cases = [
+        ('sparse n=100k deg=4 w<=10', random_graph(100_000, 4, 10)),
+        ('dense n=2k deg=400 w<=10', random_graph(2_000, 400, 10)),
+        ('dense n=2k deg=400 w<=1000', random_graph(2_000, 400, 1000)),
+    ]
+    run_benchmark(cases)
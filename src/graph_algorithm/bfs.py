@@ -1,47 +1,38 @@
 # breadth-first search
 # 幅優先探索
 
-import networkx as nx
-import matplotlib.pyplot as plt
 from collections import deque
+from plotting import pyplot
+from profiling import Profiler
+from .csr_graph import CSRGraph
+from .layout import cached_layout
 
-# --- 日本語フォント設定の強化 ---
-try:
-    # 広く使われる日本語フォントを複数指定して試す
-    plt.rcParams['font.family']\
-        = ['Meiryo', 'MS Gothic', 'Yu Gothic', 'DejaVu Sans']
-    # CJK文字のフォールバックを可能にする
-    plt.rcParams['font.sans-serif']\
-        = ['Meiryo', 'MS Gothic', 'Yu Gothic', 'DejaVu Sans']
-    # マイナス記号などが文字化けしないように設定
-    plt.rcParams['axes.unicode_minus'] = False
-except Exception as e:
-    # フォントが見つからない場合のフォールバック処理 (念のため)
-    print(f"Warning: Failed to set Japanese font settings. Error: {e}")
-# ----------------------------------
-
-# グラフを定義する（複雑すぎず、経路が見やすい例）
-G = nx.Graph()
-edges = [
-    ('A', 'B'), ('A', 'C'),
-    ('B', 'D'), ('B', 'E'),
-    ('C', 'F'), ('C', 'G'),
-    ('D', 'H'),
-    ('E', 'I')
-]
-G.add_edges_from(edges)
-
-# 描画位置を固定する（アニメーションでノードが動かないように）
-# ノード配置の再現性を確保するため、'spring_layout' を使用し 'seed' を指定
-pos = nx.spring_layout(G, seed=42)
-
-
-def visualize_bfs(graph, start_node, pause_time=1.5):
+
+def visualize_bfs(graph, start_node, pause_time=1.5, pos=None,
+                  recorder=None, profiler=None):
     """
     幅優先探索のステップを可視化する関数
     - 探索順序とキューの内容を表示
     - 一時停止時間を指定可能
+    - pos: ノードの描画位置（省略時は spring_layout）
+    - recorder: step_trace.StepRecorder を渡すと各ステップを記録する
+      (保存した記録は python -m step_trace で再生できる)
+    - profiler: profiling.Profiler を渡すと、計算・描画・待ち時間・出力の時間を
+      計測し、ステップごとの出力の方法を切り替える
     """
+    plt = pyplot()
+    if profiler is None:
+        profiler = Profiler()
+    from .graph_renderer import GraphRenderer
+
+    # 描画位置を固定する（アニメーションでノードが動かないように）
+    # ノード配置の再現性を確保するため、'spring_layout' を使用し 'seed' を指定
+    # (計算済みの配置はキャッシュから読み込む)
+    if pos is None:
+        pos = cached_layout(graph, 'spring', seed=42)
+
+    # 隣接リストは CSR 形式に一括変換して参照する
+    csr = CSRGraph.from_networkx(graph)
 
     # 状態管理のための辞書
     # 'unvisited': 未探索, 'queued': キューに追加済み, 'visited': 探索完了
@@ -60,120 +51,92 @@ def visualize_bfs(graph, start_node, pause_time=1.5):
         'unvisited': 'lightgray', 'queued': 'skyblue', 'visited': 'limegreen'
         }
 
+    # ノード・エッジ・ラベルの描画要素は最初に一度だけ作り、以降は変化分だけ更新する
+    plt.clf()
+    renderer = GraphRenderer(
+        plt.gca(), graph, pos, node_color=color_map['unvisited'],
+        edge_color='black', node_size=2500, font_size=10,
+        recorder=recorder)
+    renderer.set_node_color(start_node, color_map['queued'])
+
     print(f"--- BFS開始: 開始ノード '{start_node}' ---")
 
     # 描画ループ
+    profiler.start()
     while queue:
+        profiler.step()
 
         # ----------------------------------------------------
         # STEP 1: 探索前の状態を描画（次に探索するノードを強調）
         # ----------------------------------------------------
-
-        plt.clf()  # 前の描画をクリア
-
-        # 現在の状態を基にノードの色リストを作成
-        current_node_colors = [
-            color_map[node_status[node]] for node in graph.nodes
-            ]
-
-        # ノードラベルを更新: ノード名 + (探索順序)
-        node_labels = {}
-        for node in graph.nodes:
-            label = node
-            if node in exploration_order:
-                # 探索済みのノードには順序番号を付与
-                label += f'\n({exploration_order[node]}番目)'
-            node_labels[node] = label
-
-        # グラフを描画
-        nx.draw(
-            graph,
-            pos,
-            with_labels=True,
-            labels=node_labels,
-            node_color=current_node_colors,
-            node_size=2500,  # 見やすいようにサイズを調整
-            font_size=10,
-            font_weight='bold'
-        )
+        # ノードの色とラベルは直前のステップから変わらないので、タイトルだけ更新する
 
         # 2. 現在のキューに格納されているノードを出力
         current_queue_list = list(queue)
         current_node_to_explore = queue[0]
 
-        plt.title(
-            f"Queue: {current_queue_list}\n"
-            f"-> Next: {current_node_to_explore} を探索します"
-        )
+        with profiler.phase('draw'):
+            renderer.set_title(
+                f"Queue: {current_queue_list}\n"
+                f"-> Next: {current_node_to_explore} を探索します"
+            )
 
-        print(f"\n[STEP {exploration_counter}] Queue: {current_queue_list}")
-        print(f"   -> 次に探索: {current_node_to_explore}")
+        profiler.log(
+            f"\n[STEP {exploration_counter}] Queue: {current_queue_list}")
+        profiler.log(f"   -> 次に探索: {current_node_to_explore}")
 
         # 3. 一時停止
-        plt.pause(pause_time)
+        profiler.pause(pause_time, recorder)
 
         # ----------------------------------------------------
         # BFSのコア処理（ノードの探索を実行）
         # ----------------------------------------------------
 
-        current_node = queue.popleft()
+        with profiler.phase('compute'):
+            current_node = queue.popleft()
 
-        # 1. 探索順序を記録
-        exploration_order[current_node] = exploration_counter
-        exploration_counter += 1
+            # 1. 探索順序を記録
+            exploration_order[current_node] = exploration_counter
+            exploration_counter += 1
 
-        # 探索完了としてマーク
-        node_status[current_node] = 'visited'
+            # 探索完了としてマーク
+            node_status[current_node] = 'visited'
 
-        # 隣接ノードをチェックし、キューに追加
-        newly_queued = []
-        for neighbor in graph.neighbors(current_node):
-            if node_status[neighbor] == 'unvisited':
-                node_status[neighbor] = 'queued'
-                queue.append(neighbor)
-                newly_queued.append(neighbor)
+            # 隣接ノードをチェックし、キューに追加
+            newly_queued = []
+            for neighbor_id in csr.neighbors(csr.id_of(current_node)):
+                neighbor = csr.label_of(neighbor_id)
+                if node_status[neighbor] == 'unvisited':
+                    node_status[neighbor] = 'queued'
+                    queue.append(neighbor)
+                    newly_queued.append(neighbor)
 
         # ----------------------------------------------------
         # STEP 2: 探索後の状態を描画（探索完了とキューの更新を表示）
         # ----------------------------------------------------
 
-        plt.clf()  # 前の描画をクリア
-
-        # 状態とラベルを更新して再描画
-        current_node_colors = [
-            color_map[node_status[node]] for node in graph.nodes
-            ]
-
-        # ノードラベルを更新
-        node_labels = {}
-        for node in graph.nodes:
-            label = node
-            if node in exploration_order:
-                label += f'\n({exploration_order[node]}番目)'
-            node_labels[node] = label
-
-        nx.draw(
-            graph,
-            pos,
-            with_labels=True,
-            labels=node_labels,
-            node_color=current_node_colors,
-            node_size=2500,
-            font_size=10,
-            font_weight='bold'
-        )
-
-        # 2. キューの内容を出力 (探索後のキュー)
-        plt.title(
-            f"Node '{current_node}' " +
-            f"Explored (Order: {exploration_order[current_node]})\n"
-            f"Newly Queued: {newly_queued} | New Queue: {list(queue)}"
-        )
-
-        print(f"   -> 探索完了: {current_node} | 新規キュー追加: {newly_queued}")
+        with profiler.phase('draw'):
+            # 状態が変わったノードの色と、探索したノードのラベルだけを更新する
+            renderer.set_node_colors(
+                {node: color_map[node_status[node]]
+                 for node in [current_node] + newly_queued})
+            renderer.set_node_labels(
+                {current_node:
+                 f'{current_node}\n({exploration_order[current_node]}番目)'})
+
+            # 2. キューの内容を出力 (探索後のキュー)
+            renderer.set_title(
+                f"Node '{current_node}' " +
+                f"Explored (Order: {exploration_order[current_node]})\n"
+                f"Newly Queued: {newly_queued} | New Queue: {list(queue)}"
+            )
+
+        profiler.log(
+            f"   -> 探索完了: {current_node} | 新規キュー追加: {newly_queued}")
 
         # 3. 一時停止
-        plt.pause(pause_time)  # 1ノードの探索後の間
+        profiler.pause(pause_time, recorder)  # 1ノードの探索後の間
+    profiler.stop()
 
     print("\n--- BFS完了 ---")
 
@@ -188,5 +151,37 @@ def visualize_bfs(graph, start_node, pause_time=1.5):
     plt.show()
 
 
-# 実行（一時停止時間を1.5秒に設定）
-visualize_bfs(G, start_node='A', pause_time=1.5)
+if __name__ == '__main__':
+    import sys
+
+    import networkx as nx
+
+    # グラフを定義する（複雑すぎず、経路が見やすい例）
+    G = nx.Graph()
+    edges = [
+        ('A', 'B'), ('A', 'C'),
+        ('B', 'D'), ('B', 'E'),
+        ('C', 'F'), ('C', 'G'),
+        ('D', 'H'),
+        ('E', 'I')
+    ]
+    G.add_edges_from(edges)
+
+    # 引数に .npz ファイルのパスを渡すと、各ステップを記録して保存する
+    # (ウィンドウを閉じた後に保存する。python -m step_trace で再生できる)
+    recorder = None
+    if len(sys.argv) > 1:
+        from step_trace import StepRecorder
+        recorder = StepRecorder()
+
+    # 環境変数 ALGO_PROFILE を設定すると、計算・描画・待ち時間・出力の内訳を表示する
+    # (例: ALGO_PROFILE=1 / ALGO_PROFILE=sampled:5,cprofile)
+    profiler = Profiler.from_env()
+
+    # 実行（一時停止時間を1.5秒に設定）
+    visualize_bfs(G, start_node='A', pause_time=1.5, recorder=recorder,
+                  profiler=profiler)
+    if recorder is not None:
+        recorder.save(sys.argv[1])
+    if profiler is not None:
+        print(profiler.report())
@@ -0,0 +1,209 @@
+# level-synchronous breadth-first search
+# 幅優先探索（描画なし・CSR配列上でフロンティア単位に一括処理する版）
+
+import numpy as np
+
+
+def bfs_levels(graph, source, direction='auto', alpha=14.0, beta=24.0,
+               probe_rounds=8):
+    """
+    レベル同期型の幅優先探索を行う関数
+    - graph: CSRGraph
+    - direction: 'top-down' / 'bottom-up' / 'auto'（方向最適化）
+    - alpha, beta: 'auto' の切り替えしきい値 (Beamer らの方向最適化 BFS)
+        top-down -> bottom-up: フロンティアの出辺数 > 未訪問ノードの辺数 / alpha
+        bottom-up -> top-down: フロンティアのノード数 < 全ノード数 / beta
+    - 戻り値: (level, parent)
+        level[v]: 始点からのホップ数（到達不可は -1）
+        parent[v]: BFS木の親ノードID（始点と到達不可は -1）
+    """
+    n = graph.num_nodes
+    source_id = graph.id_of(source)
+
+    level = np.full(n, -1, dtype=np.int32)
+    parent = np.full(n, -1, dtype=graph.indices.dtype)
+    level[source_id] = 0
+
+    # bottom-up では「入ってくる辺」を調べるので、有向グラフは逆向きのグラフを使う
+    reverse = None
+    degree = graph.degree()
+    unexplored_edges = int(degree.sum()) - int(degree[source_id])
+
+    frontier = np.array([source_id], dtype=np.int64)
+    depth = 0
+    bottom_up = direction == 'bottom-up'
+
+    while len(frontier):
+        # ----------------------------------------------------
+        # 探索方向の決定
+        # ----------------------------------------------------
+        if direction == 'auto':
+            frontier_edges = int(degree[frontier].sum())
+            if not bottom_up and frontier_edges > unexplored_edges / alpha:
+                bottom_up = True
+            elif bottom_up and len(frontier) < n / beta:
+                bottom_up = False
+
+        if bottom_up:
+            if reverse is None:
+                reverse = graph.reverse()
+            frontier_mask = np.zeros(n, dtype=bool)
+            frontier_mask[frontier] = True
+            next_frontier = _bottom_up_step(
+                reverse, level, parent, frontier_mask, depth, probe_rounds)
+        else:
+            next_frontier = _top_down_step(
+                graph, level, parent, frontier, depth)
+
+        unexplored_edges -= int(degree[next_frontier].sum())
+        frontier = next_frontier
+        depth += 1
+
+    return level, parent
+
+
+def _top_down_step(graph, level, parent, frontier, depth):
+    """
+    フロンティアの全出辺を一括で取り出し、未訪問の隣接ノードを次のレベルにする
+    """
+    sources, positions = graph.expand(frontier)
+    neighbors = graph.indices[positions]
+
+    # 訪問済みを除外
+    unvisited = level[neighbors] == -1
+    sources, neighbors = sources[unvisited], neighbors[unvisited]
+
+    # 重複を除き、最初に見つかった辺の始点を親とする
+    next_frontier, first = np.unique(neighbors, return_index=True)
+    level[next_frontier] = depth + 1
+    parent[next_frontier] = sources[first]
+    return next_frontier
+
+
+def _bottom_up_step(reverse, level, parent, frontier_mask, depth,
+                    probe_rounds):
+    """
+    未訪問ノード側から、フロンティアに含まれる隣接ノードを探す
+    - 最初の probe_rounds 本の隣接ノードは1本ずつ調べ、親が見つかったノードは
+      以降の探索から外す（早期終了）
+    - 残りのノードは隣接リスト全体をまとめて調べる
+    """
+    candidates = np.flatnonzero(level == -1)
+    starts = reverse.indptr[candidates].astype(np.int64)
+    degrees = reverse.indptr[candidates + 1] - starts
+    found = []
+
+    for k in range(probe_rounds):
+        alive = degrees > k
+        candidates, starts, degrees\
+            = candidates[alive], starts[alive], degrees[alive]
+        if not len(candidates):
+            break
+
+        neighbors = reverse.indices[starts + k]
+        hit = frontier_mask[neighbors]
+        level[candidates[hit]] = depth + 1
+        parent[candidates[hit]] = neighbors[hit]
+        found.append(candidates[hit])
+
+        miss = ~hit
+        candidates, starts, degrees\
+            = candidates[miss], starts[miss], degrees[miss]
+
+    # 早期終了で見つからなかったノードは、残りの隣接ノードを一括で調べる
+    rest = degrees > probe_rounds
+    candidates, starts, degrees\
+        = candidates[rest], starts[rest], degrees[rest]
+    if len(candidates):
+        counts = degrees - probe_rounds
+        first_positions = starts + probe_rounds
+        offsets = np.repeat(first_positions - (np.cumsum(counts) - counts),
+                            counts)
+        positions = offsets + np.arange(int(counts.sum()), dtype=np.int64)
+        owners = np.repeat(candidates, counts)
+        neighbors = reverse.indices[positions]
+
+        hit = frontier_mask[neighbors]
+        owners, neighbors = owners[hit], neighbors[hit]
+        newly, first = np.unique(owners, return_index=True)
+        level[newly] = depth + 1
+        parent[newly] = neighbors[first]
+        found.append(newly)
+
+    if not found:
+        return np.empty(0, dtype=np.int64)
+    return np.sort(np.concatenate(found))
+
+
+def path_to(level, parent, target_id):
+    """
+    parent 配列を逆にたどり、始点から target_id までのノードIDリストを返す関数
+    - 到達不可の場合は空リスト
+    """
+    if level[target_id] == -1:
+        return []
+    path = []
+    node = int(target_id)
+    while node != -1:
+        path.append(node)
+        node = int(parent[node])
+    return path[::-1]
+
+
+def bidirectional_bfs(graph, source, target):
+    """
+    2点間の最短ホップ数と経路を、始点側と終点側の両方から探索して求める関数
+    - 毎回、出辺の合計が小さい方のフロンティアを1レベル分だけ広げる
+    - 両側の探索が出会った時点で終了する
+    - 戻り値: (ホップ数, ノード名のリスト)。到達不可の場合は (-1, [])
+    """
+    s = graph.id_of(source)
+    t = graph.id_of(target)
+    if s == t:
+        return 0, [source]
+
+    # 終点側は辺を逆にたどる（無向グラフでは同じグラフ）
+    reverse = graph.reverse()
+    n = graph.num_nodes
+
+    dist_f = np.full(n, -1, dtype=np.int32)
+    dist_b = np.full(n, -1, dtype=np.int32)
+    parent_f = np.full(n, -1, dtype=graph.indices.dtype)
+    parent_b = np.full(n, -1, dtype=graph.indices.dtype)
+    dist_f[s] = 0
+    dist_b[t] = 0
+
+    frontier_f = np.array([s], dtype=np.int64)
+    frontier_b = np.array([t], dtype=np.int64)
+    depth_f = depth_b = 0
+
+    while len(frontier_f) and len(frontier_b):
+        # 小さい方のフロンティアを広げ、相手側が訪問済みのノード（合流点）を探す
+        if (_frontier_edges(graph, frontier_f)
+                <= _frontier_edges(reverse, frontier_b)):
+            frontier_f = _top_down_step(
+                graph, dist_f, parent_f, frontier_f, depth_f)
+            depth_f += 1
+            meet = frontier_f[dist_b[frontier_f] != -1]
+        else:
+            frontier_b = _top_down_step(
+                reverse, dist_b, parent_b, frontier_b, depth_b)
+            depth_b += 1
+            meet = frontier_b[dist_f[frontier_b] != -1]
+
+        if len(meet):
+            # 1レベル分を広げ切っているので、合流点のうち合計距離が最小のものが最短
+            total = dist_f[meet] + dist_b[meet]
+            best = meet[np.argmin(total)]
+            path = (path_to(dist_f, parent_f, best)
+                    + path_to(dist_b, parent_b, best)[::-1][1:])
+            return int(total.min()), [graph.label_of(v) for v in path]
+
+    return -1, []
+
+
+def _frontier_edges(graph, frontier):
+    """
+    フロンティアのノードが持つ出辺の合計数
+    """
+    return int((graph.indptr[frontier + 1] - graph.indptr[frontier]).sum())
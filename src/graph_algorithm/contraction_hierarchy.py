@@ -0,0 +1,335 @@
+# contraction hierarchy
+# 縮約階層（同じグラフに何度も最短経路を問い合わせるための前処理つきインデックス）
+
+import heapq
+
+import numpy as np
+
+INF = float('inf')
+
+
+class ContractionHierarchy:
+    """
+    縮約階層による最短経路インデックス
+    - 前処理: 重要度の低いノードから順に縮約し、最短経路を保つためのショートカット
+      エッジを追加する。各ノードには縮約した順番 (rank) が付く
+    - クエリ: 始点からは rank が上がる向きのエッジだけ、終点からは逆向きに
+      rank が上がるエッジだけをたどる双方向ダイクストラ法
+    - 経路復元: ショートカットは「経由ノード」を記録しておき、元のエッジ列に展開する
+    - 最短距離はダイクストラ法と一致する（同じ長さの経路が複数ある場合、
+      返す経路はそのうちの1つ）
+    """
+
+    def __init__(self, rank, up, down, labels=None, directed=False):
+        """
+        - rank[v]: 縮約の順番
+        - up / down: (indptr, indices, weights, middle) の CSR 配列
+            up:   v から rank の高いノードへのエッジ (v -> x)
+            down: rank の高いノードから v へのエッジ (x -> v) を v 側に格納
+            middle: ショートカットの経由ノード（元のエッジは -1）
+        """
+        self.rank = np.asarray(rank)
+        self.up = tuple(np.asarray(a) for a in up)
+        self.down = tuple(np.asarray(a) for a in down)
+        self.labels = None if labels is None else list(labels)
+        self.label_to_id = None if labels is None\
+            else {label: i for i, label in enumerate(self.labels)}
+        self.directed = directed
+
+        # クエリ中は1要素ずつ参照するので、Python のリストにしておく
+        self._rank = self.rank.tolist()
+        self._up = tuple(a.tolist() for a in self.up)
+        self._down = tuple(a.tolist() for a in self.down)
+
+    @property
+    def num_nodes(self):
+        return len(self._rank)
+
+    @property
+    def num_shortcuts(self):
+        return int((self.up[3] != -1).sum() + (self.down[3] != -1).sum())
+
+    def id_of(self, label):
+        if self.label_to_id is None:
+            return int(label)
+        return self.label_to_id[label]
+
+    def label_of(self, node_id):
+        if self.labels is None:
+            return int(node_id)
+        return self.labels[node_id]
+
+    # ----------------------------------------------------
+    # 前処理
+    # ----------------------------------------------------
+
+    @classmethod
+    def build(cls, graph, witness_settle_limit=64):
+        """
+        CSRGraph から縮約階層を構築する関数
+        - 縮約の順番: エッジ差分（追加ショートカット数 - 削除エッジ数）
+          + 縮約済みの隣接ノード数 が小さいものから（遅延更新）
+        - witness_settle_limit: 迂回路 (witness) 探索で確定させるノード数の上限
+          (小さいほど前処理は速いが、不要なショートカットが増える)
+        """
+        n = graph.num_nodes
+
+        # 縮約中のグラフ: out_adj[u][v] = 重み, in_adj[v][u] = 重み
+        # (多重辺は最小の重みだけを残し、自己ループは除く)
+        out_adj = [dict() for _ in range(n)]
+        in_adj = [dict() for _ in range(n)]
+        for u, v, w in zip(graph.edge_sources().tolist(),
+                           graph.indices.tolist(), graph.weights.tolist()):
+            if u != v and w < out_adj[u].get(v, INF):
+                out_adj[u][v] = w
+                in_adj[v][u] = w
+        middle = {}
+
+        rank = [-1] * n
+        deleted_neighbors = [0] * n
+        up_edges = [None] * n
+        down_edges = [None] * n
+
+        def priority(v):
+            shortcuts = _find_shortcuts(out_adj, in_adj, v,
+                                        witness_settle_limit)
+            removed = len(out_adj[v]) + len(in_adj[v])
+            return len(shortcuts) - removed + deleted_neighbors[v], shortcuts
+
+        pq = [(priority(v)[0], v) for v in range(n)]
+        heapq.heapify(pq)
+
+        order = 0
+        while pq:
+            _, v = heapq.heappop(pq)
+            if rank[v] != -1:
+                continue
+
+            # 優先度を計算し直し、まだ最小なら縮約する（そうでなければ積み直す）
+            p, shortcuts = priority(v)
+            if pq and p > pq[0][0]:
+                heapq.heappush(pq, (p, v))
+                continue
+
+            rank[v] = order
+            order += 1
+
+            for u, x, w in shortcuts:
+                if w < out_adj[u].get(x, INF):
+                    out_adj[u][x] = w
+                    in_adj[x][u] = w
+                    middle[(u, x)] = v
+
+            # 残っている隣接ノードは全て v より rank が高い
+            up_edges[v] = [(x, w, middle.get((v, x), -1))
+                           for x, w in out_adj[v].items()]
+            down_edges[v] = [(u, w, middle.get((u, v), -1))
+                             for u, w in in_adj[v].items()]
+
+            for x in out_adj[v]:
+                del in_adj[x][v]
+                deleted_neighbors[x] += 1
+            for u in in_adj[v]:
+                del out_adj[u][v]
+                deleted_neighbors[u] += 1
+            out_adj[v] = {}
+            in_adj[v] = {}
+
+        return cls(rank, _to_csr(up_edges, graph.indices.dtype),
+                   _to_csr(down_edges, graph.indices.dtype),
+                   labels=graph.labels, directed=graph.directed)
+
+    # ----------------------------------------------------
+    # クエリ
+    # ----------------------------------------------------
+
+    def query(self, source, target):
+        """
+        source から target までの最短距離と経路を求める関数
+        - 戻り値: (距離, ノード名のリスト)。到達不可の場合は (inf, [])
+        """
+        s = self.id_of(source)
+        t = self.id_of(target)
+        if s == t:
+            return 0.0, [source]
+
+        dist = ({s: 0.0}, {t: 0.0})
+        pred = ({s: -1}, {t: -1})
+        queues = ([(0.0, s)], [(0.0, t)])
+        graphs = (self._up, self._down)
+        best, meet = INF, -1
+
+        # 両方向を交互に進め、どちらのキーの最小値も best 以上になったら終了
+        side = 0
+        while queues[0] or queues[1]:
+            if not queues[side]:
+                side = 1 - side
+            q = queues[side]
+            d_u, u = heapq.heappop(q)
+            if d_u > dist[side].get(u, INF):
+                side = 1 - side
+                continue
+            if d_u >= best:
+                q.clear()
+                side = 1 - side
+                continue
+
+            other = dist[1 - side].get(u)
+            if other is not None and d_u + other < best:
+                best, meet = d_u + other, u
+
+            indptr, indices, weights, _ = graphs[side]
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                new_dist = d_u + weights[e]
+                if new_dist < dist[side].get(v, INF):
+                    dist[side][v] = new_dist
+                    pred[side][v] = u
+                    heapq.heappush(q, (new_dist, v))
+            side = 1 - side
+
+        if meet == -1:
+            return INF, []
+
+        # 上向きの経路 (s -> meet) と (meet -> t) をつなぎ、ショートカットを展開
+        forward = _walk(pred[0], meet)[::-1]
+        backward = _walk(pred[1], meet)
+        path = self._unpack(forward + backward[1:])
+        return best, [self.label_of(v) for v in path]
+
+    def _unpack(self, path):
+        """
+        ショートカットを含むノード列を、元のエッジだけのノード列に展開する
+        """
+        result = [path[0]]
+        for a, b in zip(path, path[1:]):
+            stack = [(a, b)]
+            while stack:
+                x, y = stack.pop()
+                mid = self._middle(x, y)
+                if mid == -1:
+                    result.append(y)
+                else:
+                    # 後に積んだ方から取り出すので、(mid, y) を先に積む
+                    stack.append((mid, y))
+                    stack.append((x, mid))
+        return result
+
+    def _middle(self, a, b):
+        """
+        エッジ a -> b の経由ノード（rank の低い側のノードに格納されている）
+        """
+        if self._rank[a] < self._rank[b]:
+            indptr, indices, _, middle = self._up
+            owner, other = a, b
+        else:
+            indptr, indices, _, middle = self._down
+            owner, other = b, a
+        for e in range(indptr[owner], indptr[owner + 1]):
+            if indices[e] == other:
+                return middle[e]
+        raise KeyError(f"エッジ ({a}, {b}) が見つかりません")
+
+    # ----------------------------------------------------
+    # 保存と読み込み
+    # ----------------------------------------------------
+
+    def save(self, path):
+        """
+        .npz 形式で保存する（ノード名がある場合は object 配列として保存）
+        """
+        arrays = {'rank': self.rank, 'directed': np.array(self.directed)}
+        for prefix, csr in (('up', self.up), ('down', self.down)):
+            for name, array in zip(('indptr', 'indices', 'weights', 'middle'),
+                                   csr):
+                arrays[f'{prefix}_{name}'] = array
+        if self.labels is not None:
+            labels = np.empty(len(self.labels), dtype=object)
+            labels[:] = self.labels
+            arrays['labels'] = labels
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        save() で保存したファイルを読み込む
+        - ノード名は pickle で保存されているので、信頼できるファイルだけを読み込むこと
+        """
+        with np.load(path, allow_pickle=True) as data:
+            names = ('indptr', 'indices', 'weights', 'middle')
+            up = tuple(data[f'up_{name}'] for name in names)
+            down = tuple(data[f'down_{name}'] for name in names)
+            labels = data['labels'].tolist() if 'labels' in data else None
+            return cls(data['rank'], up, down, labels=labels,
+                       directed=bool(data['directed']))
+
+
+def _find_shortcuts(out_adj, in_adj, v, settle_limit):
+    """
+    ノード v を縮約するときに必要なショートカット (u, x, 重み) のリストを返す
+    - u -> v -> x より短いか同じ長さの、v を通らない迂回路が見つからない場合に必要
+    """
+    shortcuts = []
+    outs = list(out_adj[v].items())
+    if not outs:
+        return shortcuts
+    max_out = max(w for _, w in outs)
+
+    for u, w_in in in_adj[v].items():
+        witness = _witness_search(out_adj, u, v, w_in + max_out, settle_limit)
+        for x, w_out in outs:
+            if x == u:
+                continue
+            via_v = w_in + w_out
+            if witness.get(x, INF) > via_v:
+                shortcuts.append((u, x, via_v))
+    return shortcuts
+
+
+def _witness_search(out_adj, source, excluded, max_dist, settle_limit):
+    """
+    excluded を通らずに source から max_dist 以内で届くノードの距離を求める局所探索
+    """
+    dist = {source: 0.0}
+    pq = [(0.0, source)]
+    settled = 0
+    while pq and settled < settle_limit:
+        d_u, u = heapq.heappop(pq)
+        if d_u > dist[u]:
+            continue
+        if d_u > max_dist:
+            break
+        settled += 1
+        for x, w in out_adj[u].items():
+            if x == excluded:
+                continue
+            new_dist = d_u + w
+            if new_dist < dist.get(x, INF):
+                dist[x] = new_dist
+                heapq.heappush(pq, (new_dist, x))
+    return dist
+
+
+def _to_csr(edge_lists, index_dtype):
+    """
+    ノードごとの [(隣接ノード, 重み, 経由ノード), ...] を CSR 配列に変換する
+    """
+    counts = [len(edges) for edges in edge_lists]
+    indptr = np.zeros(len(edge_lists) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    flat = [edge for edges in edge_lists for edge in edges]
+    indices = np.array([e[0] for e in flat], dtype=index_dtype)
+    weights = np.array([e[1] for e in flat], dtype=np.float64)
+    middle = np.array([e[2] for e in flat], dtype=index_dtype)
+    return indptr, indices, weights, middle
+
+
+def _walk(pred, node):
+    """
+    pred を根までたどったノード列 (node, ..., 根)
+    """
+    path = []
+    while node != -1:
+        path.append(node)
+        node = pred[node]
+    return path
@@ -0,0 +1,249 @@
+# compressed sparse row graph
+# CSR形式のグラフ（bfs / dfs / dijkstra / prim で共通利用する軽量グラフ構造）
+
+import numpy as np
+
+
+class CSRGraph:
+    """
+    CSR (Compressed Sparse Row) 形式の隣接リスト
+    - ノード u の隣接ノードは indices[indptr[u]:indptr[u + 1]]
+    - 対応するエッジの重みは weights[indptr[u]:indptr[u + 1]]
+    - ノードは 0 .. num_nodes-1 の整数IDで扱い、labels で元のノード名と対応付ける
+      (labels を持たない場合は整数IDがそのままノード名になり、対応表の辞書も作らない)
+    - 無向グラフは各エッジを両方向に1本ずつ格納する
+    """
+
+    def __init__(self, indptr, indices, weights, labels=None, directed=False):
+        self.indptr = np.asarray(indptr)
+        self.indices = np.asarray(indices)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.directed = directed
+
+        # ラベル未指定の場合は整数IDをそのままラベルとする
+        # (大規模グラフで数千万要素の辞書を作らないため None のまま保持)
+        self.labels = None if labels is None else list(labels)
+        self.label_to_id = None if labels is None\
+            else {label: i for i, label in enumerate(self.labels)}
+
+        # エッジを変更するたびに増える版番号（計算結果のキャッシュの無効化に使う）
+        self.version = 0
+
+    # ----------------------------------------------------
+    # 生成
+    # ----------------------------------------------------
+
+    @classmethod
+    def from_arrays(cls, src, dst, weights=None, num_nodes=None,
+                    labels=None, directed=False):
+        """
+        整数IDの始点・終点配列から CSR を構築する関数
+        - 始点ごとの計数ソート（安定）で並べるので、同一始点内の入力順は保たれる
+        """
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        if weights is None:
+            weights = np.ones(len(src), dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)
+
+        if num_nodes is None:
+            if labels is not None:
+                num_nodes = len(labels)
+            elif len(src):
+                num_nodes = int(max(src.max(), dst.max())) + 1
+            else:
+                num_nodes = 0
+
+        # 無向グラフは逆向きのエッジも追加する
+        if not directed:
+            src, dst = np.concatenate([src, dst]), np.concatenate([dst, src])
+            weights = np.concatenate([weights, weights])
+
+        index_dtype = _index_dtype(num_nodes)
+        indptr_dtype = _index_dtype(len(src))
+
+        # 計数ソート: 次数の累積和で各ノードの開始位置を決める
+        counts = np.bincount(src, minlength=num_nodes)
+        indptr = np.zeros(num_nodes + 1, dtype=indptr_dtype)
+        np.cumsum(counts, out=indptr[1:])
+        order = np.argsort(src, kind='stable')
+
+        return cls(indptr, dst[order].astype(index_dtype), weights[order],
+                   labels=labels, directed=directed)
+
+    @classmethod
+    def from_edge_list(cls, edges, directed=False, nodes=None,
+                       default_weight=1.0):
+        """
+        (u, v) または (u, v, 重み) のリストから CSR を構築する関数
+        - ノード名は出現順に整数IDへ割り当てる（nodes 指定時はその順）
+        """
+        label_to_id = {}
+        labels = []
+        for node in nodes or []:
+            label_to_id[node] = len(labels)
+            labels.append(node)
+
+        src, dst, weights = [], [], []
+        for edge in edges:
+            u, v = edge[0], edge[1]
+            for node in (u, v):
+                if node not in label_to_id:
+                    label_to_id[node] = len(labels)
+                    labels.append(node)
+            src.append(label_to_id[u])
+            dst.append(label_to_id[v])
+            weights.append(edge[2] if len(edge) > 2 else default_weight)
+
+        return cls.from_arrays(src, dst, weights, num_nodes=len(labels),
+                               labels=labels, directed=directed)
+
+    @classmethod
+    def from_networkx(cls, graph, weight='weight', default_weight=1.0):
+        """
+        NetworkX のグラフから CSR を一括変換する関数
+        - ノード順・隣接ノードの順序は graph.nodes / graph.adj の順をそのまま保つ
+        """
+        labels = list(graph.nodes)
+        label_to_id = {node: i for i, node in enumerate(labels)}
+        num_nodes = len(labels)
+
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        indices = []
+        weights = []
+        for i, node in enumerate(labels):
+            neighbors = graph.adj[node]
+            for v, data in neighbors.items():
+                indices.append(label_to_id[v])
+                weights.append(data.get(weight, default_weight))
+            indptr[i + 1] = indptr[i] + len(neighbors)
+
+        return cls(indptr.astype(_index_dtype(len(indices))),
+                   np.array(indices, dtype=_index_dtype(num_nodes)),
+                   np.array(weights, dtype=np.float64),
+                   labels=labels, directed=graph.is_directed())
+
+    # ----------------------------------------------------
+    # 参照
+    # ----------------------------------------------------
+
+    @property
+    def num_nodes(self):
+        return len(self.indptr) - 1
+
+    @property
+    def num_edges(self):
+        """
+        エッジ数（無向グラフでは両方向を1本として数える）
+        """
+        n = len(self.indices)
+        return n if self.directed else n // 2
+
+    def id_of(self, label):
+        if self.label_to_id is None:
+            return int(label)
+        return self.label_to_id[label]
+
+    def label_of(self, node_id):
+        if self.labels is None:
+            return int(node_id)
+        return self.labels[node_id]
+
+    def neighbors(self, u):
+        """
+        ノードID u の隣接ノードIDの配列（コピーではなくビュー）
+        """
+        return self.indices[self.indptr[u]:self.indptr[u + 1]]
+
+    def neighbor_weights(self, u):
+        return self.weights[self.indptr[u]:self.indptr[u + 1]]
+
+    def degree(self):
+        return np.diff(self.indptr)
+
+    def edge_sources(self):
+        """
+        indices と同じ並びで、各エッジの始点IDを並べた配列
+        """
+        return np.repeat(np.arange(self.num_nodes, dtype=self.indices.dtype),
+                         self.degree())
+
+    def expand(self, nodes):
+        """
+        ノードIDの配列 nodes の全出辺をまとめて取り出す関数（ループなし）
+        - 戻り値: (各エッジの始点ID, 各エッジの indices / weights 上の位置)
+        """
+        nodes = np.asarray(nodes, dtype=np.int64)
+        starts = self.indptr[nodes].astype(np.int64)
+        counts = self.indptr[nodes + 1] - starts
+        total = int(counts.sum())
+        # 各ノードの区間 [start, start + count) を連結した位置配列を作る
+        offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        positions = offsets + np.arange(total, dtype=np.int64)
+        return np.repeat(nodes, counts), positions
+
+    def reverse(self):
+        """
+        全エッジの向きを反転したグラフ（無向グラフではそのまま）
+        """
+        if not self.directed:
+            return self
+        return CSRGraph.from_arrays(self.indices, self.edge_sources(),
+                                    self.weights, num_nodes=self.num_nodes,
+                                    labels=self.labels, directed=True)
+
+    # ----------------------------------------------------
+    # 変更
+    # ----------------------------------------------------
+
+    def edge_position(self, u, v):
+        """
+        ノードID u -> v のエッジの indices / weights 上の位置（無い場合は -1）
+        - 多重辺がある場合は重みが最小のもの
+        """
+        start = int(self.indptr[u])
+        hits = np.flatnonzero(self.neighbors(u) == v)
+        if not len(hits):
+            return -1
+        return start + int(hits[np.argmin(self.weights[start + hits])])
+
+    def set_weight(self, u, v, weight):
+        """
+        エッジ u -> v（ノード名で指定）の重みを変更する関数
+        - 無向グラフでは逆向きの格納分も同じ値にする
+        - 変更前の重みを返し、版番号を1つ進める
+        """
+        u_id, v_id = self.id_of(u), self.id_of(v)
+        position = self.edge_position(u_id, v_id)
+        if position == -1:
+            raise KeyError(f"エッジ ({u}, {v}) はグラフにありません")
+        old_weight = float(self.weights[position])
+        self.weights[position] = weight
+        if not self.directed and u_id != v_id:
+            self.weights[self.edge_position(v_id, u_id)] = weight
+        self.touch()
+        return old_weight
+
+    def touch(self):
+        """
+        版番号を進める（weights などの配列を直接書き換えた後に呼ぶ）
+        """
+        self.version += 1
+
+    def nbytes(self):
+        """
+        配列部分のメモリ使用量（バイト）
+        """
+        return self.indptr.nbytes + self.indices.nbytes + self.weights.nbytes
+
+    def __repr__(self):
+        kind = 'directed' if self.directed else 'undirected'
+        return (f"CSRGraph({kind}, nodes={self.num_nodes}, "
+                f"edges={self.num_edges})")
+
+
+def _index_dtype(max_value):
+    """
+    値の範囲に収まる最小の整数型（基本は int32）
+    """
+    return np.int32 if max_value < np.iinfo(np.int32).max else np.int64
@@ -0,0 +1,133 @@
+# shortest and longest paths on a DAG
+# 有向非巡回グラフ (DAG) の最短経路・最長経路（トポロジカル順に緩和する O(V+E) の方法）
+# - 優先度付きキューが不要で、負の重みも扱える
+# - 最長経路はジョブの依存関係グラフのクリティカルパスに使える
+
+import numpy as np
+
+from .dijkstra_csr import dijkstra
+
+
+def topological_levels(graph):
+    """
+    Kahn 法でトポロジカル順を求める関数（入次数 0 のノードをレベル単位で一括処理）
+    - 同じレベルのノード同士にはエッジが無いので、レベル内はまとめて処理できる
+    - 戻り値: レベルごとのノードIDの配列のリスト
+    - 閉路がある場合は ValueError
+    """
+    if not graph.directed:
+        raise ValueError("トポロジカル順は有向グラフでのみ定義されます")
+
+    indegree = np.bincount(graph.indices, minlength=graph.num_nodes)
+    frontier = np.flatnonzero(indegree == 0)
+    # 重複除去用: ノードごとに、入次数が 0 になったときの最初の出現位置
+    # (各ノードが 0 になるのは1回だけなので、初期化し直す必要はない)
+    first_seen = np.full(graph.num_nodes, np.iinfo(np.int64).max)
+    levels = []
+    visited = 0
+    while len(frontier):
+        levels.append(frontier)
+        visited += len(frontier)
+        _, positions = graph.expand(frontier)
+        targets = graph.indices[positions]
+        np.subtract.at(indegree, targets, 1)
+        # 多重辺や複数の親から同じノードが出てくるので、ソートせずに重複を除く
+        ready = targets[indegree[targets] == 0]
+        order = np.arange(len(ready))
+        np.minimum.at(first_seen, ready, order)
+        frontier = ready[first_seen[ready] == order]
+
+    if visited < graph.num_nodes:
+        raise ValueError("グラフに閉路があるため、トポロジカル順が存在しません")
+    return levels
+
+
+def topological_order(graph):
+    """
+    トポロジカル順に並べたノードIDの配列
+    """
+    levels = topological_levels(graph)
+    if not levels:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(levels)
+
+
+def dag_shortest_paths(graph, source, longest=False, on_cycle='raise'):
+    """
+    DAG 上で始点からの最短距離（longest=True なら最長距離）を求める関数
+    - on_cycle: 閉路があった場合の動作
+        'raise': ValueError を送出
+        'dijkstra': ダイクストラ法で計算する（最短経路・重み 0 以上の場合のみ）
+    - 戻り値: (distances, predecessors)
+        到達不可の距離は最短なら inf、最長なら -inf
+    """
+    try:
+        levels = topological_levels(graph)
+    except ValueError:
+        if on_cycle == 'dijkstra' and not longest and graph.directed:
+            return dijkstra(graph, source)
+        raise
+
+    n = graph.num_nodes
+    distances = np.full(n, np.inf)
+    predecessors = np.full(n, -1, dtype=graph.indices.dtype)
+    distances[graph.id_of(source)] = 0.0
+
+    # 最長経路は重みの符号を反転した最短経路として求める
+    sign = -1.0 if longest else 1.0
+    _relax_levels(graph, levels, distances, predecessors, sign)
+
+    if longest:
+        distances = -distances
+    return distances, predecessors
+
+
+def critical_path(graph):
+    """
+    DAG 全体の最長経路（クリティカルパス）を求める関数
+    - どのノードからでも開始できるものとして、重みの合計が最大の経路を返す
+    - 戻り値: (経路の長さ, ノード名のリスト)
+    """
+    levels = topological_levels(graph)
+    n = graph.num_nodes
+    if n == 0:
+        return 0.0, []
+
+    # 全ノードを距離 0 の始点として、符号を反転した最短経路を求める
+    distances = np.zeros(n)
+    predecessors = np.full(n, -1, dtype=graph.indices.dtype)
+    _relax_levels(graph, levels, distances, predecessors, -1.0)
+
+    end = int(np.argmin(distances))
+    path = []
+    node = end
+    while node != -1:
+        path.append(graph.label_of(node))
+        node = int(predecessors[node])
+    return float(-distances[end]), path[::-1]
+
+
+def _relax_levels(graph, levels, distances, predecessors, sign):
+    """
+    トポロジカル順のレベルごとに、到達済みノードの全出辺をまとめて緩和する
+    - 同じ終点への候補が複数ある場合は、最小の候補だけを採用する
+      (np.minimum.at で終点に直接書き込むので、ソートせずに全体で O(V+E))
+    """
+    for level in levels:
+        active = level[np.isfinite(distances[level])]
+        if not len(active):
+            continue
+        sources, positions = graph.expand(active)
+        if not len(positions):
+            continue
+        targets = graph.indices[positions]
+        candidates = distances[sources] + sign * graph.weights[positions]
+
+        # 同じレベルのノード同士を結ぶエッジは無いので、active の距離は
+        # 前のレベルまでの緩和で確定している（このレベルの全出辺を一括で緩和してよい）
+        previous = distances[targets]
+        np.minimum.at(distances, targets, candidates)
+
+        # 最小値を与えた候補の始点を親にする（同じ値の候補はどれでもよい）
+        better = (candidates < previous) & (candidates == distances[targets])
+        predecessors[targets[better]] = sources[better]
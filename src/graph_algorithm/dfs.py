@@ -1,40 +1,35 @@
 # depth-first search
 # 深さ優先探索
 
-import networkx as nx
-import matplotlib.pyplot as plt
 from collections import deque  # スタックの代わりとしてdequeを流用
+from plotting import pyplot
+from profiling import Profiler
+from .csr_graph import CSRGraph
+from .layout import cached_layout
 
-# --- 日本語フォント設定（前回成功した設定を再利用）---
-plt.rcParams['font.family']\
-      = ['Meiryo', 'MS Gothic', 'Yu Gothic', 'DejaVu Sans']
-plt.rcParams['font.sans-serif']\
-      = ['Meiryo', 'MS Gothic', 'Yu Gothic', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
-# --------------------------------------------------------
 
-# グラフを定義する（前回の例と同じグラフ構造）
-G = nx.Graph()
-edges = [
-    ('A', 'B'), ('A', 'C'),
-    ('B', 'D'), ('B', 'E'),
-    ('C', 'F'), ('C', 'G'),
-    ('D', 'H'),
-    ('E', 'I')
-]
-G.add_edges_from(edges)
-
-# ノード配置の再現性を確保
-pos = nx.spring_layout(G, seed=42)
-
-plt.figure()
-
-
-def visualize_dfs(graph, start_node, pause_time=1.5):
+def visualize_dfs(graph, start_node, pause_time=1.5, pos=None,
+                  recorder=None, profiler=None):
     """
     深さ優先探索のステップを可視化する関数（スタック使用）
     - 探索順序とスタックの内容を表示
+    - pos: ノードの描画位置（省略時は spring_layout）
+    - recorder: step_trace.StepRecorder を渡すと各ステップを記録する
+      (保存した記録は python -m step_trace で再生できる)
+    - profiler: profiling.Profiler を渡すと、計算・描画・待ち時間・出力の時間を
+      計測し、ステップごとの出力の方法を切り替える
     """
+    plt = pyplot()
+    if profiler is None:
+        profiler = Profiler()
+    from .graph_renderer import GraphRenderer
+
+    # ノード配置の再現性を確保
+    if pos is None:
+        pos = cached_layout(graph, 'spring', seed=42)
+
+    # 隣接リストは CSR 形式に一括変換して参照する
+    csr = CSRGraph.from_networkx(graph)
 
     # 状態管理のための辞書
     node_status = {node: 'unvisited' for node in graph.nodes}
@@ -49,106 +44,96 @@ def visualize_dfs(graph, start_node, pause_time=1.5):
     color_map =\
         {'unvisited': 'lightgray', 'queued': 'skyblue', 'visited': 'limegreen'}
 
+    # ノード・エッジ・ラベルの描画要素は最初に一度だけ作り、以降は変化分だけ更新する
+    plt.clf()
+    renderer = GraphRenderer(
+        plt.gca(), graph, pos, node_color=color_map['unvisited'],
+        edge_color='black', node_size=2500, font_size=10,
+        recorder=recorder)
+    renderer.set_node_color(start_node, color_map['queued'])
+
     print(f"--- DFS開始: 開始ノード '{start_node}' ---")
 
+    profiler.start()
     while stack:
+        profiler.step()
 
         # ----------------------------------------------------
         # STEP 1: 探索前の状態を描画（次に探索するノードを強調）
         # ----------------------------------------------------
-
-        plt.clf()
-
-        current_node_colors\
-            = [color_map[node_status[node]] for node in graph.nodes]
-
-        node_labels = {}
-        for node in graph.nodes:
-            label = node
-            if node in exploration_order:
-                label += f'\n({exploration_order[node]}番目)'
-            node_labels[node] = label
-
-        nx.draw(
-            graph, pos, with_labels=True, labels=node_labels,
-            node_color=current_node_colors, node_size=2500, font_size=10,
-            font_weight='bold'
-        )
+        # ノードの色とラベルは直前のステップから変わらないので、タイトルだけ更新する
 
         # スタックの内容を出力（キューではなくスタックとして表示）
         current_stack_list = list(stack)
         current_node_to_explore = stack[-1]  # スタックの末尾（LIFO）
 
-        plt.title(
-            f"Stack: {current_stack_list}\n"
-            f"-> Next: {current_node_to_explore} を探索します"
-        )
+        with profiler.phase('draw'):
+            renderer.set_title(
+                f"Stack: {current_stack_list}\n"
+                f"-> Next: {current_node_to_explore} を探索します"
+            )
 
-        print(f"\n[STEP {exploration_counter}] Stack: {current_stack_list}")
-        print(f"   -> 次に探索: {current_node_to_explore}")
+        profiler.log(
+            f"\n[STEP {exploration_counter}] Stack: {current_stack_list}")
+        profiler.log(f"   -> 次に探索: {current_node_to_explore}")
 
-        plt.pause(pause_time)  # 1. 一時停止
+        profiler.pause(pause_time, recorder)  # 1. 一時停止
 
         # ----------------------------------------------------
         # DFSのコア処理
         # ----------------------------------------------------
 
-        # スタックから要素を取り出す（pop()で末尾の要素を取り出す＝LIFO）
-        current_node = stack.pop()
+        with profiler.phase('compute'):
+            # スタックから要素を取り出す（pop()で末尾の要素を取り出す＝LIFO）
+            current_node = stack.pop()
 
-        exploration_order[current_node] = exploration_counter
-        exploration_counter += 1
+            exploration_order[current_node] = exploration_counter
+            exploration_counter += 1
 
-        node_status[current_node] = 'visited'
+            node_status[current_node] = 'visited'
 
-        newly_stacked = []
-        # DFSでは、隣接ノードをスタックに入れる順序が探索経路に影響を与えるため、
-        # グラフのノード順（アルファベット順など）で処理します。
-        # 逆順にスタックに入れると、次に探索されるのがアルファベット順になりますが、
-        # ここではNetworkXのデフォルト順で処理します。
+            newly_stacked = []
+            # DFSでは、隣接ノードをスタックに入れる順序が探索経路に影響を与えるため、
+            # グラフのノード順（アルファベット順など）で処理します。
+            # 逆順にスタックに入れると、次に探索されるのがアルファベット順になりますが、
+            # ここではNetworkXのデフォルト順で処理します。
 
-        # 降順で処理すると、次に探索されるのが昇順（A, B, C...）になる
-        # 隣接ノードリストを先に取得する
-        neighbors = list(graph.neighbors(current_node))
+            # 降順で処理すると、次に探索されるのが昇順（A, B, C...）になる
+            # 隣接ノードリストを先に取得する
+            neighbors = [csr.label_of(v)
+                         for v in csr.neighbors(csr.id_of(current_node))]
 
-        # そのリストをソートしてループする
-        for neighbor in sorted(neighbors, reverse=True):
-            if node_status[neighbor] == 'unvisited':
-                node_status[neighbor] = 'queued'
-                stack.append(neighbor)
-                newly_stacked.append(neighbor)
+            # そのリストをソートしてループする
+            for neighbor in sorted(neighbors, reverse=True):
+                if node_status[neighbor] == 'unvisited':
+                    node_status[neighbor] = 'queued'
+                    stack.append(neighbor)
+                    newly_stacked.append(neighbor)
 
         # ----------------------------------------------------
         # STEP 2: 探索後の状態を描画
         # ----------------------------------------------------
 
-        plt.clf()
-
-        current_node_colors\
-            = [color_map[node_status[node]] for node in graph.nodes]
-
-        node_labels = {}
-        for node in graph.nodes:
-            label = node
-            if node in exploration_order:
-                label += f'\n({exploration_order[node]}番目)'
-            node_labels[node] = label
-
-        nx.draw(
-            graph, pos, with_labels=True, labels=node_labels,
-            node_color=current_node_colors, node_size=2500,
-            font_size=10, font_weight='bold'
-        )
+        with profiler.phase('draw'):
+            # 状態が変わったノードの色と、探索したノードのラベルだけを更新する
+            renderer.set_node_colors(
+                {node: color_map[node_status[node]]
+                 for node in [current_node] + newly_stacked})
+            renderer.set_node_labels(
+                {current_node:
+                 f'{current_node}\n({exploration_order[current_node]}番目)'})
 
-        plt.title(
-            f"Node '{current_node}' "
-            f"Explored (Order: {exploration_order[current_node]})\n"
-            f"Newly Stacked: {newly_stacked} | New Stack: {list(stack)}"
-        )
+            renderer.set_title(
+                f"Node '{current_node}' "
+                f"Explored (Order: {exploration_order[current_node]})\n"
+                f"Newly Stacked: {newly_stacked} | New Stack: {list(stack)}"
+            )
 
-        print(f"   -> 探索完了: {current_node} | 新規スタック追加: {newly_stacked}")
+        profiler.log(f"   -> 探索完了: {current_node} | "
+                     f"新規スタック追加: {newly_stacked}")
 
-        plt.pause(pause_time)  # 2. 一時停止
+        profiler.pause(pause_time, recorder)  # 2. 一時停止
+    profiler.stop()
 
     print("\n--- DFS完了 ---")
 
@@ -160,5 +145,38 @@ def visualize_dfs(graph, start_node, pause_time=1.5):
     plt.show()
 
 
-# 実行
-visualize_dfs(G, start_node='A', pause_time=1.5)
+if __name__ == '__main__':
+    import sys
+
+    import networkx as nx
+
+    # グラフを定義する（前回の例と同じグラフ構造）
+    G = nx.Graph()
+    edges = [
+        ('A', 'B'), ('A', 'C'),
+        ('B', 'D'), ('B', 'E'),
+        ('C', 'F'), ('C', 'G'),
+        ('D', 'H'),
+        ('E', 'I')
+    ]
+    G.add_edges_from(edges)
+
+    # 引数に .npz ファイルのパスを渡すと、各ステップを記録して保存する
+    # (ウィンドウを閉じた後に保存する。python -m step_trace で再生できる)
+    recorder = None
+    if len(sys.argv) > 1:
+        from step_trace import StepRecorder
+        recorder = StepRecorder()
+
+    # 環境変数 ALGO_PROFILE を設定すると、計算・描画・待ち時間・出力の内訳を表示する
+    # (例: ALGO_PROFILE=1 / ALGO_PROFILE=sampled:5,cprofile)
+    profiler = Profiler.from_env()
+
+    # 実行
+    pyplot().figure()
+    visualize_dfs(G, start_node='A', pause_time=1.5, recorder=recorder,
+                  profiler=profiler)
+    if recorder is not None:
+        recorder.save(sys.argv[1])
+    if profiler is not None:
+        print(profiler.report())
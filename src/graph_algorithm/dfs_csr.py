@@ -0,0 +1,179 @@
+# depth-first search toolkit
+# 深さ優先探索（描画なし・再帰なし）と、それを使ったグラフの分解
+
+import numpy as np
+
+from .csr_graph import CSRGraph
+
+
+def dfs_forest(graph):
+    """
+    全ノードを対象に非再帰の深さ優先探索を1回だけ行い、結果を配列で返す関数
+    - 再帰の代わりに「ノードのスタック」と「ノードごとの次に調べる辺の位置」を使う
+      ので、深いグラフでも再帰上限に達しない
+    - 無向グラフ: 親への辺を1本だけ除いた lowlink（橋・関節点の判定に使う）
+    - 有向グラフ: Tarjan の lowlink と強連結成分
+    - 戻り値: 以下の NumPy 配列を持つ辞書
+        'discovery': 発見時刻, 'finish': 終了時刻 (共通のカウンタ 0 .. 2n-1)
+        'parent': DFS木の親（根は -1）, 'root': 属するDFS木の根
+        'low': lowlink, 'order': 発見順に並べたノードID
+        'scc': 強連結成分の番号（有向グラフのみ）
+    """
+    n = graph.num_nodes
+    directed = graph.directed
+
+    # 1要素ずつのアクセスが中心なので、NumPy配列よりリストの方が速い
+    indptr = graph.indptr.tolist()
+    indices = graph.indices.tolist()
+    next_edge = indptr[:-1]
+
+    discovery = [-1] * n
+    finish = [-1] * n
+    low = [0] * n
+    parent = [-1] * n
+    root_of = [-1] * n
+    order = []
+
+    # 無向グラフ: 親へ戻る辺を1本スキップしたかどうか（多重辺は後方辺として扱う）
+    skipped_parent = [False] * n
+    # 有向グラフ: Tarjan の強連結成分用スタック
+    on_stack = [False] * n
+    scc_stack = []
+    scc = [-1] * n
+    num_scc = 0
+
+    clock = 0
+    for root in range(n):
+        if discovery[root] != -1:
+            continue
+
+        discovery[root] = low[root] = clock
+        clock += 1
+        root_of[root] = root
+        order.append(root)
+        stack = [root]
+        if directed:
+            scc_stack.append(root)
+            on_stack[root] = True
+
+        while stack:
+            u = stack[-1]
+            e = next_edge[u]
+
+            if e < indptr[u + 1]:
+                # 次の辺を1本だけ調べる
+                next_edge[u] = e + 1
+                v = indices[e]
+
+                if discovery[v] == -1:
+                    # 木の辺: v を発見してスタックに積む
+                    parent[v] = u
+                    discovery[v] = low[v] = clock
+                    clock += 1
+                    root_of[v] = root
+                    order.append(v)
+                    stack.append(v)
+                    if directed:
+                        scc_stack.append(v)
+                        on_stack[v] = True
+                elif directed:
+                    if on_stack[v] and discovery[v] < low[u]:
+                        low[u] = discovery[v]
+                elif v == parent[u] and not skipped_parent[u]:
+                    skipped_parent[u] = True
+                elif discovery[v] < low[u]:
+                    low[u] = discovery[v]
+                continue
+
+            # u の辺を調べ終えた: 終了時刻を記録し、親の lowlink を更新
+            stack.pop()
+            finish[u] = clock
+            clock += 1
+            p = parent[u]
+            if p != -1 and low[u] < low[p]:
+                low[p] = low[u]
+
+            # u が強連結成分の代表なら、スタックから成分をまとめて取り出す
+            if directed and low[u] == discovery[u]:
+                while True:
+                    w = scc_stack.pop()
+                    on_stack[w] = False
+                    scc[w] = num_scc
+                    if w == u:
+                        break
+                num_scc += 1
+
+    index_dtype = graph.indices.dtype
+    result = {
+        'discovery': np.array(discovery, dtype=np.int64),
+        'finish': np.array(finish, dtype=np.int64),
+        'parent': np.array(parent, dtype=index_dtype),
+        'root': np.array(root_of, dtype=index_dtype),
+        'low': np.array(low, dtype=np.int64),
+        'order': np.array(order, dtype=index_dtype),
+    }
+    if directed:
+        result['scc'] = np.array(scc, dtype=index_dtype)
+    return result
+
+
+def connected_components(graph):
+    """
+    連結成分を求める関数（有向グラフは向きを無視した弱連結成分）
+    - 戻り値: (成分数, 各ノードの成分番号の配列)
+    """
+    if graph.directed:
+        graph = CSRGraph.from_arrays(graph.edge_sources(), graph.indices,
+                                     num_nodes=graph.num_nodes)
+    roots = dfs_forest(graph)['root']
+    # 根のノードIDを 0 から始まる連番に振り直す
+    unique_roots, labels = np.unique(roots, return_inverse=True)
+    return len(unique_roots), labels
+
+
+def strongly_connected_components(graph):
+    """
+    強連結成分を求める関数（非再帰の Tarjan 法）
+    - 成分番号は縮約グラフのトポロジカル順の逆順になる
+    - 戻り値: (成分数, 各ノードの成分番号の配列)
+    """
+    if not graph.directed:
+        return connected_components(graph)
+    scc = dfs_forest(graph)['scc']
+    return (int(scc.max()) + 1 if len(scc) else 0), scc
+
+
+def bridges_and_articulation_points(graph):
+    """
+    無向グラフの橋と関節点を求める関数
+    - 橋: DFS木の辺 (p, u) で low[u] > discovery[p]
+    - 関節点: 根以外は low[子] >= discovery[自分] となる子を持つノード、
+      根は子を2つ以上持つノード
+    - 戻り値: (橋のノードIDペアの配列 (k, 2), 関節点のノードIDの配列)
+    """
+    if graph.directed:
+        raise ValueError("橋と関節点は無向グラフでのみ定義されます")
+
+    result = dfs_forest(graph)
+    discovery = result['discovery']
+    low = result['low']
+    parent = result['parent']
+
+    children = np.flatnonzero(parent != -1)
+    parents = parent[children]
+
+    is_bridge = low[children] > discovery[parents]
+    bridges = np.column_stack([parents[is_bridge], children[is_bridge]])
+
+    # 根以外の関節点
+    parent_is_root = parent[parents] == -1
+    cut = (low[children] >= discovery[parents]) & ~parent_is_root
+    non_root_points = np.unique(parents[cut])
+
+    # 子を2つ以上持つ根
+    child_counts = np.bincount(parents[parent_is_root],
+                               minlength=graph.num_nodes)
+    root_points = np.flatnonzero(child_counts >= 2)
+
+    articulation_points = np.union1d(non_root_points, root_points)
+    return bridges, articulation_points
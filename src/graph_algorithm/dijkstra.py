@@ -1,34 +1,10 @@
 # ダイクストラ法
 
-import networkx as nx
-import matplotlib.pyplot as plt
-from matplotlib.lines import Line2D
 import heapq
-
-# --- 日本語フォント設定（成功した設定を再利用）---
-plt.rcParams['font.family']\
-    = ['Meiryo', 'MS Gothic', 'Yu Gothic', 'DejaVu Sans']
-plt.rcParams['font.sans-serif']\
-    = ['Meiryo', 'MS Gothic', 'Yu Gothic', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
-# --------------------------------------------------------
-
-# グラフを定義する（ノードと重み付きエッジ）
-G = nx.Graph()
-# (ノード1, ノード2, 重み)
-edges_with_weights = [
-    ('A', 'B', 4), ('A', 'C', 2),
-    ('B', 'C', 5), ('B', 'D', 10),
-    ('C', 'E', 3),
-    ('D', 'F', 11),
-    ('E', 'D', 4), ('E', 'F', 5)
-]
-G.add_weighted_edges_from(edges_with_weights)
-
-# ノード配置の再現性を確保
-pos = nx.spring_layout(G, seed=42)
-
-plt.figure(figsize=(12, 6))
+from plotting import pyplot
+from profiling import Profiler
+from .csr_graph import CSRGraph
+from .layout import cached_layout
 
 
 def _get_shortest_path_edges(predecessors):
@@ -40,10 +16,18 @@ def _get_shortest_path_edges(predecessors):
     return spt_edges
 
 
+def _distance_label(node, distance, caption='距離'):
+    """ノードラベル (ノード名 + 距離) を作るヘルパー関数"""
+    dist_str = f'{distance:g}' if distance != float('inf') else '∞'
+    return f'{node}\n({caption}: {dist_str})'
+
+
 def create_legend(ax, current_step_is_final=False):
     """
     plt.legend() を使用して、ノードとエッジの凡例を作成する関数
     """
+    from matplotlib.lines import Line2D
+
     legend_elements = []
     # --- ノード凡例 (Line2Dのmarker='o'で円として表現) ---
     legend_elements.append(
@@ -75,12 +59,31 @@ def create_legend(ax, current_step_is_final=False):
               title="【凡例】", fontsize=9, title_fontsize=10)
 
 
-def visualize_dijkstra(graph, start_node, pause_time=1.5):
+def visualize_dijkstra(graph, start_node, pause_time=1.5, pos=None,
+                       recorder=None, profiler=None):
     """
     ダイクストラ法のステップを可視化する関数
+    - pos: ノードの描画位置（省略時は spring_layout）
+    - recorder: step_trace.StepRecorder を渡すと各ステップを記録する
+      (保存した記録は python -m step_trace で再生できる)
+    - profiler: profiling.Profiler を渡すと、計算・描画・待ち時間・出力の時間を
+      計測し、ステップごとの出力の方法を切り替える
     """
+    plt = pyplot()
+    if profiler is None:
+        profiler = Profiler()
+    import networkx as nx
+    from .graph_renderer import GraphRenderer
+
+    # ノード配置の再現性を確保
+    if pos is None:
+        pos = cached_layout(graph, 'spring', seed=42)
+
     nodes = list(graph.nodes())
 
+    # 隣接リストと重みは CSR 形式に一括変換して参照する
+    csr = CSRGraph.from_networkx(graph)
+
     # 1. 初期化
     # 距離のディクショナリ: 全て無限大で初期化
     distances = {node: float('inf') for node in nodes}
@@ -95,9 +98,6 @@ def visualize_dijkstra(graph, start_node, pause_time=1.5):
     # 優先度付きキュー: (距離, ノード名)
     pq = [(0, start_node)]
 
-    # 描画用: ノードとエッジの色の初期設定
-    node_colors = ['lightgray'] * len(nodes)  # 'lightgray': 未確定/未到達
-    node_color_map = {node: 'lightgray' for node in nodes}
     step_counter = 1
 
     # NetworkXからエッジの重みを取得
@@ -106,51 +106,48 @@ def visualize_dijkstra(graph, start_node, pause_time=1.5):
     # グラフ描画エリアを左にずらす（凡例のスペースを確保）
     plt.subplots_adjust(right=0.75)
 
+    # ノード・エッジ・ラベルの描画要素は最初に一度だけ作り、以降は変化分だけ更新する
+    # 'lightgray': 未確定/未到達
+    plt.clf()
+    ax = plt.gca()
+    renderer = GraphRenderer(
+        ax, graph, pos, node_color='lightgray', edge_color='gray',
+        node_size=3000, font_size=10,
+        labels={node: _distance_label(node, distances[node])
+                for node in nodes},
+        edge_labels=edge_labels, recorder=recorder)
+    create_legend(ax)
+
+    # 緩和処理中としてオレンジで強調しているエッジ
+    highlighted_edge = None
+
     print(f"--- ダイクストラ法開始: 始点 '{start_node}' ---")
 
+    profiler.start()
     while pq:
-        plt.clf()
-        ax = plt.gca()  # 現在のAxesを取得
-
         # 最小距離のノードを取得
-        current_dist, u = heapq.heappop(pq)
-
-        if u not in finalized_nodes:
-            # STEP 1: 処理対象ノードの強調
-            node_color_map[u] = 'red'  # 処理対象を赤に
-
-        # ノードラベル (ノード名 + 距離) を更新
-        node_labels = {}
-        for node in nodes:
-            dist_str = str(distances[node])\
-                if distances[node] != float('inf') else '∞'
-            node_labels[node] = f'{node}\n(距離: {dist_str})'
-
-        node_colors = [node_color_map[node] for node in nodes]
+        with profiler.phase('compute'):
+            current_dist, u = heapq.heappop(pq)
 
-        # 描画 (ここではエッジの色はリセット、重みラベルは未表示)
-        nx.draw_networkx(
-            graph, pos, with_labels=True, labels=node_labels,
-            node_color=node_colors, node_size=3000, font_size=10,
-            font_weight='bold', edge_color='gray', ax=ax
-        )
-
-        # エッジの重みを出力
-        nx.draw_networkx_edge_labels(
-            graph, pos, edge_labels=edge_labels,
-            font_color='darkslategrey', ax=ax
-        )
-
-        # 凡例の追加
-        create_legend(ax)
+        # 前のステップで強調したエッジの色を戻す
+        if highlighted_edge is not None:
+            with profiler.phase('draw'):
+                renderer.set_edge_color(highlighted_edge, 'gray')
+            highlighted_edge = None
 
         # ----------------------------------------------------
         # 処理前の一時停止
         # ----------------------------------------------------
         if u not in finalized_nodes:
-            print(f"\n[STEP {step_counter}] 確定候補ノード: {u} (距離: {current_dist})")
-            plt.title(f"Step {step_counter}: ノード '{u}' を処理中（距離確定）")
-            plt.pause(pause_time)
+            profiler.step()
+            # STEP 1: 処理対象ノードの強調
+            with profiler.phase('draw'):
+                renderer.set_node_color(u, 'red')  # 処理対象を赤に
+                renderer.set_title(
+                    f"Step {step_counter}: ノード '{u}' を処理中（距離確定）")
+            profiler.log(f"\n[STEP {step_counter}] 確定候補ノード: {u} "
+                         f"(距離: {current_dist})")
+            profiler.pause(pause_time, recorder)
 
         # ----------------------------------------------------
         # 距離の確定と緩和処理
@@ -160,129 +157,127 @@ def visualize_dijkstra(graph, start_node, pause_time=1.5):
             continue
 
         finalized_nodes.add(u)
-        node_color_map[u] = 'limegreen'  # 確定したノードは緑に
+        with profiler.phase('draw'):
+            renderer.set_node_color(u, 'limegreen')  # 確定したノードは緑に
 
         relaxation_info = []
 
         # 隣接ノード v の距離を緩和
-        for v, data in graph[u].items():
-            weight = data['weight']
-            new_dist = current_dist + weight
-
-            # 緩和条件: より短い経路が見つかった場合
-            if new_dist < distances[v]:
-                old_dist = distances[v]
-                distances[v] = new_dist
-                predecessors[v] = u
-                heapq.heappush(pq, (new_dist, v))
-
-                # ノード v を黄色で強調（暫定距離更新）
-                if v not in finalized_nodes:
-                    node_color_map[v] = 'yellow'  # 暫定距離更新を黄色で強調
-
-                relaxation_info.append(
-                    f"{u} -> {v} ({old_dist} -> {new_dist})"
-                )
-
-                # ----------------------------------------------------
-                # 緩和処理後の状態を描画（エッジの強調）
-                # ----------------------------------------------------
-
-                plt.clf()
-                ax = plt.gca()  # 現在のAxesを取得
-
-                # エッジの色を更新: 緩和処理中のエッジをオレンジに
-                temp_edge_colors = []
-                for edge in graph.edges():
-                    is_edge_in_relaxation\
-                        = (edge[0] == u and edge[1] == v)\
-                        or (edge[0] == v and edge[1] == u)
-                    if is_edge_in_relaxation:
-                        temp_edge_colors.append('orange')
-                    else:
-                        temp_edge_colors.append('gray')
-
-                # ノードラベルを再作成（更新後の距離を反映）
-                for node in nodes:
-                    dist_str = str(distances[node])\
-                        if distances[node] != float('inf') else '∞'
-                    node_labels[node] = f'{node}\n(距離: {dist_str})'
-
-                node_colors = [node_color_map[node] for node in nodes]
-
-                nx.draw_networkx(
-                    graph, pos, with_labels=True, labels=node_labels,
-                    node_color=node_colors, node_size=3000, font_size=10,
-                    font_weight='bold',
-                    edge_color=temp_edge_colors, ax=ax
-                )
-
-                # エッジの重みを出力
-                nx.draw_networkx_edge_labels(
-                    graph, pos, edge_labels=edge_labels,
-                    font_color='darkslategrey', ax=ax)
-
-                # 凡例の追加
-                create_legend(ax)
-
-                plt.title(f"Step {step_counter} (緩和処理): "
-                          f"{', '.join(relaxation_info)}")
-                print(f"   -> 緩和処理: {u} -> {v} (重み{weight})。"
-                      f"距離を {old_dist} から {new_dist} に更新。")
-
-                plt.pause(pause_time / 2)  # 緩和処理のステップは短めにポーズ
+        # (描画・出力・一時停止の区間は計算の時間から除かれる)
+        with profiler.phase('compute'):
+            u_id = csr.id_of(u)
+            for v_id, weight in zip(csr.neighbors(u_id),
+                                    csr.neighbor_weights(u_id).tolist()):
+                v = csr.label_of(v_id)
+                new_dist = current_dist + weight
+
+                # 緩和条件: より短い経路が見つかった場合
+                if new_dist < distances[v]:
+                    profiler.count('relaxations')
+                    old_dist = distances[v]
+                    distances[v] = new_dist
+                    predecessors[v] = u
+                    heapq.heappush(pq, (new_dist, v))
+
+                    relaxation_info.append(
+                        f"{u} -> {v} ({old_dist:g} -> {new_dist:g})"
+                    )
+
+                    # ----------------------------------------------------
+                    # 緩和処理後の状態を描画（エッジの強調）
+                    # ----------------------------------------------------
+                    with profiler.phase('draw'):
+                        # ノード v を黄色で強調（暫定距離更新）
+                        if v not in finalized_nodes:
+                            renderer.set_node_color(v, 'yellow')
+
+                        # 緩和処理中のエッジだけをオレンジにする
+                        # (1つ前のエッジは灰色に戻す)
+                        if highlighted_edge is not None:
+                            renderer.set_edge_color(highlighted_edge, 'gray')
+                        highlighted_edge = (u, v)
+                        renderer.set_edge_color(highlighted_edge, 'orange')
+
+                        # 距離が変わったノードのラベルだけを更新
+                        renderer.set_node_labels(
+                            {v: _distance_label(v, distances[v])})
+
+                        renderer.set_title(f"Step {step_counter} (緩和処理): "
+                                           f"{', '.join(relaxation_info)}")
+                    profiler.log(f"   -> 緩和処理: {u} -> {v} (重み{weight:g})。"
+                                 f"距離を {old_dist:g} から {new_dist:g} に更新。")
+
+                    # 緩和処理のステップは短めにポーズ
+                    profiler.pause(pause_time / 2, recorder)
 
         step_counter += 1
+    profiler.stop()
 
     print("\n--- ダイクストラ法完了 ---")
 
     # ----------------------------------------------------
     # FINAL STEP: 最終結果の描画
     # ----------------------------------------------------
-    plt.clf()
-    ax = plt.gca()
 
     # 最短経路木 (SPT) のエッジを青で強調
     spt_edges = _get_shortest_path_edges(predecessors)
-    final_edge_colors = ['dodgerblue'
-                         if edge in spt_edges
-                         or (edge[1], edge[0]) in spt_edges
-                         else 'lightgray'
-                         for edge in graph.edges()]
-
-    # 最終的なノードの色（全て確定なので緑）
-    final_node_colors = ['limegreen'] * len(nodes)
-
-    # 最終的なノードラベル
-    for node in nodes:
-        dist_str = str(distances[node])\
-            if distances[node] != float('inf') else '∞'
-        node_labels[node] = f'{node}\n(確定距離: {dist_str})'
-
-    nx.draw_networkx(
-        graph, pos, with_labels=True, labels=node_labels,
-        node_color=final_node_colors, node_size=3000,
-        font_size=10, font_weight='bold',
-        edge_color=final_edge_colors, ax=ax
-    )
-
-    # エッジの重みを出力
-    nx.draw_networkx_edge_labels(
-        graph, pos, edge_labels=edge_labels, font_color='darkslategrey', ax=ax)
+    renderer.set_all_edges('lightgray')
+    renderer.set_edge_styles(
+        colors={edge: 'dodgerblue' for edge in spt_edges})
+
+    # 最終的なノードの色（全て確定なので緑）とラベル
+    renderer.set_node_colors({node: 'limegreen' for node in nodes})
+    renderer.set_node_labels(
+        {node: _distance_label(node, distances[node], '確定距離')
+         for node in nodes})
 
     # 凡例の追加
     create_legend(ax, True)
 
-    plt.title("ダイクストラ法 最終結果: 最短経路木")
+    renderer.set_title("ダイクストラ法 最終結果: 最短経路木")
 
     print("\n[最終的な最短距離]")
     for node in sorted(distances.keys()):
-        dist_str = str(distances[node])\
+        dist_str = f'{distances[node]:g}'\
             if distances[node] != float('inf') else '到達不可'
         print(f"ノード {node}: {dist_str}")
 
     plt.show()
 
 
-# 実行
-visualize_dijkstra(G, start_node='A', pause_time=5.0)
+if __name__ == '__main__':
+    import sys
+
+    import networkx as nx
+
+    # グラフを定義する（ノードと重み付きエッジ）
+    G = nx.Graph()
+    # (ノード1, ノード2, 重み)
+    edges_with_weights = [
+        ('A', 'B', 4), ('A', 'C', 2),
+        ('B', 'C', 5), ('B', 'D', 10),
+        ('C', 'E', 3),
+        ('D', 'F', 11),
+        ('E', 'D', 4), ('E', 'F', 5)
+    ]
+    G.add_weighted_edges_from(edges_with_weights)
+
+    # 引数に .npz ファイルのパスを渡すと、各ステップを記録して保存する
+    # (ウィンドウを閉じた後に保存する。python -m step_trace で再生できる)
+    recorder = None
+    if len(sys.argv) > 1:
+        from step_trace import StepRecorder
+        recorder = StepRecorder()
+
+    # 環境変数 ALGO_PROFILE を設定すると、計算・描画・待ち時間・出力の内訳を表示する
+    # (例: ALGO_PROFILE=1 / ALGO_PROFILE=sampled:5,cprofile)
+    profiler = Profiler.from_env()
+
+    # 実行
+    pyplot().figure(figsize=(12, 6))
+    visualize_dijkstra(G, start_node='A', pause_time=5.0,
+                       recorder=recorder, profiler=profiler)
+    if recorder is not None:
+        recorder.save(sys.argv[1])
+    if profiler is not None:
+        print(profiler.report())
@@ -0,0 +1,100 @@
+# ダイクストラ法（描画なし・CSR配列上で動く版）
+
+import numpy as np
+
+from .priority_queues import BucketQueue, IndexedHeap, LazyHeap
+
+# 選択できる優先度付きキュー
+QUEUE_TYPES = ('lazy', 'indexed', 'bucket')
+
+
+def make_queue(graph, queue='indexed', d=4):
+    """
+    名前を指定して優先度付きキューを作る関数
+    - 'lazy': heapq に重複して積む方式 (visualize_dijkstra と同じ)
+    - 'indexed': 位置表付き d 分ヒープ（decrease-key あり）
+    - 'bucket': Dial のバケットキュー（重みが 0 以上の整数のときのみ）
+    """
+    n = graph.num_nodes
+    if queue == 'lazy':
+        return LazyHeap(n)
+    if queue == 'indexed':
+        return IndexedHeap(n, d)
+    if queue == 'bucket':
+        weights = graph.weights
+        if len(weights) and (weights.min() < 0
+                             or not np.all(weights == np.floor(weights))):
+            raise ValueError("bucket キューは 0 以上の整数の重みでのみ使えます")
+        return BucketQueue(n, weights.max() if len(weights) else 0)
+    raise ValueError(f"不明なキューの種類です: {queue} (選択肢: {QUEUE_TYPES})")
+
+
+def dijkstra(graph, source, queue='indexed', d=4, stats=None,
+             target=None):
+    """
+    始点から全ノードへの最短距離と最短経路木を求める関数
+    - graph: CSRGraph（重みは 0 以上）
+    - queue: 優先度付きキューの種類 ('lazy' / 'indexed' / 'bucket')
+    - stats: 辞書を渡すと 'settled'（確定ノード数）と 'queue_peak'（キューの
+      最大要素数）を書き込む
+    - target: 指定時はそのノードの距離が確定した時点で探索を打ち切る
+      (それ以外のノードの値は暫定値のまま)
+    - 戻り値: (distances, predecessors)
+        distances[v]: 最短距離（到達不可は inf）
+        predecessors[v]: 最短経路木の親ノードID（始点と到達不可は -1）
+    """
+    n = graph.num_nodes
+    source_id = graph.id_of(source)
+    target_id = -1 if target is None else graph.id_of(target)
+    integer_keys = queue == 'bucket'
+
+    distances = [float('inf')] * n
+    predecessors = [-1] * n
+    indptr = graph.indptr
+    indices = graph.indices
+    weights = graph.weights
+
+    pq = make_queue(graph, queue, d)
+    distances[source_id] = 0
+    pq.push(source_id, 0)
+
+    settled = 0
+    while len(pq):
+        dist_u, u = pq.pop()
+        settled += 1
+        if u == target_id:
+            break
+
+        # u の隣接リストはまとめて Python のリストにしてから緩和する
+        start, end = indptr[u], indptr[u + 1]
+        neighbors = indices[start:end].tolist()
+        neighbor_weights = weights[start:end]
+        if integer_keys:
+            neighbor_weights = neighbor_weights.astype(np.int64)
+        for v, w in zip(neighbors, neighbor_weights.tolist()):
+            new_dist = dist_u + w
+            if new_dist < distances[v]:
+                distances[v] = new_dist
+                predecessors[v] = u
+                pq.push(v, new_dist)
+
+    if stats is not None:
+        stats['settled'] = settled
+        stats['queue_peak'] = pq.peak
+
+    return (np.array(distances, dtype=np.float64),
+            np.array(predecessors, dtype=graph.indices.dtype))
+
+
+def shortest_path(predecessors, target_id):
+    """
+    predecessors を逆にたどり、始点から target_id までのノードIDリストを返す関数
+    - 始点自身と到達不可のノードはどちらも親が -1 なので、
+      到達可能かどうかは distances で確認してから呼ぶ
+    """
+    path = []
+    node = int(target_id)
+    while node != -1:
+        path.append(node)
+        node = int(predecessors[node])
+    return path[::-1]
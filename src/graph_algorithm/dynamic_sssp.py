@@ -0,0 +1,137 @@
+# dynamic single-source shortest paths
+# エッジの重みが変わったときに、既存のダイクストラ法の結果を部分的に修復する
+# (Ramalingam-Reps 法の考え方: 影響を受ける最短経路木の部分木だけを計算し直す)
+
+import heapq
+
+import numpy as np
+
+
+def update_shortest_paths(graph, distances, predecessors, changes,
+                          reverse=None):
+    """
+    重みの変更をグラフに反映し、始点からの最短距離と最短経路木を修復する関数
+    - graph: CSRGraph（この関数の中で set_weight() により書き換える）
+    - distances, predecessors: 変更前のグラフでの dijkstra() の結果（変更しない）
+    - changes: [(u, v, 新しい重み), ...]（ノード名で指定、増加と減少が混在してよい。
+      同じエッジを複数回変更した場合は最後の重みを使う）
+    - reverse: 有向グラフの逆向きグラフ（省略時は作成する。渡した場合は
+      重みの変更をこちらにも反映するので、次の呼び出しでもそのまま使える）
+    - 戻り値: (新しい distances, 新しい predecessors, 触ったノード数)
+
+    手順
+    1. 重みが増えた最短経路木のエッジ (u -> v) について、v 以下の部分木を
+       「影響あり」として距離を無限大に戻す
+    2. 影響ありのノードは、影響のないノードからの入辺で暫定距離を決めて
+       キューに入れる。重みが減ったエッジは、終点の距離が縮むならキューに入れる
+    3. キューからダイクストラ法と同じ手順で緩和を伝播させる
+    """
+    distances = np.array(distances, dtype=np.float64)
+    predecessors = np.array(predecessors)
+
+    # 同じエッジへの変更はまとめ、最後の重みだけを残す
+    # (途中の重みで増加・減少を判定すると、最終的な重みと食い違う)
+    final = {}
+    for u, v, weight in changes:
+        u_id, v_id = graph.id_of(u), graph.id_of(v)
+        key = (u_id, v_id) if graph.directed\
+            else (min(u_id, v_id), max(u_id, v_id))
+        final[key] = (u, v, u_id, v_id, weight)
+
+    # 変更を反映し、増加したエッジと減少したエッジを分ける
+    increased = []
+    decreased = []
+    for u, v, u_id, v_id, weight in final.values():
+        # 逆向きグラフの重みは別の配列なので、同じエッジにも書き込む
+        # (位置は変更前の重みで探す。多重辺では graph 側と同じ最小のものになる)
+        position = -1
+        if reverse is not None and reverse is not graph:
+            position = reverse.edge_position(v_id, u_id)
+        old_weight = graph.set_weight(u, v, weight)
+        if position != -1:
+            reverse.weights[position] = weight
+            reverse.touch()
+        arcs = [(u_id, v_id)] if graph.directed\
+            else [(u_id, v_id), (v_id, u_id)]
+        if weight > old_weight:
+            increased.extend(arcs)
+        elif weight < old_weight:
+            decreased.extend((a, b, weight) for a, b in arcs)
+
+    # ----------------------------------------------------
+    # 1. 影響を受ける部分木を集める
+    # ----------------------------------------------------
+    roots = [v for u, v in increased if predecessors[v] == u]
+    affected = _subtree(predecessors, roots)
+    distances[affected] = np.inf
+    predecessors[affected] = -1
+    touched = set(affected.tolist())
+
+    # ----------------------------------------------------
+    # 2. 影響ありのノードと、重みが減ったエッジの終点をキューに入れる
+    # ----------------------------------------------------
+    pq = []
+    if len(affected):
+        if reverse is None:
+            reverse = graph.reverse()
+        sources, positions = reverse.expand(affected)
+        in_neighbors = reverse.indices[positions]
+        candidate = distances[in_neighbors] + reverse.weights[positions]
+        for v, x, d in zip(sources.tolist(), in_neighbors.tolist(),
+                           candidate.tolist()):
+            if d < distances[v]:
+                distances[v] = d
+                predecessors[v] = x
+        for v in affected.tolist():
+            if np.isfinite(distances[v]):
+                heapq.heappush(pq, (distances[v], v))
+
+    for u, v, weight in decreased:
+        new_dist = distances[u] + weight
+        if new_dist < distances[v]:
+            distances[v] = new_dist
+            predecessors[v] = u
+            heapq.heappush(pq, (new_dist, v))
+
+    # ----------------------------------------------------
+    # 3. 緩和の伝播（古い要素は読み飛ばす）
+    # ----------------------------------------------------
+    indptr, indices, weights = graph.indptr, graph.indices, graph.weights
+    while pq:
+        dist_u, u = heapq.heappop(pq)
+        if dist_u > distances[u]:
+            continue
+        touched.add(u)
+        start, end = indptr[u], indptr[u + 1]
+        for v, w in zip(indices[start:end].tolist(),
+                        weights[start:end].tolist()):
+            new_dist = dist_u + w
+            if new_dist < distances[v]:
+                distances[v] = new_dist
+                predecessors[v] = u
+                heapq.heappush(pq, (new_dist, v))
+
+    return distances, predecessors, len(touched)
+
+
+def _subtree(predecessors, roots):
+    """
+    最短経路木で roots の子孫（roots 自身を含む）のノードIDの配列を返す
+    """
+    if not roots:
+        return np.empty(0, dtype=np.int64)
+
+    # 親ごとに子をまとめた CSR（親 -1 の分は先頭にまとまる）
+    order = np.argsort(predecessors, kind='stable')
+    counts = np.bincount(predecessors + 1, minlength=len(predecessors) + 1)
+    child_ptr = np.concatenate([[0], np.cumsum(counts)])
+
+    frontier = np.unique(np.asarray(roots, dtype=np.int64))
+    collected = [frontier]
+    while len(frontier):
+        starts = child_ptr[frontier + 1]
+        ends = child_ptr[frontier + 2]
+        frontier = np.concatenate(
+            [order[s:e] for s, e in zip(starts.tolist(), ends.tolist())])
+        collected.append(frontier)
+    return np.concatenate(collected).astype(np.int64)
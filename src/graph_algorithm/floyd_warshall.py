@@ -0,0 +1,98 @@
+# Floyd-Warshall (all-pairs shortest paths)
+# ワーシャル-フロイド法（全点対最短経路、NumPy の密行列で一括計算する版）
+
+import numpy as np
+
+
+def to_dense_matrix(graph, dtype=np.float64):
+    """
+    CSRGraph を距離行列に変換する関数
+    - エッジの無い組は inf、対角成分は 0、多重辺は最小の重み
+    """
+    n = graph.num_nodes
+    matrix = np.full((n, n), np.inf, dtype=dtype)
+    np.minimum.at(matrix, (graph.edge_sources(), graph.indices),
+                  graph.weights.astype(dtype))
+    np.fill_diagonal(matrix, np.minimum(matrix.diagonal(), 0))
+    return matrix
+
+
+def floyd_warshall(graph, dtype=np.float64, track_predecessors=False,
+                   block_size=64):
+    """
+    全点対の最短距離を求める関数
+    - 1つの経由ノード k ごとに、行列の各行ブロックへ
+        D[I, :] = minimum(D[I, :], D[I, k] + D[k, :])
+      をブロードキャストで一括適用する
+    - block_size 個の経由ノードをまとめて1ラウンドとし、行ブロック (block_size 行)
+      がキャッシュに載ったまま、そのラウンドの経由ノードを全て適用する
+      (ラウンドの最初に経由ノード自身の行ブロックを先に確定させる、ブロック版の手順)
+    - dtype: np.float32 にするとメモリが半分になる（距離は float32 の精度に丸められる）
+    - track_predecessors: True のとき、経路復元用の行列 P も返す
+        P[i, j]: i から j への最短経路で j の直前のノード（経路が無い場合は -1）
+    - 戻り値: D または (D, P)
+    - 負の閉路がある場合は ValueError
+    """
+    n = graph.num_nodes
+    dist = to_dense_matrix(graph, dtype)
+
+    pred = None
+    if track_predecessors:
+        pred = np.where(np.isfinite(dist),
+                        np.arange(n, dtype=np.int32)[:, None],
+                        np.int32(-1)).astype(np.int32)
+        np.fill_diagonal(pred, -1)
+
+    for k_start in range(0, n, block_size):
+        k_range = range(k_start, min(k_start + block_size, n))
+
+        # 経由ノードのブロック自身の行を先に更新し、このラウンドの D[k, :] を確定する
+        _relax_rows(dist, pred, slice(k_range.start, k_range.stop), k_range)
+
+        # 残りの行ブロック
+        for i_start in range(0, n, block_size):
+            if i_start == k_start:
+                continue
+            rows = slice(i_start, min(i_start + block_size, n))
+            _relax_rows(dist, pred, rows, k_range)
+
+    if np.any(dist.diagonal() < 0):
+        raise ValueError("負の閉路があるため最短距離が定まりません")
+
+    if track_predecessors:
+        return dist, pred
+    return dist
+
+
+def _relax_rows(dist, pred, rows, k_range):
+    """
+    行ブロック rows に、経由ノード k_range を順に適用する
+    """
+    panel = dist[rows]
+    pred_panel = None if pred is None else pred[rows]
+    for k in k_range:
+        candidate = panel[:, k, None] + dist[k]
+        if pred is None:
+            np.minimum(panel, candidate, out=panel)
+        else:
+            improved = candidate < panel
+            np.copyto(panel, candidate, where=improved)
+            np.copyto(pred_panel, np.broadcast_to(pred[k], panel.shape),
+                      where=improved)
+
+
+def apsp_path(pred, source_id, target_id):
+    """
+    floyd_warshall の P 行列から、source_id から target_id までのノードIDリストを返す
+    - 経路が無い場合は空リスト
+    """
+    if source_id == target_id:
+        return [source_id]
+    if pred[source_id, target_id] == -1:
+        return []
+    path = [target_id]
+    node = target_id
+    while node != source_id:
+        node = int(pred[source_id, node])
+        path.append(node)
+    return path[::-1]
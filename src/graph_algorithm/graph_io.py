@@ -0,0 +1,290 @@
+# binary CSR graph files
+# グラフの読み込み・保存
+# - ingest_edge_list: テキストのエッジリスト（1行に "u v [重み]"）を一定行数ずつ読み、
+#   始点ごとの計数ソートで CSR のバイナリファイルに直接書き出す
+#   (1回目の走査で次数を数え、2回目の走査で各エッジを書き込み位置に置くので、
+#    メモリ使用量はノード数とチャンクの大きさの分だけで済む。
+#    2回目は1回目に書き出した解析済みのバイナリを読むのでテキストの解析は1回)
+# - save_csr / load_csr: ヘッダー + indptr / indices / weights の配列をそのまま並べた
+#   形式で保存し、np.memmap で開く（読み込み時にコピーも解析もしない）
+
+import itertools
+import os
+import struct
+import warnings
+
+import numpy as np
+
+from .csr_graph import CSRGraph, _index_dtype
+
+# ファイル形式
+# ヘッダー: マジック, 版, フラグ, ノード数, 格納エッジ数, 各配列の dtype
+# 各配列はヘッダーの後ろに indptr, indices, weights の順で、64 バイト境界に揃えて置く
+_MAGIC = b'CSRGRAPH'
+_VERSION = 1
+_DIRECTED = 1
+_HEADER = struct.Struct('<8sIIQQ4s4s4s')
+_ALIGN = 64
+
+# 1回に読み込む行数
+CHUNK_LINES = 1 << 20
+
+# 取り込み中に解析済みのエッジを一時保存する形式
+_EDGE_RECORD = np.dtype([('src', '<i8'), ('dst', '<i8'), ('weight', '<f8')])
+
+
+def save_csr(graph, path):
+    """
+    CSRGraph をバイナリ形式で保存する関数（ノードのラベルは保存しない）
+    """
+    arrays = _create_file(path, graph.num_nodes, len(graph.indices),
+                          graph.directed, graph.indptr.dtype,
+                          graph.indices.dtype)
+    for out, array in zip(arrays, (graph.indptr, graph.indices,
+                                   graph.weights)):
+        out[:] = array
+    _flush(*arrays)
+
+
+def load_csr(path, mmap_mode='r'):
+    """
+    save_csr / ingest_edge_list で保存したファイルを CSRGraph として開く関数
+    - mmap_mode: np.memmap のモード（'r' は読み取り専用、'c' は書き込みをメモリ上
+      だけに反映、'r+' はファイルに反映）。None の場合はメモリに読み込む
+    """
+    with open(path, 'rb') as f:
+        header = f.read(_HEADER.size)
+    num_nodes, num_entries, directed, dtypes = _parse_header(header, path)
+
+    arrays = []
+    for offset, dtype, length in _layout(num_nodes, num_entries, dtypes):
+        if mmap_mode is None:
+            arrays.append(np.fromfile(path, dtype=dtype, count=length,
+                                      offset=offset))
+        elif length == 0:
+            arrays.append(np.zeros(0, dtype=dtype))
+        else:
+            arrays.append(np.memmap(path, dtype=dtype, mode=mmap_mode,
+                                    offset=offset, shape=(length,)))
+    return CSRGraph(*arrays, directed=directed)
+
+
+def ingest_edge_list(text_path, out_path, directed=False, num_nodes=None,
+                     default_weight=1.0, comments='#', delimiter=None,
+                     chunk_lines=CHUNK_LINES):
+    """
+    テキストのエッジリストから CSR のバイナリファイルを作る関数
+    - 各行は "始点 終点" または "始点 終点 重み"（ノードは 0 始まりの整数ID）
+    - comments で始まる行と空行は読み飛ばす
+    - num_nodes: ノード数（None の場合は最大のノードID + 1）
+    - 同じ始点のエッジは入力順に並ぶ（無向グラフでは逆向きの分は同じチャンクの
+      順向きの分の後ろになる）
+    - 戻り値: 作ったファイルを load_csr() で開いた CSRGraph
+    """
+    # 1回目: テキストを解析しながら次数を数え、解析済みのエッジを一時ファイルに
+    # バイナリのまま書き出す（2回目はテキストを解析し直さずに済む）
+    spill_path = f'{out_path}.{os.getpid()}.edges'
+    degree = np.zeros(0, dtype=np.int64)
+    max_id = -1
+    try:
+        with open(spill_path, 'wb') as spill:
+            for src, dst, weight in iter_edge_chunks(
+                    text_path, default_weight, comments, delimiter,
+                    chunk_lines):
+                max_id = max(max_id, int(src.max()), int(dst.max()))
+                if max_id >= len(degree):
+                    degree = _resized(degree,
+                                      max(max_id + 1, 2 * len(degree)))
+                for ends in ((src,) if directed else (src, dst)):
+                    nodes, counts = np.unique(ends, return_counts=True)
+                    degree[nodes] += counts
+
+                record = np.empty(len(src), dtype=_EDGE_RECORD)
+                record['src'], record['dst'], record['weight'] = \
+                    src, dst, weight
+                record.tofile(spill)
+
+        if num_nodes is None:
+            num_nodes = max_id + 1
+        elif num_nodes <= max_id:
+            raise ValueError(f"ノードID {max_id} が num_nodes "
+                             f"({num_nodes}) の範囲外です")
+        degree = _resized(degree, num_nodes)
+        num_entries = int(degree.sum())
+
+        indptr, indices, weights = _create_file(
+            out_path, num_nodes, num_entries, directed,
+            _index_dtype(num_entries), _index_dtype(num_nodes))
+        indptr[0] = 0
+        np.cumsum(degree, out=indptr[1:])
+
+        # 2回目: 各ノードの次の書き込み位置 (cursor) に置いていく
+        cursor = np.asarray(indptr[:-1], dtype=np.int64).copy()
+        num_records = os.path.getsize(spill_path) // _EDGE_RECORD.itemsize
+        edges = np.memmap(spill_path, dtype=_EDGE_RECORD, mode='r') \
+            if num_records else np.empty(0, dtype=_EDGE_RECORD)
+        for start in range(0, num_records, chunk_lines):
+            chunk = edges[start:start + chunk_lines]
+            src, dst, weight = chunk['src'], chunk['dst'], chunk['weight']
+            _scatter(cursor, indices, weights, src, dst, weight)
+            if not directed:
+                _scatter(cursor, indices, weights, dst, src, weight)
+        del edges
+
+        _flush(indptr, indices, weights)
+        del indptr, indices, weights
+    finally:
+        if os.path.exists(spill_path):
+            os.remove(spill_path)
+    return load_csr(out_path)
+
+
+def iter_edge_chunks(path, default_weight=1.0, comments='#', delimiter=None,
+                     chunk_lines=CHUNK_LINES):
+    """
+    テキストのエッジリストを chunk_lines 行ずつ (始点, 終点, 重み) の配列で返す
+    ジェネレーター
+    """
+    with open(path) as f:
+        while True:
+            lines = list(itertools.islice(f, chunk_lines))
+            if not lines:
+                break
+            with warnings.catch_warnings():
+                # コメント行だけのチャンクで出る「データが無い」警告は無視する
+                warnings.simplefilter('ignore', UserWarning)
+                block = np.loadtxt(lines, comments=comments,
+                                   delimiter=delimiter, ndmin=2)
+            if block.size == 0:
+                continue
+            if block.shape[1] < 2:
+                raise ValueError(f"{path}: 1行に始点と終点が必要です")
+            src = block[:, 0].astype(np.int64)
+            dst = block[:, 1].astype(np.int64)
+            if min(src.min(), dst.min()) < 0:
+                raise ValueError(f"{path}: ノードIDは 0 以上の整数です")
+            if block.shape[1] > 2:
+                weight = block[:, 2].copy()
+            else:
+                weight = np.full(len(block), float(default_weight))
+            yield src, dst, weight
+
+
+def _scatter(cursor, indices, weights, src, dst, weight):
+    """
+    1チャンク分のエッジを、始点ごとの書き込み位置に入力順のまま置く
+    """
+    order = np.argsort(src, kind='stable')
+    src = src[order]
+    # 同じ始点の中での順位 = 位置 - その始点の最初の位置
+    first = np.flatnonzero(np.r_[True, src[1:] != src[:-1]])
+    counts = np.diff(np.r_[first, len(src)])
+    rank = np.arange(len(src)) - np.repeat(first, counts)
+    position = cursor[src] + rank
+    indices[position] = dst[order]
+    weights[position] = weight[order]
+    cursor[src[first]] += counts
+
+
+def _resized(array, size):
+    # 足りない分は 0 で埋め、余った分は切り捨てる
+    out = np.zeros(size, dtype=array.dtype)
+    n = min(size, len(array))
+    out[:n] = array[:n]
+    return out
+
+
+def _layout(num_nodes, num_entries, dtypes):
+    """
+    各配列の (ファイル先頭からの位置, dtype, 要素数)
+    """
+    offset = _HEADER.size
+    layout = []
+    for dtype, length in zip(dtypes, (num_nodes + 1, num_entries,
+                                      num_entries)):
+        offset = -(-offset // _ALIGN) * _ALIGN
+        layout.append((offset, dtype, length))
+        offset += dtype.itemsize * length
+    return layout
+
+
+def _create_file(path, num_nodes, num_entries, directed, indptr_dtype,
+                 indices_dtype):
+    """
+    ヘッダーを書いたファイルを作り、各配列を書き込み用の memmap で返す
+    """
+    dtypes = [np.dtype(indptr_dtype).newbyteorder('<'),
+              np.dtype(indices_dtype).newbyteorder('<'),
+              np.dtype('<f8')]
+    layout = _layout(num_nodes, num_entries, dtypes)
+    offset, dtype, length = layout[-1]
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION,
+                             _DIRECTED if directed else 0,
+                             num_nodes, num_entries,
+                             *(d.str.encode() for d in dtypes)))
+        f.truncate(offset + dtype.itemsize * length)
+
+    arrays = []
+    for offset, dtype, length in layout:
+        if length == 0:
+            arrays.append(np.zeros(0, dtype=dtype))
+        else:
+            arrays.append(np.memmap(path, dtype=dtype, mode='r+',
+                                    offset=offset, shape=(length,)))
+    return arrays
+
+
+def _flush(*arrays):
+    # 要素数 0 の配列は memmap ではないので書き出すものが無い
+    for array in arrays:
+        if isinstance(array, np.memmap):
+            array.flush()
+
+
+def _parse_header(header, path):
+    if len(header) < _HEADER.size or not header.startswith(_MAGIC):
+        raise ValueError(f"{path} は CSR グラフのファイルではありません")
+    (_, version, flags, num_nodes, num_entries,
+     *dtypes) = _HEADER.unpack(header)
+    if version != _VERSION:
+        raise ValueError(f"{path}: 未対応の版です ({version})")
+    dtypes = [np.dtype(d.rstrip(b'\0').decode()) for d in dtypes]
+    return num_nodes, num_entries, bool(flags & _DIRECTED), dtypes
+
+
+if __name__ == '__main__':
+    import tempfile
+    import time
+
+    rng = np.random.default_rng(0)
+    num_nodes = 200_000
+    m = 2_000_000
+    src = rng.integers(0, num_nodes, m)
+    dst = rng.integers(0, num_nodes, m)
+    weight = rng.integers(1, 100, m)
+
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = os.path.join(directory, 'edges.txt')
+        bin_path = os.path.join(directory, 'edges.csr')
+        with open(text_path, 'w') as f:
+            f.write('# 始点 終点 重み\n')
+            np.savetxt(f, np.column_stack([src, dst, weight]), fmt='%d')
+
+        start = time.perf_counter()
+        G = ingest_edge_list(text_path, bin_path, num_nodes=num_nodes)
+        elapsed = time.perf_counter() - start
+        print(f"取り込み: {m:,} エッジ {elapsed:.2f} 秒 "
+              f"({m / elapsed:,.0f} エッジ/秒)")
+
+        start = time.perf_counter()
+        G = load_csr(bin_path)
+        print(f"memmap で開く: {(time.perf_counter() - start) * 1e3:.2f} ms "
+              f"({os.path.getsize(bin_path) / 2**20:.1f} MiB), {G}")
+
+        expected = CSRGraph.from_arrays(src, dst, weight, num_nodes=num_nodes)
+        same = np.array_equal(G.indptr, expected.indptr) and all(
+            np.array_equal(np.sort(G.neighbors(u)),
+                           np.sort(expected.neighbors(u)))
+            for u in rng.integers(0, num_nodes, 1000))
+        print(f"from_arrays との一致: {same}")
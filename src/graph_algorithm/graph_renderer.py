@@ -0,0 +1,256 @@
+# persistent-artist graph renderer
+# グラフ探索の可視化用の描画クラス
+# - ノード (PathCollection)、エッジ (LineCollection)、ラベル (Text) を最初に一度だけ作成し、
+#   各ステップでは変化した色・太さ・ラベル文字列だけを書き換える
+# - 毎ステップ plt.clf() + nx.draw() で全体を作り直す方法と違い、
+#   1ステップのコストが描画済みのノード数・エッジ数にほとんど依存しない
+# - recorder (step_trace.StepRecorder) を渡すと、変更をすべて記録する
+#   (make_trace_drawer で記録を再生できる)
+
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_hex, to_rgba
+
+from plotting import pause, pyplot
+
+
+class GraphRenderer:
+    """
+    networkx のグラフを、アーティストを使い回しながら描画するクラス
+    - node_index / edge_index: ノード名・エッジ (u, v) から配列の位置への対応
+      無向グラフのエッジは (u, v) と (v, u) のどちらでも引ける
+    - 色は matplotlib の色指定（'red' など）で与える
+    - recorder: 渡すとノード・エッジの色やラベル、タイトル、pause() の区切りを記録する
+    """
+
+    def __init__(self, ax, graph, pos, node_color='lightgray',
+                 edge_color='gray', edge_width=1.0, node_size=2500,
+                 labels=None, font_size=10, font_weight='bold',
+                 edge_labels=None, edge_label_color='darkslategrey',
+                 node_alpha=None, recorder=None):
+        self.ax = ax
+        self.recorder = recorder
+        self.nodes = list(graph.nodes)
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+        self.edges = list(graph.edges())
+        self.edge_index = {}
+        for i, (u, v) in enumerate(self.edges):
+            self.edge_index[(u, v)] = i
+            if not graph.is_directed():
+                self.edge_index[(v, u)] = i
+
+        xy = np.array([pos[node] for node in self.nodes], dtype=np.float64)
+        self._node_colors = np.tile(to_rgba(node_color), (len(self.nodes), 1))
+        self._edge_colors = np.tile(to_rgba(edge_color), (len(self.edges), 1))
+        self._edge_widths = np.full(len(self.edges), float(edge_width))
+
+        # エッジ (ノードより下に描く)
+        segments = np.array([[pos[u], pos[v]] for u, v in self.edges],
+                            dtype=np.float64).reshape(-1, 2, 2)
+        self.edge_collection = LineCollection(
+            segments, colors=self._edge_colors, linewidths=self._edge_widths,
+            zorder=1)
+        ax.add_collection(self.edge_collection)
+
+        # ノード
+        self.node_collection = ax.scatter(
+            xy[:, 0], xy[:, 1], s=node_size, c=self._node_colors,
+            alpha=node_alpha, zorder=2)
+
+        # ノードのラベル
+        if labels is None:
+            labels = {node: str(node) for node in self.nodes}
+        self._label_texts = [str(labels.get(node, node))
+                             for node in self.nodes]
+        self.label_artists = [
+            ax.text(x, y, text, ha='center', va='center', fontsize=font_size,
+                    fontweight=font_weight, zorder=3)
+            for (x, y), text in zip(xy.tolist(), self._label_texts)]
+
+        # エッジの重みなどのラベル（エッジの中点に置く、変化しない前提）
+        self.edge_label_artists = []
+        if edge_labels:
+            box = dict(boxstyle='round', ec='white', fc='white')
+            for (u, v), text in edge_labels.items():
+                (x0, y0), (x1, y1) = pos[u], pos[v]
+                self.edge_label_artists.append(
+                    ax.text((x0 + x1) / 2, (y0 + y1) / 2, str(text),
+                            ha='center', va='center', fontsize=font_size,
+                            color=edge_label_color, bbox=box, zorder=1.5))
+
+        # ノードの位置は変わらないので、表示範囲は最初に決める
+        if len(xy):
+            margin = 0.15 * max(np.ptp(xy[:, 0]), np.ptp(xy[:, 1]), 1.0)
+            ax.set_xlim(xy[:, 0].min() - margin, xy[:, 0].max() + margin)
+            ax.set_ylim(xy[:, 1].min() - margin, xy[:, 1].max() + margin)
+        ax.axis('off')
+
+        if recorder is not None:
+            index = self.node_index
+            recorder.describe(
+                'graph',
+                arrays={'pos': xy.reshape(-1, 2),
+                        'edges': np.array([[index[u], index[v]]
+                                           for u, v in self.edges],
+                                          dtype=np.int64).reshape(-1, 2)},
+                directed=graph.is_directed(), node_size=node_size,
+                font_size=font_size, font_weight=font_weight,
+                node_alpha=node_alpha, edge_label_color=edge_label_color,
+                edge_labels=[[index[u], index[v], str(text)]
+                             for (u, v), text in (edge_labels or {}).items()],
+                figsize=ax.figure.get_size_inches().tolist())
+            recorder.add_text_channel(
+                'node_color', [to_hex(node_color, keep_alpha=True)]
+                * len(self.nodes))
+            recorder.add_text_channel('node_label', self._label_texts)
+            recorder.add_text_channel(
+                'edge_color', [to_hex(edge_color, keep_alpha=True)]
+                * len(self.edges))
+            recorder.add_channel('edge_width', self._edge_widths)
+            recorder.add_text_channel('title', [''])
+
+    # ----------------------------------------------------
+    # ノード
+    # ----------------------------------------------------
+    def set_node_colors(self, colors):
+        """
+        {ノード名: 色} の分だけノードの色を変える（変化が無ければ何もしない）
+        """
+        changed = False
+        for node, color in colors.items():
+            i = self.node_index[node]
+            rgba = to_rgba(color)
+            if tuple(self._node_colors[i]) != rgba:
+                self._node_colors[i] = rgba
+                changed = True
+                if self.recorder is not None:
+                    self.recorder.set_text('node_color', i,
+                                           to_hex(rgba, keep_alpha=True))
+        if changed:
+            self.node_collection.set_facecolor(self._node_colors)
+
+    def set_node_color(self, node, color):
+        self.set_node_colors({node: color})
+
+    def set_node_labels(self, labels):
+        """
+        {ノード名: 文字列} のうち、文字列が変わったラベルだけを書き換える
+        """
+        for node, text in labels.items():
+            i = self.node_index[node]
+            text = str(text)
+            if self._label_texts[i] != text:
+                self._label_texts[i] = text
+                self.label_artists[i].set_text(text)
+                if self.recorder is not None:
+                    self.recorder.set_text('node_label', i, text)
+
+    # ----------------------------------------------------
+    # エッジ
+    # ----------------------------------------------------
+    def set_edge_styles(self, colors=None, widths=None):
+        """
+        {(u, v): 色} と {(u, v): 太さ} の分だけエッジの見た目を変える
+        """
+        if colors:
+            changed = False
+            for edge, color in colors.items():
+                i = self.edge_index[edge]
+                rgba = to_rgba(color)
+                if tuple(self._edge_colors[i]) != rgba:
+                    self._edge_colors[i] = rgba
+                    changed = True
+                    if self.recorder is not None:
+                        self.recorder.set_text('edge_color', i,
+                                               to_hex(rgba, keep_alpha=True))
+            if changed:
+                self.edge_collection.set_color(self._edge_colors)
+        if widths:
+            changed = False
+            for edge, width in widths.items():
+                i = self.edge_index[edge]
+                if self._edge_widths[i] != width:
+                    self._edge_widths[i] = width
+                    changed = True
+                    if self.recorder is not None:
+                        self.recorder.set('edge_width', i, width)
+            if changed:
+                self.edge_collection.set_linewidth(self._edge_widths)
+
+    def set_edge_color(self, edge, color):
+        self.set_edge_styles(colors={edge: color})
+
+    def set_all_edges(self, color, width=None):
+        """
+        全エッジの色（と太さ）をまとめて設定する
+        """
+        self._edge_colors[:] = to_rgba(color)
+        self.edge_collection.set_color(self._edge_colors)
+        if width is not None:
+            self._edge_widths[:] = width
+            self.edge_collection.set_linewidth(self._edge_widths)
+        if self.recorder is not None:
+            hex_color = to_hex(color, keep_alpha=True)
+            for i in range(len(self.edges)):
+                self.recorder.set_text('edge_color', i, hex_color)
+                if width is not None:
+                    self.recorder.set('edge_width', i, width)
+
+    # ----------------------------------------------------
+    # タイトルと表示
+    # ----------------------------------------------------
+    def set_title(self, text):
+        self.ax.set_title(text)
+        if self.recorder is not None:
+            self.recorder.set_text('title', 0, text)
+
+    def pause(self, seconds):
+        """
+        画面を更新して seconds 秒待つ（記録中なら1フレームとして区切る）
+        """
+        pause(seconds, self.recorder)
+
+
+def make_trace_drawer(trace):
+    """
+    GraphRenderer で記録したステップを、現在の Figure に再生する描画関数を作る
+    - 戻り値: step_trace.TracePlayer に渡す draw(state, changed)
+    """
+    import networkx as nx
+
+    plt = pyplot()
+    meta = trace.meta
+    pos = trace.arrays['pos']
+    edges = [tuple(edge) for edge in trace.arrays['edges'].tolist()]
+    graph = nx.DiGraph() if meta['directed'] else nx.Graph()
+    graph.add_nodes_from(range(len(pos)))
+    graph.add_edges_from(edges)
+
+    renderer = GraphRenderer(
+        plt.gca(), graph, dict(enumerate(pos)), node_size=meta['node_size'],
+        font_size=meta['font_size'], font_weight=meta['font_weight'],
+        edge_labels={(u, v): text for u, v, text in meta['edge_labels']},
+        edge_label_color=meta['edge_label_color'],
+        node_alpha=meta['node_alpha'])
+
+    def draw(state, changed):
+        def positions(name):
+            if changed is None:
+                return range(len(state[name]))
+            return changed.get(name, np.zeros(0, dtype=np.int64)).tolist()
+
+        renderer.set_node_colors(
+            {i: trace.text(state, 'node_color', i)
+             for i in positions('node_color')})
+        renderer.set_node_labels(
+            {i: trace.text(state, 'node_label', i)
+             for i in positions('node_label')})
+        renderer.set_edge_styles(
+            {edges[i]: trace.text(state, 'edge_color', i)
+             for i in positions('edge_color')},
+            {edges[i]: state['edge_width'][i]
+             for i in positions('edge_width')})
+        if positions('title'):
+            renderer.set_title(trace.text(state, 'title', 0))
+
+    return draw
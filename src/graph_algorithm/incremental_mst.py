@@ -0,0 +1,277 @@
+# incremental minimum spanning tree
+# エッジの追加と重みの減少を逐次受け取り、最小全域森を更新し続けるクラス
+# - 新しいエッジ (u, v, w) で閉路ができる場合、木の u-v 間の経路上で最大のエッジを
+#   求め、それが w より重ければ取り除いて新しいエッジを加える（閉路性質）
+# - 経路上の最大エッジは link-cut tree で求める（1回の更新は償却 O(log V)）
+#   木のエッジも link-cut tree のノードとして持ち、ノードの値をエッジの重みにする
+
+from .mst import kruskal
+
+_NONE = -1
+
+
+class IncrementalMST:
+    """
+    逐次更新できる最小全域森
+    - ノードは名前で指定する（未知の名前は自動的に追加する）
+    - 重みの増加やエッジの削除には対応しない
+    """
+
+    def __init__(self, nodes=()):
+        # 頂点の名前と link-cut tree のノードの対応
+        self.label_to_id = {}
+        self._label_of = {}
+        # link-cut tree のノード（頂点とエッジの両方）
+        self._left = []
+        self._right = []
+        self._parent = []
+        self._flip = []
+        self._value = []
+        self._max = []          # 部分木の中で値が最大のノード
+        self._edge_end = []     # エッジのノードなら (u_id, v_id)、頂点なら None
+        self._free = []         # 取り除いたエッジのノード（再利用する）
+        # 木のエッジ: (小さい方のID, 大きい方のID) -> ノード
+        self._tree_edges = {}
+        self.total_weight = 0.0
+        for label in nodes:
+            self._vertex(label)
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        CSRGraph の最小全域森から始める
+        """
+        tree = cls(graph.label_of(v) for v in range(graph.num_nodes))
+        edges, _ = kruskal(graph)
+        for u, v, weight in edges:
+            tree.insert_edge(u, v, weight)
+        return tree
+
+    # ----------------------------------------------------
+    # 公開メソッド
+    # ----------------------------------------------------
+    def insert_edge(self, u, v, weight):
+        """
+        エッジ (u, v, weight) を追加する
+        - 戻り値: 最小全域森が変わった場合 True
+        """
+        a, b = self._vertex(u), self._vertex(v)
+        if a == b:
+            return False
+        weight = float(weight)
+        key = (min(a, b), max(a, b))
+
+        node = self._tree_edges.get(key)
+        if node is not None:
+            # 多重辺: 木のエッジより軽ければ重みを置き換えるだけでよい
+            if weight < self._value[node]:
+                self._set_value(node, weight)
+                return True
+            return False
+
+        if self._find_root(a) != self._find_root(b):
+            self._link_edge(a, b, weight)
+            return True
+
+        heaviest = self._path_max(a, b)
+        if self._value[heaviest] <= weight:
+            return False
+        self._cut_edge(heaviest)
+        self._link_edge(a, b, weight)
+        return True
+
+    def decrease_weight(self, u, v, weight):
+        """
+        エッジ (u, v) の重みを weight に減らす
+        - 木に含まれないエッジの場合は、重み weight のエッジの追加と同じ
+        - 木のエッジの重みを増やそうとした場合は ValueError
+        - 戻り値: 最小全域森が変わった場合 True
+        """
+        a, b = self._vertex(u), self._vertex(v)
+        node = self._tree_edges.get((min(a, b), max(a, b)))
+        if node is not None and weight > self._value[node]:
+            raise ValueError("重みの増加には対応していません")
+        return self.insert_edge(u, v, weight)
+
+    def connected(self, u, v):
+        """
+        u と v が同じ木に含まれるか
+        """
+        a, b = self._vertex(u), self._vertex(v)
+        return self._find_root(a) == self._find_root(b)
+
+    def edges(self):
+        """
+        木のエッジの (ノード名, ノード名, 重み) のリスト
+        """
+        return [(self._label_of[a], self._label_of[b], self._value[node])
+                for (a, b), node in self._tree_edges.items()]
+
+    @property
+    def num_nodes(self):
+        return len(self.label_to_id)
+
+    def __len__(self):
+        return len(self._tree_edges)
+
+    # ----------------------------------------------------
+    # 木のエッジの追加・削除
+    # ----------------------------------------------------
+    def _vertex(self, label):
+        vertex = self.label_to_id.get(label)
+        if vertex is None:
+            vertex = self._new_node(float('-inf'), None)
+            self.label_to_id[label] = vertex
+            self._label_of[vertex] = label
+        return vertex
+
+    def _new_node(self, value, edge_end):
+        if edge_end is not None and self._free:
+            node = self._free.pop()
+            self._left[node] = self._right[node] = self._parent[node] = _NONE
+            self._flip[node] = False
+            self._value[node] = value
+            self._max[node] = node
+            self._edge_end[node] = edge_end
+            return node
+        node = len(self._value)
+        self._left.append(_NONE)
+        self._right.append(_NONE)
+        self._parent.append(_NONE)
+        self._flip.append(False)
+        self._value.append(value)
+        self._max.append(node)
+        self._edge_end.append(edge_end)
+        return node
+
+    def _link_edge(self, a, b, weight):
+        node = self._new_node(weight, (a, b))
+        self._link(a, node)
+        self._link(node, b)
+        self._tree_edges[(min(a, b), max(a, b))] = node
+        self.total_weight += weight
+
+    def _cut_edge(self, node):
+        a, b = self._edge_end[node]
+        self._cut(a, node)
+        self._cut(node, b)
+        del self._tree_edges[(min(a, b), max(a, b))]
+        self.total_weight -= self._value[node]
+        self._edge_end[node] = None
+        self._free.append(node)
+
+    def _set_value(self, node, value):
+        self._access(node)
+        self.total_weight += value - self._value[node]
+        self._value[node] = value
+        self._pull(node)
+
+    # ----------------------------------------------------
+    # link-cut tree
+    # ----------------------------------------------------
+    def _is_root(self, x):
+        # x が所属するスプレー木の根か（親へのリンクが path-parent か）
+        p = self._parent[x]
+        return p == _NONE or (self._left[p] != x and self._right[p] != x)
+
+    def _push(self, x):
+        # 反転の遅延フラグを子に伝える
+        if self._flip[x]:
+            left, right = self._left[x], self._right[x]
+            self._left[x], self._right[x] = right, left
+            if left != _NONE:
+                self._flip[left] = not self._flip[left]
+            if right != _NONE:
+                self._flip[right] = not self._flip[right]
+            self._flip[x] = False
+
+    def _pull(self, x):
+        value, best = self._value, x
+        for child in (self._left[x], self._right[x]):
+            if child != _NONE and value[self._max[child]] > value[best]:
+                best = self._max[child]
+        self._max[x] = best
+
+    def _rotate(self, x):
+        left, right, parent = self._left, self._right, self._parent
+        p = parent[x]
+        g = parent[p]
+        if not self._is_root(p):
+            if left[g] == p:
+                left[g] = x
+            else:
+                right[g] = x
+        parent[x] = g
+        if left[p] == x:
+            left[p] = right[x]
+            if right[x] != _NONE:
+                parent[right[x]] = p
+            right[x] = p
+        else:
+            right[p] = left[x]
+            if left[x] != _NONE:
+                parent[left[x]] = p
+            left[x] = p
+        parent[p] = x
+        self._pull(p)
+        self._pull(x)
+
+    def _splay(self, x):
+        # 根から x まで遅延フラグを伝えてから回転する
+        path = [x]
+        while not self._is_root(path[-1]):
+            path.append(self._parent[path[-1]])
+        for node in reversed(path):
+            self._push(node)
+
+        parent = self._parent
+        while not self._is_root(x):
+            p = parent[x]
+            if not self._is_root(p):
+                g = parent[p]
+                zigzig = (self._left[g] == p) == (self._left[p] == x)
+                self._rotate(p if zigzig else x)
+            self._rotate(x)
+
+    def _access(self, x):
+        # 根から x までの経路を1つのスプレー木にまとめ、x をその根にする
+        last = _NONE
+        y = x
+        while y != _NONE:
+            self._splay(y)
+            self._right[y] = last
+            self._pull(y)
+            last = y
+            y = self._parent[y]
+        self._splay(x)
+
+    def _make_root(self, x):
+        self._access(x)
+        self._flip[x] = not self._flip[x]
+
+    def _find_root(self, x):
+        self._access(x)
+        while True:
+            self._push(x)
+            if self._left[x] == _NONE:
+                break
+            x = self._left[x]
+        self._splay(x)
+        return x
+
+    def _link(self, x, y):
+        self._make_root(x)
+        self._parent[x] = y
+
+    def _cut(self, x, y):
+        # x と y は隣接している前提
+        self._make_root(x)
+        self._access(y)
+        self._left[y] = _NONE
+        self._parent[x] = _NONE
+        self._pull(y)
+
+    def _path_max(self, x, y):
+        self._make_root(x)
+        self._access(y)
+        return self._max[y]
@@ -0,0 +1,258 @@
+# graph layouts with an on-disk cache
+# グラフの描画位置（レイアウト）の計算とキャッシュ
+# - cached_layout: グラフの構造とパラメータのハッシュをキーに、計算済みの座標を
+#   .npy ファイルに保存し、次回以降は読み込むだけにする
+#   (保存先に書き込めない場合は、キャッシュせずに毎回計算する)
+# - force_directed_positions: NumPy で一括計算する力指向レイアウト
+#   (Fruchterman-Reingold 法。遠くのノードからの斥力はセルの重心でまとめて近似する
+#    Barnes-Hut 法の考え方で、1反復が O(V^2) ではなくほぼ O(V log V) になる)
+
+import hashlib
+import os
+from contextlib import suppress
+
+import numpy as np
+
+from .csr_graph import CSRGraph
+
+# キャッシュの保存先（既定はユーザーのキャッシュディレクトリ
+# $XDG_CACHE_HOME、未設定なら ~/.cache の下）
+CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME')
+    or os.path.join(os.path.expanduser('~'), '.cache'),
+    'graph_algorithm', 'layouts')
+
+# ノード数がこの値以下なら、斥力を全ノード対で厳密に計算する
+EXACT_THRESHOLD = 1000
+
+LAYOUT_METHODS = ('spring', 'circular', 'force')
+
+
+def layout_key(graph, method, **params):
+    """
+    グラフの構造（ノード順・エッジ・重み・有向/無向）とパラメータから作るハッシュ値
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((method, sorted(params.items()))).encode())
+    digest.update(repr(graph.is_directed()).encode())
+    digest.update(repr(list(graph.nodes)).encode())
+    digest.update(repr(list(graph.edges(data='weight'))).encode())
+    return digest.hexdigest()
+
+
+def cached_layout(graph, method='spring', seed=42, cache_dir=None, **params):
+    """
+    networkx のグラフのレイアウトを、キャッシュがあれば読み込み、無ければ計算して保存する
+    - method: 'spring'（nx.spring_layout）、'circular'（nx.circular_layout）、
+              'force'（force_directed_positions）
+    - cache_dir: キャッシュの保存先（None の場合は CACHE_DIR）
+    - params: レイアウト関数に渡す追加の引数（キャッシュのキーにも含める）
+    - 戻り値: {ノード名: 座標の配列} (nx.*_layout と同じ形式)
+    """
+    if method not in LAYOUT_METHODS:
+        raise ValueError(f"未知のレイアウトです: {method}")
+    if method == 'circular':
+        seed = None
+    cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+    nodes = list(graph.nodes)
+
+    key = layout_key(graph, method, seed=seed, **params)
+    path = os.path.join(cache_dir, f'{method}_{key}.npy')
+    positions = None
+    if os.path.exists(path):
+        try:
+            positions = np.load(path)
+        except (OSError, ValueError):
+            positions = None  # 読めないキャッシュは計算し直す
+        if positions is not None and positions.shape != (len(nodes), 2):
+            positions = None
+
+    if positions is None:
+        positions = _compute_layout(graph, method, seed, params)
+        _save_cache(path, positions)
+
+    return dict(zip(nodes, positions))
+
+
+def _save_cache(path, positions):
+    """
+    座標をキャッシュに保存する（書き込めない場合は何もしない）
+    """
+    # 書き込み途中のファイルを読まないよう、一時ファイルに書いてから置き換える
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, 'wb') as f:
+            np.save(f, positions)
+        os.replace(temp_path, path)
+    except OSError:
+        with suppress(OSError):
+            os.remove(temp_path)
+
+
+def _compute_layout(graph, method, seed, params):
+    nodes = list(graph.nodes)
+    if method == 'force':
+        csr = CSRGraph.from_networkx(graph)
+        keep = csr.edge_sources() <= csr.indices
+        return force_directed_positions(
+            csr.num_nodes, csr.edge_sources()[keep], csr.indices[keep],
+            seed=seed, **params)
+
+    import networkx as nx
+    if method == 'spring':
+        pos = nx.spring_layout(graph, seed=seed, **params)
+    else:
+        pos = nx.circular_layout(graph, **params)
+    return np.array([pos[node] for node in nodes],
+                    dtype=np.float64).reshape(-1, 2)
+
+
+def force_directed_positions(num_nodes, src, dst, iterations=50, seed=42,
+                             levels=None):
+    """
+    力指向レイアウトの座標を (num_nodes, 2) の配列で返す関数
+    - src, dst: エッジの両端（無向エッジは片方向だけでよい）
+    - 引力はエッジごと、斥力は近くのノードとは厳密に、遠くのノードとは
+      4分木の各レベルのセルの重心との間で計算する
+    - levels: 4分木の深さ（None はノード数から自動で決める）
+    - 座標は nx.spring_layout と同じく、原点中心で各座標の絶対値が 1 以下
+    """
+    rng = np.random.default_rng(seed)
+    pos = rng.random((num_nodes, 2))
+    if num_nodes <= 1:
+        return pos * 0.0
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+
+    if levels is None:
+        # 最も細かいセルに平均 4 ノード程度入る深さ
+        levels = max(2, int(np.ceil(np.log(num_nodes / 4) / np.log(4))))
+    exact = num_nodes <= EXACT_THRESHOLD
+
+    k = np.sqrt(1.0 / num_nodes)  # 理想的なエッジの長さ
+    temperature = 0.1
+    cooling = temperature / (iterations + 1)
+    for _ in range(iterations):
+        if exact:
+            displacement = _exact_repulsion(pos, k)
+        else:
+            displacement = _approximate_repulsion(pos, k, levels)
+
+        # 引力: エッジの長さ d に対して d^2 / k
+        delta = pos[src] - pos[dst]
+        distance = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 0.01)
+        pull = delta * (distance / k)[:, None]
+        for axis in range(2):
+            displacement[:, axis] -= np.bincount(src, pull[:, axis],
+                                                 num_nodes)
+            displacement[:, axis] += np.bincount(dst, pull[:, axis],
+                                                 num_nodes)
+
+        # 移動量を温度で制限する
+        length = np.maximum(np.hypot(displacement[:, 0],
+                                     displacement[:, 1]), 0.01)
+        step = np.minimum(length, temperature) / length
+        pos += displacement * step[:, None]
+        temperature -= cooling
+
+    pos -= pos.mean(axis=0)
+    scale = np.abs(pos).max()
+    if scale > 0:
+        pos /= scale
+    return pos
+
+
+def _exact_repulsion(pos, k):
+    """
+    全ノード対の斥力 k^2 / d の合計（ノード数が少ないとき用）
+    """
+    delta = pos[:, None, :] - pos[None, :, :]
+    distance2 = np.maximum((delta ** 2).sum(axis=2), 1e-4)
+    return (delta * (k * k / distance2)[:, :, None]).sum(axis=1)
+
+
+# 親セルの周囲 3x3 の子セル (6x6) の、親セルの左下の子から見た相対位置
+_CHILD_DX, _CHILD_DY = (a.ravel() for a in np.meshgrid(
+    np.arange(-2, 4), np.arange(-2, 4), indexing='ij'))
+# 自分のセルを含む周囲 3x3 のセル
+_NEAR_DX, _NEAR_DY = (a.ravel() for a in np.meshgrid(
+    np.arange(-1, 2), np.arange(-1, 2), indexing='ij'))
+
+
+def _approximate_repulsion(pos, k, levels):
+    """
+    4分木による斥力の近似
+    - レベル l の格子 (2^l x 2^l) で、「親セルの隣のセルの子」のうち自分の隣では
+      ないセル（最大 27 個）とは、セルの重心にまとめた質量との斥力を計算する
+    - 最も細かいレベルの隣接セル (3x3) に入っているノードとは厳密に計算する
+    """
+    n = len(pos)
+    x, y = pos[:, 0], pos[:, 1]
+    low = pos.min(axis=0)
+    size = max(float((pos.max(axis=0) - low).max()), 1e-9) * (1 + 1e-9)
+    unit = (pos - low) / size  # [0, 1) に正規化した座標
+    force_x = np.zeros(n)
+    force_y = np.zeros(n)
+    kk = k * k
+
+    for level in range(2, levels + 1):
+        g = 1 << level
+        cx, cy = _cells(unit, g)
+        flat = cx * g + cy
+        mass = np.bincount(flat, minlength=g * g).astype(np.float64)
+        inv_mass = 1.0 / np.maximum(mass, 1)
+        center_x = np.bincount(flat, x, g * g) * inv_mass
+        center_y = np.bincount(flat, y, g * g) * inv_mass
+
+        # 各ノードの相互作用リスト (n, 36)
+        ox = (cx // 2 * 2)[:, None] + _CHILD_DX
+        oy = (cy // 2 * 2)[:, None] + _CHILD_DY
+        valid = (ox >= 0) & (ox < g) & (oy >= 0) & (oy < g)
+        valid &= (np.abs(ox - cx[:, None]) > 1)\
+            | (np.abs(oy - cy[:, None]) > 1)
+        other = np.where(valid, ox * g + oy, 0)
+
+        dx = x[:, None] - center_x[other]
+        dy = y[:, None] - center_y[other]
+        f = np.where(valid, mass[other], 0.0) * kk\
+            / np.maximum(dx * dx + dy * dy, 1e-4)
+        force_x += (dx * f).sum(axis=1)
+        force_y += (dy * f).sum(axis=1)
+
+    # 最も細かいレベルで隣接するセルのノードとは厳密に計算する
+    g = 1 << levels
+    cx, cy = _cells(unit, g)
+    flat = cx * g + cy
+    order = np.argsort(flat, kind='stable')
+    cell_start = np.searchsorted(flat[order], np.arange(g * g + 1))
+
+    near_x = cx[:, None] + _NEAR_DX
+    near_y = cy[:, None] + _NEAR_DY
+    valid = (near_x >= 0) & (near_x < g) & (near_y >= 0) & (near_y < g)
+    near = (near_x * g + near_y)[valid]
+    starts = cell_start[near]
+    counts = cell_start[near + 1] - starts
+    owners = np.broadcast_to(np.arange(n)[:, None], valid.shape)[valid]
+
+    # (ノード, 近くのノード) の組を一括で展開する
+    owners = np.repeat(owners, counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts,
+                                                  counts)
+    others = order[np.repeat(starts, counts) + offsets]
+
+    dx = x[owners] - x[others]
+    dy = y[owners] - y[others]
+    # 自分自身との組は dx = dy = 0 なので力は 0 になる
+    f = kk / np.maximum(dx * dx + dy * dy, 1e-4)
+    force_x += np.bincount(owners, dx * f, n)
+    force_y += np.bincount(owners, dy * f, n)
+    return np.stack([force_x, force_y], axis=1)
+
+
+def _cells(unit, g):
+    """
+    正規化した座標から、g x g の格子のセル番号 (cx, cy) を求める
+    """
+    cell = np.minimum((unit * g).astype(np.int64), g - 1)
+    return cell[:, 0], cell[:, 1]
@@ -0,0 +1,93 @@
+# multi-source breadth-first search (bit-parallel)
+# 多始点幅優先探索（64個の始点を uint64 の各ビットに詰めて同時に探索する）
+
+import numpy as np
+
+# 1回の探索で同時に扱う始点の数（uint64 のビット数）
+WORD_BITS = 64
+
+
+def ms_bfs_distances(graph, sources, max_depth=None):
+    """
+    複数の始点からのホップ数をまとめて求める関数
+    - graph: CSRGraph
+    - sources: 始点のノード名のリスト（64個ずつ1回の探索で処理する）
+    - max_depth: 指定時はそのホップ数までで探索を打ち切る
+    - 戻り値: 形状 (始点数, ノード数) の int32 配列（到達不可は -1）
+    """
+    source_ids = [graph.id_of(s) for s in sources]
+    dist = np.full((len(source_ids), graph.num_nodes), -1, dtype=np.int32)
+
+    for offset in range(0, len(source_ids), WORD_BITS):
+        batch = source_ids[offset:offset + WORD_BITS]
+        for depth, nodes, bits in _ms_bfs_batch(graph, batch, max_depth):
+            # bits[i, b] が真 = 始点 b からノード nodes[i] へ depth ホップで初到達
+            node_index, bit = np.nonzero(bits)
+            dist[offset + bit, nodes[node_index]] = depth
+
+    return dist
+
+
+def k_hop_counts(graph, sources, k):
+    """
+    各始点から k ホップ以内に到達できるノード数（始点自身を含む）を求める関数
+    - 距離行列を作らないので、メモリはノード数に比例する分だけで済む
+    - 戻り値: 形状 (始点数,) の int64 配列
+    """
+    source_ids = [graph.id_of(s) for s in sources]
+    counts = np.zeros(len(source_ids), dtype=np.int64)
+
+    for offset in range(0, len(source_ids), WORD_BITS):
+        batch = source_ids[offset:offset + WORD_BITS]
+        for _, _, bits in _ms_bfs_batch(graph, batch, k):
+            counts[offset:offset + len(batch)]\
+                += bits[:, :len(batch)].sum(axis=0)
+
+    return counts
+
+
+def _ms_bfs_batch(graph, batch, max_depth):
+    """
+    最大64個の始点を同時に探索し、レベルごとに新しく到達したノードを返すジェネレータ
+    - seen[v] / frontier[v] のビット b が始点 batch[b] に対応する
+    - 1レベルの処理: フロンティアのノードの全出辺について
+      next[隣接ノード] |= frontier[ノード] を一括で計算し、既訪問ビットを除く
+    - yield: (depth, nodes, bits)  bits は形状 (len(nodes), 64) の bool 配列
+    """
+    n = graph.num_nodes
+    seen = np.zeros(n, dtype=np.uint64)
+    frontier = np.zeros(n, dtype=np.uint64)
+
+    for b, s in enumerate(batch):
+        seen[s] |= np.uint64(1 << b)
+    frontier[:] = seen
+
+    # 始点自身（距離 0）
+    nodes = np.flatnonzero(frontier)
+    yield 0, nodes, _unpack_bits(frontier[nodes])
+
+    depth = 0
+    while len(nodes) and (max_depth is None or depth < max_depth):
+        sources, positions = graph.expand(nodes)
+        neighbors = graph.indices[positions]
+
+        next_frontier = np.zeros(n, dtype=np.uint64)
+        np.bitwise_or.at(next_frontier, neighbors, frontier[sources])
+        next_frontier &= ~seen
+        seen |= next_frontier
+
+        depth += 1
+        frontier = next_frontier
+        nodes = np.flatnonzero(frontier)
+        if len(nodes):
+            yield depth, nodes, _unpack_bits(frontier[nodes])
+
+
+def _unpack_bits(words):
+    """
+    uint64 配列を、各要素64ビットの bool 行列 (len(words), 64) に展開する
+    - 列 b がビット b（下位ビットから）に対応する
+    """
+    as_bytes = np.ascontiguousarray(words, dtype='<u8').view(np.uint8)
+    bits = np.unpackbits(as_bytes, bitorder='little')
+    return bits.reshape(len(words), WORD_BITS).astype(bool)
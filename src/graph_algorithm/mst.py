@@ -0,0 +1,378 @@
+# minimum spanning tree
+# 最小全域木（描画なし・CSR配列上で動く版）
+# - prim_heap: 優先度付きキューによるプリム法 O(E log V)（疎グラフ向け）
+# - prim_dense: 距離行列によるプリム法 O(V^2)（完全グラフなど密グラフ向け）
+# どちらも同じ規則（キーが最小のノードのうち、ノードIDが最小のものを選ぶ）で
+# ノードを選ぶので、同じ parent 配列と総重みを返す
+# 非連結グラフでは最小全域森になる（各連結成分の根は parent が -1）
+# - kruskal: エッジを重みでソートし、Union-Find で閉路を避けて採用する O(E log E)
+# - boruvka: 各成分の最小の出辺を一括で選んで成分をまとめる（プロセス並列に対応）
+# kruskal と boruvka はエッジ配列 (src, dst, weights) を受け取る版もあり、
+# 同じ重みのエッジはエッジ番号が小さい方を優先するので、同じエッジ集合を返す
+
+import os
+import time
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .csr_graph import CSRGraph
+from .floyd_warshall import to_dense_matrix
+from .priority_queues import IndexedHeap, LazyHeap
+from .shared_arrays import (attach_arrays, release_arrays, share_arrays,
+                            shared_views)
+
+# ワーカープロセス内で共有メモリ上の配列 (src, dst, weights, comp)
+_worker_arrays = None
+_worker_buffers: list[SharedMemory] = []
+
+
+def prim_heap(graph, start=None, queue='indexed'):
+    """
+    優先度付きキューによるプリム法
+    - graph: 無向の CSRGraph
+    - start: 最初に木に加えるノード名（None はノードID 0）
+    - queue: 'indexed'（decrease-key 付きヒープ）または 'lazy'（heapq）
+    - 戻り値: (parent, total_weight)
+    """
+    _check_undirected(graph)
+    n = graph.num_nodes
+    in_tree = np.zeros(n, dtype=bool)
+    parent = np.full(n, -1, dtype=graph.indices.dtype)
+    total_weight = 0.0
+    if n == 0:
+        return parent, total_weight
+
+    # キーは (重み, ノードID) の組にして、同じ重みならIDの小さい方を先に取り出す
+    pq = IndexedHeap(n) if queue == 'indexed' else LazyHeap(n)
+    key = [float('inf')] * n
+    indptr, indices, weights = graph.indptr, graph.indices, graph.weights
+
+    next_root = 0
+    root = graph.id_of(start) if start is not None else 0
+    while True:
+        if not len(pq):
+            # 連結成分を使い切ったら、未選択でIDが最小のノードから新しい木を始める
+            if root is None:
+                while next_root < n and in_tree[next_root]:
+                    next_root += 1
+                if next_root == n:
+                    break
+                root = next_root
+            pq.push(root, (0.0, root))
+            root = None
+
+        (weight_u, u), _ = pq.pop()
+        in_tree[u] = True
+        if parent[u] != -1:
+            total_weight += weight_u
+
+        start_e, end_e = indptr[u], indptr[u + 1]
+        for v, w in zip(indices[start_e:end_e].tolist(),
+                        weights[start_e:end_e].tolist()):
+            if not in_tree[v] and w < key[v]:
+                key[v] = w
+                parent[v] = u
+                pq.push(v, (w, v))
+
+    return parent, total_weight
+
+
+def prim_dense(graph, start=None):
+    """
+    距離行列によるプリム法
+    - 各ステップは「キー配列の argmin」と「キー配列と u の行の np.minimum」だけ
+    - 戻り値: (parent, total_weight)
+    """
+    _check_undirected(graph)
+    n = graph.num_nodes
+    matrix = to_dense_matrix(graph)
+    np.fill_diagonal(matrix, np.inf)
+
+    key = np.full(n, np.inf)
+    parent = np.full(n, -1, dtype=graph.indices.dtype)
+    in_tree = np.zeros(n, dtype=bool)
+    total_weight = 0.0
+    if n == 0:
+        return parent, total_weight
+    key[graph.id_of(start) if start is not None else 0] = 0.0
+
+    for _ in range(n):
+        # 木に入ったノードを除いてキーが最小のノード
+        u = int(np.argmin(np.where(in_tree, np.inf, key)))
+        if in_tree[u]:
+            # 残りのキーが全て inf: 未選択でIDが最小のノードを新しい木の根にする
+            u = int(np.argmin(in_tree))
+        if parent[u] != -1:
+            total_weight += float(key[u])
+        in_tree[u] = True
+
+        row = matrix[u]
+        improved = (row < key) & ~in_tree
+        key = np.minimum(key, np.where(in_tree, np.inf, row))
+        parent[improved] = u
+
+    return parent, total_weight
+
+
+class UnionFind:
+    """
+    配列による Union-Find（経路圧縮 + ランクによる併合）
+    """
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.rank = [0] * n
+
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        # 経路圧縮: たどったノードを全て根に直接つなぐ
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, a, b):
+        """
+        a と b の集合を併合する（すでに同じ集合なら False）
+        """
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.rank[a] < self.rank[b]:
+            a, b = b, a
+        self.parent[b] = a
+        if self.rank[a] == self.rank[b]:
+            self.rank[a] += 1
+        return True
+
+
+def kruskal_edges(src, dst, weights, num_nodes):
+    """
+    エッジ配列に対するクラスカル法
+    - src, dst, weights: 無向エッジの配列（各エッジは1回だけ）
+    - 戻り値: (採用したエッジ番号の配列, total_weight)
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    # 安定ソートなので、同じ重みのエッジはエッジ番号順に並ぶ
+    order = np.argsort(weights, kind='stable')
+    uf = UnionFind(num_nodes)
+    chosen = []
+    for e, u, v in zip(order.tolist(), np.asarray(src)[order].tolist(),
+                       np.asarray(dst)[order].tolist()):
+        if uf.union(u, v):
+            chosen.append(e)
+            if len(chosen) == num_nodes - 1:
+                break
+    chosen = np.array(chosen, dtype=np.int64)
+    return chosen, float(weights[chosen].sum())
+
+
+def boruvka_edges(src, dst, weights, num_nodes, processes=1,
+                  chunk_size=1 << 22):
+    """
+    エッジ配列に対するボルーフカ法
+    - 1ラウンドで「各成分の最小の出辺」を全成分について一括で選び、
+      選ばれたエッジで成分をまとめる（成分数は毎ラウンド半分以下になる）
+    - processes: 2 以上のとき、最小辺の選択をエッジのチャンクごとに
+      プロセスプールで分担する（配列は共有メモリで渡す）
+    - 戻り値: (採用したエッジ番号の配列, total_weight)
+    """
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.float64)
+    comp = np.arange(num_nodes, dtype=np.int64)
+
+    # (重み, エッジ番号) の順位。順位だけで比較すれば同順位が無いので、
+    # 選ばれたエッジで閉路はできず、kruskal_edges と同じエッジ集合になる
+    order = np.argsort(weights, kind='stable')
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1 or len(src) == 0:
+        chosen = _boruvka_serial(src, dst, rank, order, comp)
+    else:
+        chosen = _boruvka_parallel(src, dst, rank, order, comp, processes,
+                                   chunk_size)
+    return chosen, float(weights[chosen].sum())
+
+
+def _boruvka_serial(src, dst, rank, order, comp):
+    chosen = []
+    edges = np.arange(len(src), dtype=np.int64)
+    while True:
+        # 成分の内部になったエッジは以後不要なので捨てる
+        edges = edges[comp[src[edges]] != comp[dst[edges]]]
+        if not len(edges):
+            break
+        comps, best = _min_outgoing(src, dst, rank, comp, edges)
+        chosen.append(_merge_components(src, dst, comp, comps, order[best]))
+    return _concat(chosen)
+
+
+def _boruvka_parallel(src, dst, rank, order, comp, processes, chunk_size):
+    chosen = []
+    ranges = [(i, min(i + chunk_size, len(src)))
+              for i in range(0, len(src), chunk_size)]
+    blocks, specs = share_arrays([src, dst, rank, comp])
+    try:
+        shared_comp = shared_views(blocks, specs)[3]
+        with Pool(processes, initializer=_init_worker,
+                  initargs=(specs,)) as pool:
+            while True:
+                partial = pool.map(_chunk_min_outgoing, ranges)
+                comps = np.concatenate([c for c, _ in partial])
+                if not len(comps):
+                    break
+                # チャンクごとの候補から、成分ごとの最小をもう一度選ぶ
+                best = np.concatenate([b for _, b in partial])
+                comps, best = _min_per_component(comps, best, len(comp))
+                chosen.append(_merge_components(src, dst, shared_comp,
+                                                comps, order[best]))
+    finally:
+        release_arrays(blocks)
+    return _concat(chosen)
+
+
+def _init_worker(specs):
+    global _worker_arrays
+    _worker_arrays = attach_arrays(specs, _worker_buffers)
+
+
+def _chunk_min_outgoing(edge_range):
+    src, dst, rank, comp = _worker_arrays
+    edges = np.arange(*edge_range, dtype=np.int64)
+    edges = edges[comp[src[edges]] != comp[dst[edges]]]
+    return _min_outgoing(src, dst, rank, comp, edges)
+
+
+def _min_outgoing(src, dst, rank, comp, edges):
+    """
+    edges（成分をまたぐエッジ）の中から、成分ごとに順位が最小のエッジを選ぶ
+    - 戻り値: (成分の代表ノードIDの配列, 選んだエッジの順位の配列)
+    """
+    # 各エッジは両端の成分の候補になる
+    comps = np.concatenate([comp[src[edges]], comp[dst[edges]]])
+    ranks = np.concatenate([rank[edges], rank[edges]])
+    return _min_per_component(comps, ranks, len(comp))
+
+
+def _min_per_component(comps, ranks, num_nodes):
+    """
+    成分ごとに順位の最小値を np.minimum.at で求める（ソート不要の O(候補数)）
+    """
+    missing = np.iinfo(np.int64).max
+    best = np.full(num_nodes, missing)
+    np.minimum.at(best, comps, ranks)
+    comps = np.flatnonzero(best != missing)
+    return comps, best[comps]
+
+
+def _merge_components(src, dst, comp, comps, best):
+    """
+    各成分を選んだエッジの相手側の成分につなぎ、ポインタジャンプで代表を決める
+    - comp はその場で書き換える
+    - 戻り値: このラウンドで新しく採用したエッジ番号の配列
+    """
+    pointer = np.arange(len(comp), dtype=np.int64)
+    ends = comp[src[best]]
+    pointer[comps] = np.where(ends == comps, comp[dst[best]], ends)
+
+    # 2つの成分が同じエッジを選ぶと互いを指すので、番号の小さい方を根にする
+    mutual = (pointer[pointer[comps]] == comps) & (comps < pointer[comps])
+    pointer[comps[mutual]] = comps[mutual]
+
+    while True:
+        jumped = pointer[pointer]
+        if np.array_equal(jumped, pointer):
+            break
+        pointer = jumped
+    comp[:] = pointer[comp]
+    return np.unique(best)
+
+
+def _concat(chosen):
+    if not chosen:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(chosen)
+
+
+def graph_edge_arrays(graph):
+    """
+    無向の CSRGraph から、各エッジを1回ずつ含む (src, dst, weights) を作る
+    - 両方向に格納されたエッジのうち src < dst の側だけを残す（自己ループは除く）
+    """
+    _check_undirected(graph)
+    sources = graph.edge_sources()
+    keep = sources < graph.indices
+    return sources[keep], graph.indices[keep], graph.weights[keep]
+
+
+def kruskal(graph):
+    """
+    CSRGraph に対するクラスカル法
+    - 戻り値: (採用したエッジの (ノード名, ノード名, 重み) のリスト, total_weight)
+    """
+    src, dst, weights = graph_edge_arrays(graph)
+    chosen, total_weight = kruskal_edges(src, dst, weights, graph.num_nodes)
+    return _labelled_edges(graph, src, dst, weights, chosen), total_weight
+
+
+def boruvka(graph, processes=1):
+    """
+    CSRGraph に対するボルーフカ法（戻り値は kruskal と同じ形式）
+    """
+    src, dst, weights = graph_edge_arrays(graph)
+    chosen, total_weight = boruvka_edges(src, dst, weights, graph.num_nodes,
+                                         processes)
+    return _labelled_edges(graph, src, dst, weights, chosen), total_weight
+
+
+def _labelled_edges(graph, src, dst, weights, chosen):
+    return [(graph.label_of(u), graph.label_of(v), w)
+            for u, v, w in zip(src[chosen].tolist(), dst[chosen].tolist(),
+                               weights[chosen].tolist())]
+
+
+def mst_edges(graph, parent):
+    """
+    parent 配列から (ノード名, 親のノード名, 重み) のリストを作る関数
+    """
+    edges = []
+    for v in np.flatnonzero(parent != -1).tolist():
+        p = int(parent[v])
+        weight = float(graph.weights[graph.edge_position(p, v)])
+        edges.append((graph.label_of(v), graph.label_of(p), weight))
+    return edges
+
+
+def _check_undirected(graph):
+    if graph.directed:
+        raise ValueError("最小全域木は無向グラフでのみ定義されます")
+
+
+if __name__ == '__main__':
+    # 乱数グラフで各方式の総重みが一致することを確認し、実行時間を表示する
+    rng = np.random.default_rng(0)
+    num_nodes = 200_000
+    m = num_nodes * 5
+    G = CSRGraph.from_arrays(rng.integers(0, num_nodes, m),
+                             rng.integers(0, num_nodes, m),
+                             rng.integers(1, 1000, m), num_nodes=num_nodes)
+
+    results = {}
+    for name, run in [
+            ('prim_heap', lambda: prim_heap(G)[1]),
+            ('kruskal', lambda: kruskal(G)[1]),
+            ('boruvka', lambda: boruvka(G)[1]),
+            ('boruvka (4 processes)', lambda: boruvka(G, processes=4)[1])]:
+        start = time.perf_counter()
+        results[name] = run()
+        print(f"{name:<24}{results[name]:>14g}"
+              f"{time.perf_counter() - start:>8.2f} s")
+    assert len(set(results.values())) == 1, results
@@ -0,0 +1,303 @@
+# プリム法
+# mst : Minimum Spanning Tree（最小全域木）
+
+import sys  # 無限大 (sys.maxsize) を使用するため
+from plotting import pyplot
+from profiling import Profiler
+from .csr_graph import CSRGraph
+from .layout import cached_layout
+
+# 描画要素（ノード・エッジ・ラベル）は最初の描画で一度だけ作り、以降は使い回す
+_renderer = None
+
+
+def create_prim_legend(ax, current_step_is_final=False):
+    """
+    プリム法可視化用の凡例要素を作成し、軸に追加する
+    """
+    from matplotlib.lines import Line2D
+
+    legend_elements = []
+
+    # 1. ノードの凡例
+    legend_elements.extend([
+        Line2D([0], [0], marker='o', color='w', label='MST確定ノード',
+               markersize=10, markerfacecolor='limegreen'),
+        Line2D([0], [0], marker='o', color='w', label='現在選択中のノード',
+               markersize=10, markerfacecolor='red'),
+        Line2D([0], [0], marker='o', color='w', label='未選択ノード',
+               markersize=10, markerfacecolor='skyblue')
+    ])
+
+    # 2. エッジの凡例
+    legend_elements.extend([
+        Line2D([0], [0], color='darkgreen', lw=3, label='MST確定エッジ'),
+        Line2D([0], [0], color='red', lw=2, label='MST候補エッジ'),
+        Line2D([0], [0], color='lightgray', lw=1, label='その他エッジ')
+    ])
+
+    # 凡例をグラフ描画エリアの右外側へ配置
+    ax.legend(handles=legend_elements,
+              loc='center left',
+              bbox_to_anchor=(1.05, 0.5),  # 軸の右側に配置
+              title="【プリム法 凡例】",
+              fontsize=9,
+              title_fontsize=10)
+
+
+def draw_graph_step(
+        G, mst_set, parent, key, current_u, process_type, pause_time=0.8,
+        pos=None, recorder=None, profiler=None):
+    global _renderer
+    plt = pyplot()
+    if profiler is None:
+        profiler = Profiler()
+    import networkx as nx
+    from .graph_renderer import GraphRenderer
+
+    with profiler.phase('draw'):
+        nodes = list(G.nodes)
+        # ノード名 -> インデックス
+        node_map = {node: i for i, node in enumerate(nodes)}
+
+        # Axes か記録先が変わったら描画要素を作り直す
+        first_step = (_renderer is None or _renderer.ax is not plt.gca()
+                      or _renderer.recorder is not recorder)
+        if first_step:
+            ax = plt.gca()
+            if pos is None:
+                pos = cached_layout(G, 'circular')
+            _renderer = GraphRenderer(
+                ax, G, pos, node_size=2000, node_alpha=0.9,
+                font_weight='normal',
+                edge_labels=nx.get_edge_attributes(G, 'weight'),
+                edge_label_color='darkgray', recorder=recorder)
+            create_prim_legend(ax)
+
+        # 1. ノードの色とラベルの設定
+        node_colors = {}
+        node_labels = {}
+        for node in nodes:
+            i = node_map[node]
+            k = key[i]
+            p = parent[i]
+
+            # 色の決定
+            if node == current_u:
+                node_colors[node] = 'red'  # 🔴 現在選択中のノード
+            elif node in mst_set:
+                node_colors[node] = 'limegreen'  # 🟢 MSTに含まれるノード
+            else:
+                node_colors[node] = 'skyblue'  # 🔵 未選択のノード
+
+            # ラベルの決定 (ノード名 + キー + 親)
+            key_str = "∞" if k == sys.maxsize else f"{k:g}"
+            parent_str = "" if p is None else f" (from {p})"
+            node_labels[node] = f"{node}\nKey: {key_str}{parent_str}"
+
+        # 2. エッジの色と太さの設定
+        edge_colors = {}
+        edge_widths = {}
+
+        for u, v in G.edges():
+
+            # MSTの決定済みエッジ
+            if parent[node_map[u]] == v and u in mst_set:
+                edge_colors[(u, v)] = 'darkgreen'
+                edge_widths[(u, v)] = 3
+            elif parent[node_map[v]] == u and v in mst_set:
+                edge_colors[(u, v)] = 'darkgreen'
+                edge_widths[(u, v)] = 3
+            # MST候補のエッジ (現在選択中のノードに接続している未選択ノードへのエッジ)
+            elif ((u == current_u and v not in mst_set)
+                  or (v == current_u and u not in mst_set)):
+                edge_colors[(u, v)] = 'red'
+                edge_widths[(u, v)] = 2
+            else:
+                edge_colors[(u, v)] = 'lightgray'
+                edge_widths[(u, v)] = 1
+
+        # 変化した色・太さ・ラベルだけが描画要素に反映される
+        _renderer.set_node_colors(node_colors)
+        _renderer.set_node_labels(node_labels)
+        _renderer.set_edge_styles(edge_colors, edge_widths)
+
+        # タイトル
+        mst_nodes_str = ", ".join(sorted(list(mst_set)))
+        _renderer.set_title(
+            f"プリム法 (Prim's Algorithm) | {process_type}\n"
+            f"MST Nodes: {{{mst_nodes_str}}}"
+            )
+
+        # レイアウトは描画要素を作った最初のステップで一度だけ調整する
+        if first_step:
+            plt.tight_layout()
+    profiler.pause(pause_time, recorder)
+
+
+def prim_visualized(G, start_node, pause_time=0.8, pos=None,
+                    recorder=None, profiler=None):
+    """
+    プリム法の実行と可視化を行うメイン関数
+    - pos: ノードの描画位置（省略時は circular_layout）
+    - recorder: step_trace.StepRecorder を渡すと各ステップを記録する
+      (保存した記録は python -m step_trace で再生できる)
+    - profiler: profiling.Profiler を渡すと、計算・描画・待ち時間の時間を計測する
+    """
+    plt = pyplot()
+    if profiler is None:
+        profiler = Profiler()
+
+    # ノードの描画位置を固定
+    if pos is None:
+        pos = cached_layout(G, 'circular')
+
+    nodes = list(G.nodes)
+    num_nodes = len(nodes)
+    node_map = {node: i for i, node in enumerate(nodes)}
+
+    # 隣接リストと重みは CSR 形式に一括変換して参照する
+    # (ノードIDは G.nodes の順なので node_map のインデックスと一致する)
+    csr = CSRGraph.from_networkx(G)
+
+    # 初期化:
+    mst_set = set()  # MSTに含まれたノード
+    key = [sys.maxsize] * num_nodes  # ノードの最小接続重み
+    parent = [None] * num_nodes  # MSTエッジの親ノード
+
+    start_index = node_map[start_node]
+    key[start_index] = 0
+
+    # 初期状態の描画
+    profiler.start()
+    draw_graph_step(G, mst_set, parent, key, start_node,
+                    f"初期化: スタートノード '{start_node}' のキーを 0 に設定",
+                    pause_time, pos, recorder, profiler)
+
+    # MST構築ループ
+    for _ in range(num_nodes):
+        profiler.step()
+
+        # ----------------------------------------------------
+        # 1. MSTに含まれていないノードの中で、最小キーのノード u を見つける
+        # ----------------------------------------------------
+        with profiler.phase('compute'):
+            min_key = sys.maxsize
+            u = None
+
+            for node in nodes:
+                i = node_map[node]
+                if node not in mst_set and key[i] < min_key:
+                    min_key = key[i]
+                    u = node
+
+        if u is None:
+            break
+
+        # ----------------------------------------------------
+        # 2. ノード u をMSTに追加し、可視化
+        # ----------------------------------------------------
+        mst_set.add(u)
+
+        u_index = node_map[u]
+        parent_u = parent[u_index]
+        process_str = f"選択: ノード '{u}' (Key:{min_key:g}) をMSTに追加"
+        if parent_u is not None:
+            process_str += f", エッジ ({parent_u}, {u}) をMSTに組み込む"
+
+        draw_graph_step(G, mst_set, parent, key, u,
+                        process_str, pause_time * 1.5, pos, recorder,
+                        profiler)
+
+        # ----------------------------------------------------
+        # 3. 隣接ノード v のキーを更新
+        # ----------------------------------------------------
+        with profiler.phase('compute'):
+            for v_index, weight in zip(csr.neighbors(u_index).tolist(),
+                                       csr.neighbor_weights(u_index).tolist()):
+                v = nodes[v_index]
+                # v がまだMSTに含まれていない
+                if v not in mst_set:
+
+                    # エッジの重みが現在の v のキーより小さいか
+                    if weight < key[v_index]:
+                        key[v_index] = weight
+                        parent[v_index] = u
+
+                        # 更新ステップの可視化
+                        draw_graph_step(G, mst_set, parent, key, u,
+                                        f"キー更新: {u} -> {v} (重み:{weight:g}). "
+                                        f"{v}のキーを {weight:g} に更新.",
+                                        pause_time, pos, recorder, profiler)
+
+    # ----------------------------------------------------
+    # 最終結果の表示
+    # ----------------------------------------------------
+    total_weight = 0
+    mst_edges_list = []
+
+    for i in range(num_nodes):
+        u = nodes[i]
+        p = parent[i]
+        if p is not None:
+            weight = G.get_edge_data(u, p)['weight']
+            total_weight += weight
+            mst_edges_list.append((u, p) if u < p else (p, u))
+
+    mst_edges_str = "\n".join([f"({u}, {v}) "
+                               f"(重み: {G.get_edge_data(u, v)['weight']})"
+                               for u, v in sorted(list(set(mst_edges_list)))])
+
+    print("\n--- プリム法 実行完了 ---")
+    print(f"最小全域木の総重み: {total_weight}")
+    print(f"最小全域木のエッジ:\n{mst_edges_str}")
+
+    draw_graph_step(G, mst_set, parent, key, None,
+                    f"完了: 最小全域木の総重み {total_weight}",
+                    pause_time * 3, pos, recorder, profiler)
+    profiler.stop()
+    plt.show()
+
+
+if __name__ == '__main__':
+    import networkx as nx
+
+    # --- グラフの定義 (サンプルデータ) ---
+    G = nx.Graph()
+    # ノードとエッジ: (ノードA, ノードB, 重み)
+    edges_with_weight = [
+        ('A', 'B', 4), ('A', 'H', 8),
+        ('B', 'C', 8), ('B', 'H', 11),
+        ('C', 'D', 7), ('C', 'F', 4), ('C', 'I', 2),
+        ('D', 'E', 9), ('D', 'F', 14),
+        ('E', 'F', 10),
+        ('F', 'G', 2),
+        ('G', 'H', 1), ('G', 'I', 6),
+        ('H', 'I', 7)
+    ]
+    G.add_weighted_edges_from(edges_with_weight)
+
+    # 引数に .npz ファイルのパスを渡すと、各ステップを記録して保存する
+    # (ウィンドウを閉じた後に保存する。python -m step_trace で再生できる)
+    recorder = None
+    if len(sys.argv) > 1:
+        from step_trace import StepRecorder
+        recorder = StepRecorder()
+
+    # 環境変数 ALGO_PROFILE を設定すると、計算・描画・待ち時間・出力の内訳を表示する
+    # (例: ALGO_PROFILE=1 / ALGO_PROFILE=sampled:5,cprofile)
+    profiler = Profiler.from_env()
+
+    # 実行
+    # --- ループに入る前に Figure を作成する ---
+    plt = pyplot()
+    plt.figure(figsize=(12, 8))  # サイズを広げ、凡例が入るスペースを確保
+    plt.subplots_adjust(right=0.75)  # グラフ描画エリアを右端から75%の位置に制限
+    # --------------------------------------------------
+
+    prim_visualized(G, start_node='A', pause_time=2.0, recorder=recorder,
+                    profiler=profiler)
+    if recorder is not None:
+        recorder.save(sys.argv[1])
+    if profiler is not None:
+        print(profiler.report())
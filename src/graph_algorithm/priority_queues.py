@@ -0,0 +1,180 @@
+# priority queues for Dijkstra
+# ダイクストラ法で使う優先度付きキュー（共通インターフェース）
+# - push(node, key): 未登録なら追加、登録済みでキーが小さくなるなら更新
+# - pop(): 最小キーのノードを (key, node) で取り出す
+# - len(q): キューに入っているノード数
+# - peak: 探索中に保持した要素数の最大値（メモリ使用量の目安）
+
+import heapq
+
+
+class LazyHeap:
+    """
+    heapq によるキュー（visualize_dijkstra と同じ「重複して積み、古い要素は捨てる」方式）
+    - キー更新のたびに要素が増えるので、ヒープの大きさは最大 O(E) になる
+    """
+
+    def __init__(self, capacity):
+        self.heap = []
+        self.keys = [None] * capacity  # キューに入っているノードの最新キー
+        self.size = 0
+        self.peak = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, node, key):
+        current = self.keys[node]
+        if current is None:
+            self.size += 1
+        elif key >= current:
+            return False
+        self.keys[node] = key
+        heapq.heappush(self.heap, (key, node))
+        if len(self.heap) > self.peak:
+            self.peak = len(self.heap)
+        return True
+
+    def pop(self):
+        while True:
+            key, node = heapq.heappop(self.heap)
+            # 最新のキーと一致しない要素は、更新前に積まれた古い要素
+            if self.keys[node] == key:
+                self.keys[node] = None
+                self.size -= 1
+                return key, node
+
+
+class IndexedHeap:
+    """
+    配列上の d 分ヒープと位置表 (pos) による、キーの減少 (decrease-key) 付きキュー
+    - 各ノードはヒープに高々1つしか入らないので、大きさは最大 O(V)
+    - heap[i]: i 番目の要素のノード, pos[node]: ノードのヒープ上の位置 (-1 は未登録)
+    """
+
+    def __init__(self, capacity, d=4):
+        self.d = d
+        self.heap = []
+        self.keys = [0] * capacity
+        self.pos = [-1] * capacity
+        self.peak = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, node):
+        return self.pos[node] != -1
+
+    def push(self, node, key):
+        i = self.pos[node]
+        if i == -1:
+            # 新規追加: 末尾に置いて上へ移動
+            i = len(self.heap)
+            self.heap.append(node)
+            if len(self.heap) > self.peak:
+                self.peak = len(self.heap)
+        elif key >= self.keys[node]:
+            return False
+        self.keys[node] = key
+        self._sift_up(i, node, key)
+        return True
+
+    def pop(self):
+        heap = self.heap
+        top = heap[0]
+        last = heap.pop()
+        self.pos[top] = -1
+        if heap:
+            self._sift_down(0, last, self.keys[last])
+        return self.keys[top], top
+
+    def _sift_up(self, i, node, key):
+        heap, keys, pos, d = self.heap, self.keys, self.pos, self.d
+        while i > 0:
+            parent = (i - 1) // d
+            p_node = heap[parent]
+            if keys[p_node] <= key:
+                break
+            heap[i] = p_node
+            pos[p_node] = i
+            i = parent
+        heap[i] = node
+        pos[node] = i
+
+    def _sift_down(self, i, node, key):
+        heap, keys, pos, d = self.heap, self.keys, self.pos, self.d
+        n = len(heap)
+        while True:
+            first = i * d + 1
+            if first >= n:
+                break
+            # d 個の子のうち最小のもの
+            best = first
+            best_key = keys[heap[first]]
+            for c in range(first + 1, min(first + d, n)):
+                c_key = keys[heap[c]]
+                if c_key < best_key:
+                    best, best_key = c, c_key
+            if key <= best_key:
+                break
+            heap[i] = heap[best]
+            pos[heap[i]] = i
+            i = best
+        heap[i] = node
+        pos[node] = i
+
+
+class BucketQueue:
+    """
+    Dial のバケットキュー（重みが 0 以上 max_weight 以下の整数の場合専用）
+    - ダイクストラ法ではキューのキーが常に [最小キー, 最小キー + max_weight] に収まる
+      ので、max_weight + 1 個のバケットを循環させて使う
+    - キーの減少は、元のバケットから O(1) で取り除いて別のバケットに入れ直す
+    """
+
+    def __init__(self, capacity, max_weight):
+        self.num_buckets = int(max_weight) + 1
+        self.buckets = [[] for _ in range(self.num_buckets)]
+        self.keys = [0] * capacity
+        self.where = [-1] * capacity  # バケット内での位置 (-1 は未登録)
+        self.cursor = 0  # 現在の最小キー
+        self.size = 0
+        self.peak = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, node, key):
+        if self.where[node] != -1:
+            if key >= self.keys[node]:
+                return False
+            self._remove(node)
+        bucket = self.buckets[key % self.num_buckets]
+        self.where[node] = len(bucket)
+        bucket.append(node)
+        self.keys[node] = key
+        self.size += 1
+        if self.size > self.peak:
+            self.peak = self.size
+        return True
+
+    def pop(self):
+        while not self.buckets[self.cursor % self.num_buckets]:
+            self.cursor += 1
+        node = self.buckets[self.cursor % self.num_buckets].pop()
+        self.where[node] = -1
+        self.size -= 1
+        return self.keys[node], node
+
+    def _remove(self, node):
+        """
+        バケット内の末尾要素と入れ替えて O(1) で取り除く
+        """
+        bucket = self.buckets[self.keys[node] % self.num_buckets]
+        i = self.where[node]
+        last = bucket.pop()
+        if last != node:
+            bucket[i] = last
+            self.where[last] = i
+        self.where[node] = -1
+        self.size -= 1
@@ -0,0 +1,55 @@
+# shared-memory NumPy arrays
+# プロセスプールのワーカーに、大きな配列をコピーせずに渡すための補助関数
+
+import numpy as np
+from multiprocessing import shared_memory
+
+
+def share_arrays(arrays):
+    """
+    配列を共有メモリにコピーする関数
+    - 戻り値: (共有メモリのリスト, ワーカーに渡す情報のリスト)
+      共有メモリは使い終わったら release_arrays() で解放する
+    """
+    blocks = []
+    specs = []
+    for array in arrays:
+        array = np.asarray(array)
+        block = shared_memory.SharedMemory(create=True,
+                                           size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+        blocks.append(block)
+        specs.append((block.name, array.shape, array.dtype.str))
+    return blocks, specs
+
+
+def shared_views(blocks, specs):
+    """
+    親プロセス側で、共有メモリ上の配列をそのまま書き換えるためのビュー
+    """
+    return [np.ndarray(shape, dtype, buffer=block.buf)
+            for block, (_, shape, dtype) in zip(blocks, specs)]
+
+
+def attach_arrays(specs, keep_alive):
+    """
+    ワーカー側で共有メモリに接続し、配列のリストを返す関数
+    - keep_alive: 接続した共有メモリを追加するリスト
+      (参照を保持しておかないと共有メモリが閉じられてしまう)
+    - 後始末は親プロセスが行うので track=False で接続する
+    """
+    arrays = []
+    for name, shape, dtype in specs:
+        block = shared_memory.SharedMemory(name=name, track=False)
+        keep_alive.append(block)
+        arrays.append(np.ndarray(shape, dtype, buffer=block.buf))
+    return arrays
+
+
+def release_arrays(blocks):
+    """
+    share_arrays() で作った共有メモリを解放する
+    """
+    for block in blocks:
+        block.close()
+        block.unlink()
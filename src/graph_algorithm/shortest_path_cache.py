@@ -0,0 +1,101 @@
+# shortest-path result cache
+# ダイクストラ法の結果キャッシュ（LRU・メモリ上限つき、グラフの変更で自動的に無効化）
+
+from collections import OrderedDict
+
+import numpy as np
+
+from .dijkstra_csr import dijkstra
+
+
+class ShortestPathCache:
+    """
+    dijkstra() の前段に置く、始点ごとの結果キャッシュ
+    - キー: (グラフの版番号, 始点ID)
+      CSRGraph.set_weight() などでエッジが変わると版番号が進むので、
+      古い版の結果は使われずに破棄される
+    - 値: (distances, predecessors) の配列（書き換えられないよう読み取り専用）
+    - 合計サイズが max_bytes を超えたら、最も長く使われていない結果から捨てる
+    """
+
+    def __init__(self, graph, max_bytes=256 * 2**20, distance_dtype=np.float64,
+                 queue='indexed'):
+        """
+        - distance_dtype: 距離配列の保存型（np.float32 にするとサイズが半分になる
+          代わりに、距離が float32 の精度に丸められる）
+        """
+        self.graph = graph
+        self.max_bytes = max_bytes
+        self.distance_dtype = np.dtype(distance_dtype)
+        self.queue = queue
+
+        self.entries = OrderedDict()
+        self.version = graph.version
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, source):
+        """
+        source からの (distances, predecessors) を返す（無ければ計算して保存）
+        """
+        self._check_version()
+        key = (self.version, self.graph.id_of(source))
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        distances, predecessors = dijkstra(self.graph, source,
+                                           queue=self.queue)
+        distances = distances.astype(self.distance_dtype, copy=False)
+        for array in (distances, predecessors):
+            array.setflags(write=False)
+        entry = (distances, predecessors)
+
+        size = distances.nbytes + predecessors.nbytes
+        if size <= self.max_bytes:
+            self.entries[key] = entry
+            self.nbytes += size
+            self._evict()
+        return entry
+
+    def _check_version(self):
+        """
+        グラフの版番号が変わっていたら、保存済みの結果を全て破棄する
+        """
+        if self.graph.version != self.version:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+            self.nbytes = 0
+            self.version = self.graph.version
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes:
+            _, (distances, predecessors) = self.entries.popitem(last=False)
+            self.nbytes -= distances.nbytes + predecessors.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        """
+        ヒット率などの統計を辞書で返す
+        """
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'entries': len(self.entries),
+            'nbytes': self.nbytes,
+        }
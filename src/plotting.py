@@ -0,0 +1,40 @@
+# plotting helpers
+# 可視化スクリプト共通の matplotlib の読み込みと日本語フォント設定
+# - matplotlib は描画が必要になったときに初めて読み込む
+#   (アルゴリズムの関数だけを import した場合は読み込まれない)
+
+_configured = False
+
+
+def pyplot():
+    """
+    日本語フォントを設定済みの matplotlib.pyplot を返す関数
+    """
+    global _configured
+    import matplotlib.pyplot as plt
+
+    if not _configured:
+        try:
+            # 広く使われる日本語フォントを複数指定して試す
+            plt.rcParams['font.family']\
+                = ['Meiryo', 'MS Gothic', 'Yu Gothic', 'DejaVu Sans']
+            # CJK文字のフォールバックを可能にする
+            plt.rcParams['font.sans-serif']\
+                = ['Meiryo', 'MS Gothic', 'Yu Gothic', 'DejaVu Sans']
+            # マイナス記号などが文字化けしないように設定
+            plt.rcParams['axes.unicode_minus'] = False
+        except Exception as e:
+            # フォントが見つからない場合のフォールバック処理 (念のため)
+            print(f"Warning: Failed to set Japanese font settings. Error: {e}")
+        _configured = True
+    return plt
+
+
+def pause(seconds, recorder=None):
+    """
+    plt.pause() で画面を更新し、recorder（step_trace.StepRecorder）があれば
+    1フレームとして記録する
+    """
+    pyplot().pause(seconds)
+    if recorder is not None:
+        recorder.frame(seconds)
@@ -0,0 +1,243 @@
+# profiling helpers
+# 可視化スクリプトの実行時間を「計算・描画・待ち時間・ログ出力」に分けて計測する
+# - phase(名前): with で囲んだ区間の時間を名前ごとに集計する
+#   (区間が入れ子になった場合、内側の時間は外側から差し引く)
+# - pause(): plt.pause() を「描画 (draw)」と「待ち (pause)」に分けて計測する
+# - log(): ステップごとの print の代わり。そのまま出力 / まとめて出力 (buffered) /
+#   数ステップに1回だけ出力 (sampled) / 出力しない (quiet) を切り替えられる
+# - cProfile と tracemalloc による計測も選べる
+# 環境変数 ALGO_PROFILE を設定すると、各スクリプトの実行後に集計を表示する
+#   例: ALGO_PROFILE=1 / ALGO_PROFILE=sampled:10,cprofile / ALGO_PROFILE=quiet
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from plotting import pause, pyplot
+
+# 集計表の区間名（この順に表示し、その他の区間は後ろに並べる）
+PHASES = ['compute', 'draw', 'pause', 'print']
+
+LOG_MODES = ['print', 'buffered', 'sampled', 'quiet']
+
+# cProfile / tracemalloc の結果として表示する行数
+TOP_N = 15
+
+
+class Profiler:
+    """
+    可視化の各ステップを区間ごとに計測するクラス
+    - log_mode: 'print'（すぐに出力）/ 'buffered'（stop() でまとめて出力）/
+      'sampled'（sample_every ステップに1回だけ出力）/ 'quiet'（出力しない）
+    - cprofile / tracemalloc: True の場合、start() から stop() まで記録する
+    - start() / stop() は何度呼んでもよい（計測中の start()、停止中の stop() は
+      何もしない）。with 文でも使える
+    """
+
+    def __init__(self, log_mode='print', sample_every=10, cprofile=False,
+                 tracemalloc=False, stream=None):
+        if log_mode not in LOG_MODES:
+            raise ValueError(f"未対応のログ出力です: {log_mode}")
+        self.log_mode = log_mode
+        self.sample_every = max(int(sample_every), 1)
+        self.stream = stream
+        self.totals = {}
+        self.calls = {}
+        self.counters = {}
+        self.elapsed = 0.0
+        self.steps = 0
+        self.suppressed = 0
+        self._stack = []
+        self._buffer = []
+        self._started = None
+        self._cprofile = None
+        self._use_cprofile = cprofile
+        self._use_tracemalloc = tracemalloc
+        self._started_tracemalloc = False
+        self._memory = None
+
+    @classmethod
+    def from_env(cls, name='ALGO_PROFILE'):
+        """
+        環境変数の設定から作る（設定されていなければ None）
+        - カンマ区切りで buffered / sampled[:N] / quiet / cprofile / tracemalloc
+          を指定する（それ以外の値は集計の表示だけを有効にする）
+        """
+        value = os.environ.get(name, '')
+        if not value:
+            return None
+        options = {}
+        for token in value.split(','):
+            token = token.strip().lower()
+            mode, _, every = token.partition(':')
+            if mode in LOG_MODES:
+                options['log_mode'] = mode
+                if every:
+                    options['sample_every'] = int(every)
+            elif token in ('cprofile', 'tracemalloc'):
+                options[token] = True
+        return cls(**options)
+
+    # ----------------------------------------------------
+    # 計測の開始・終了
+    # ----------------------------------------------------
+    def start(self):
+        if self._started is not None:
+            return self
+        if self._use_tracemalloc:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            tracemalloc.reset_peak()
+        if self._use_cprofile:
+            import cProfile
+            self._cprofile = self._cprofile or cProfile.Profile()
+            self._cprofile.enable()
+        self._started = time.perf_counter()
+        return self
+
+    def stop(self):
+        if self._started is None:
+            return
+        self.flush()
+        self.elapsed += time.perf_counter() - self._started
+        self._started = None
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._use_tracemalloc:
+            import tracemalloc
+            peak = tracemalloc.get_traced_memory()[1]
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)])
+            self._memory = (peak, snapshot.statistics('lineno')[:TOP_N])
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # ----------------------------------------------------
+    # 区間・カウンター
+    # ----------------------------------------------------
+    @contextmanager
+    def phase(self, name):
+        """
+        with で囲んだ区間の時間を name に加える
+        """
+        # [区間名, 開始時刻, 内側の区間の時間]
+        frame = [name, time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[1]
+            self.totals[name] = self.totals.get(name, 0.0) \
+                + elapsed - frame[2]
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def step(self):
+        """
+        ステップの区切り（sampled の場合、ログを出力するステップを決める）
+        """
+        self.steps += 1
+
+    def pause(self, seconds, recorder=None):
+        """
+        plotting.pause() の代わり。保留中の描画を 'draw'、待ち時間を 'pause' に加える
+        """
+        plt = pyplot()
+        with self.phase('draw'):
+            # 先に描画しておくと plt.pause() は描画せずに待つだけになる
+            if plt.get_fignums() and plt.gcf().stale:
+                plt.gcf().canvas.draw()
+        with self.phase('pause'):
+            pause(seconds, recorder)
+
+    # ----------------------------------------------------
+    # ログ出力
+    # ----------------------------------------------------
+    def log(self, message, always=False):
+        """
+        ステップごとの出力（print の代わり）
+        - always: sampled の場合でも省略しない（見出しなど）
+        """
+        with self.phase('print'):
+            if self.log_mode == 'quiet':
+                self.suppressed += 1
+            elif self.log_mode == 'buffered':
+                self._buffer.append(message)
+            elif (self.log_mode == 'sampled' and not always and self.steps
+                  and (self.steps - 1) % self.sample_every):
+                self.suppressed += 1
+            else:
+                print(message, file=self.stream or sys.stdout)
+
+    def flush(self):
+        """
+        buffered の場合に溜めた出力をまとめて書き出す
+        """
+        if self._buffer:
+            with self.phase('print'):
+                stream = self.stream or sys.stdout
+                stream.write('\n'.join(self._buffer) + '\n')
+                stream.flush()
+            self._buffer.clear()
+
+    # ----------------------------------------------------
+    # 集計
+    # ----------------------------------------------------
+    def report(self):
+        """
+        区間ごとの集計表（計測中の場合は停止してから作る）
+        """
+        self.stop()
+        total = self.elapsed
+        measured = sum(self.totals.values())
+        lines = [f"--- プロファイル: {total:.3f} 秒, {self.steps} ステップ ---",
+                 f"{'phase':<12}{'calls':>8}{'total[s]':>11}{'share':>9}"
+                 f"{'mean[ms]':>10}"]
+        names = [name for name in PHASES if name in self.totals] + sorted(
+            name for name in self.totals if name not in PHASES)
+        for name in names:
+            seconds = self.totals[name]
+            lines.append(f"{name:<12}{self.calls[name]:>8}{seconds:>11.4f}"
+                         f"{_percent(seconds, total):>9}"
+                         f"{seconds / self.calls[name] * 1e3:>10.3f}")
+        lines.append(f"{'(other)':<12}{'':>8}{total - measured:>11.4f}"
+                     f"{_percent(total - measured, total):>9}")
+
+        if self.counters:
+            lines.append('カウンター: ' + ', '.join(
+                f'{name}={value}' for name, value in self.counters.items()))
+        if self.suppressed:
+            lines.append(f"ログ: {self.suppressed} 行を省略 ({self.log_mode})")
+        if self._memory is not None:
+            peak, statistics = self._memory
+            lines.append(f"tracemalloc: ピーク {peak / 2**20:.2f} MiB "
+                         f"(確保量の上位 {len(statistics)} 行)")
+            lines.extend(f"  {stat}" for stat in statistics)
+        if self._cprofile is not None:
+            import io
+            import pstats
+            out = io.StringIO()
+            pstats.Stats(self._cprofile, stream=out).sort_stats(
+                'cumulative').print_stats(TOP_N)
+            lines.append(f"cProfile (累積時間の上位 {TOP_N} 関数):")
+            lines.append(out.getvalue().strip('\n'))
+        return '\n'.join(lines)
+
+
+def _percent(seconds, total):
+    return f"{seconds / total * 100:.1f}%" if total > 0 else '-'
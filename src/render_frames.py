@@ -0,0 +1,233 @@
+# offline frame rendering
+# 記録したステップ (step_trace) を、画面に表示せずに連番画像・動画へ書き出す
+# - フレームを連続した区間 (チャンク) に分け、プロセスプールの各ワーカーが
+#   自分の Agg キャンバスで描画する（matplotlib の描画は1コアでしか動かないので、
+#   プロセス数に応じて速くなる）
+# - 各チャンクの先頭の状態は StepTrace.state_at() で直接復元し、以降は
+#   StepTrace.apply() でフレームごとの変更だけを適用する
+# - 出力先が
+#     ディレクトリ        : frame_000000.png ... と、表示時間を書いた frames.ffconcat
+#     .gif                : 連番画像を Pillow でつなげる
+#     .mp4 / .webm など   : チャンクごとに ffmpeg で動画にし、最後に連結する
+# 実行: python -m render_frames 記録.npz 出力先 [プロセス数] [fps]
+#       (src ディレクトリで実行する)
+
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import numpy as np
+
+from step_trace import StepTrace, make_drawer
+
+# 出力の fps（記録の表示時間をこの間隔に丸める）
+FPS = 30
+
+# ワーカー1つあたりのチャンク数（チャンクごとの描画時間の偏りをならす）
+CHUNKS_PER_WORKER = 4
+
+_VIDEO_CODECS = {
+    '.mp4': ['-c:v', 'libx264', '-pix_fmt', 'yuv420p'],
+    '.mkv': ['-c:v', 'libx264', '-pix_fmt', 'yuv420p'],
+    '.webm': ['-c:v', 'libvpx-vp9', '-pix_fmt', 'yuv420p'],
+}
+
+# ワーカーのプロセスごとの状態 (_init_worker で作る)
+_worker: dict[str, Any] = {}
+
+
+def frame_schedule(trace, fps=FPS, speed=1.0):
+    """
+    出力する (記録のフレーム番号, 出力フレーム数) の配列
+    - 記録の各フレームの表示時間 / speed を 1/fps 単位に丸め、
+      0 になったフレームは描画しない（変更は次のフレームで状態に反映される）
+    """
+    ticks = np.round(np.r_[0.0, np.cumsum(trace.frame_duration)]
+                     / speed * fps).astype(np.int64)
+    repeats = np.diff(ticks)
+    if len(repeats):
+        repeats[-1] = max(repeats[-1], 1)  # 最後の状態は必ず出力する
+    frames = np.flatnonzero(repeats)
+    return frames, repeats[frames]
+
+
+def render_trace(trace, output, workers=None, fps=FPS, speed=1.0, dpi=100):
+    """
+    記録を連番画像・動画に書き出す関数
+    - trace: StepTrace または .npz ファイルのパス
+    - output: ディレクトリ（PNG の連番）または .gif / .mp4 / .mkv / .webm のパス
+    - workers: プロセス数（None の場合は CPU 数）
+    - 戻り値: {'frames': 描画したフレーム数, 'chunks': チャンク数, 'seconds': 所要時間}
+    """
+    start_time = time.perf_counter()
+    if not isinstance(trace, StepTrace):
+        trace = StepTrace.load(trace)
+    extension = os.path.splitext(output)[1].lower()
+    if extension and extension != '.gif' and extension not in _VIDEO_CODECS:
+        raise ValueError(f"未対応の出力形式です: {output}")
+    if extension in _VIDEO_CODECS and shutil.which('ffmpeg') is None:
+        raise RuntimeError("動画の書き出しには ffmpeg が必要です")
+
+    frames, repeats = frame_schedule(trace, fps, speed)
+    workers = workers or os.cpu_count() or 1
+    num_chunks = max(min(len(frames), workers * CHUNKS_PER_WORKER), 1)
+    bounds = np.linspace(0, len(frames), num_chunks + 1).astype(np.int64)
+
+    with tempfile.TemporaryDirectory(
+            dir=os.path.dirname(os.path.abspath(output))) as work_dir:
+        if extension in _VIDEO_CODECS:
+            targets = [os.path.join(work_dir, f'chunk_{i:04d}{extension}')
+                       for i in range(num_chunks)]
+        else:
+            frame_dir = work_dir if extension == '.gif' else output
+            os.makedirs(frame_dir, exist_ok=True)
+            targets = [frame_dir] * num_chunks
+
+        tasks = [(frames[lo:hi], repeats[lo:hi], lo, target)
+                 for lo, hi, target in zip(bounds[:-1], bounds[1:], targets)]
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(trace, dpi, fps)) as pool:
+            list(pool.map(_render_chunk, tasks))
+
+        # チャンクをつなげる
+        if extension in _VIDEO_CODECS:
+            _concat_videos(targets, output, work_dir)
+        else:
+            paths = [os.path.join(frame_dir, _frame_name(i))
+                     for i in range(len(frames))]
+            if extension == '.gif':
+                _write_gif(paths, repeats / fps, output)
+            else:
+                _write_ffconcat(paths, repeats / fps,
+                                os.path.join(output, 'frames.ffconcat'))
+
+    return {'frames': len(frames), 'chunks': num_chunks,
+            'seconds': time.perf_counter() - start_time}
+
+
+# ----------------------------------------------------
+# ワーカー側
+# ----------------------------------------------------
+
+def _init_worker(trace, dpi, fps):
+    # 画面を持たない Agg で描画する
+    import matplotlib
+    matplotlib.use('Agg')
+    from plotting import pyplot
+
+    figure = pyplot().figure(figsize=trace.meta.get('figsize'), dpi=dpi)
+    _worker.update(trace=trace, figure=figure, fps=fps,
+                   draw=make_drawer(trace))
+
+
+def _render_chunk(task):
+    """
+    1チャンク分のフレームを描画し、連番画像または動画1本として書き出す
+    """
+    frames, repeats, first_index, target = task
+    trace, figure, draw = _worker['trace'], _worker['figure'], _worker['draw']
+    if not len(frames):
+        return 0
+
+    encoder = None
+    if os.path.splitext(target)[1]:
+        width, height = figure.canvas.get_width_height()
+        encoder = subprocess.Popen(
+            ['ffmpeg', '-y', '-loglevel', 'error',
+             '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', f'{width}x{height}',
+             '-r', str(_worker['fps']), '-i', '-',
+             # yuv420p は幅・高さが偶数である必要がある
+             '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+             *_VIDEO_CODECS[os.path.splitext(target)[1]], target],
+            stdin=subprocess.PIPE)
+
+    state = previous = None
+    try:
+        for k, (frame, repeat) in enumerate(zip(frames.tolist(),
+                                                repeats.tolist())):
+            if previous is None:
+                # チャンクの先頭は状態を直接復元して全て描き直す
+                state = trace.state_at(frame)
+                draw(state, None)
+            else:
+                draw(state, trace.apply(state, previous + 1, frame + 1))
+            previous = frame
+
+            figure.canvas.draw()
+            pixels = np.asarray(figure.canvas.buffer_rgba())
+            if encoder is None:
+                _save_png(os.path.join(target, _frame_name(first_index + k)),
+                          pixels)
+            else:
+                data = pixels.tobytes()
+                for _ in range(repeat):
+                    encoder.stdin.write(data)
+    finally:
+        if encoder is not None:
+            encoder.stdin.close()
+            if encoder.wait() != 0:
+                raise RuntimeError(f"ffmpeg が失敗しました: {target}")
+    return len(frames)
+
+
+def _save_png(path, pixels):
+    from PIL import Image
+    Image.fromarray(pixels).save(path, compress_level=1)
+
+
+def _frame_name(index):
+    return f'frame_{index:06d}.png'
+
+
+# ----------------------------------------------------
+# チャンクの連結
+# ----------------------------------------------------
+
+def _concat_videos(paths, output, work_dir):
+    # ffmpeg の concat で再エンコードせずにつなげる
+    list_path = os.path.join(work_dir, 'chunks.txt')
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for path in paths:
+            f.write(f"file '{path}'\n")
+    subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat',
+                    '-safe', '0', '-i', list_path, '-c', 'copy', output],
+                   check=True)
+
+
+def _write_gif(paths, durations, output):
+    from PIL import Image
+
+    images = [Image.open(path) for path in paths]
+    images[0].save(output, save_all=True, append_images=images[1:],
+                   duration=[round(d * 1000) for d in durations], loop=0)
+
+
+def _write_ffconcat(paths, durations, output):
+    # ffmpeg -f concat -i frames.ffconcat で表示時間どおりの動画にできる
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write('ffconcat version 1.0\n')
+        for path, duration in zip(paths, durations):
+            f.write(f"file '{os.path.basename(path)}'\n"
+                    f"duration {duration:.6f}\n")
+        if paths:
+            # 最後の画像の表示時間を有効にするため、もう一度並べる
+            f.write(f"file '{os.path.basename(paths[-1])}'\n")
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) < 3:
+        print("使い方: python -m render_frames 記録.npz 出力先 "
+              "[プロセス数] [fps]")
+        sys.exit(1)
+    stats = render_trace(
+        sys.argv[1], sys.argv[2],
+        workers=int(sys.argv[3]) if len(sys.argv) > 3 else None,
+        fps=float(sys.argv[4]) if len(sys.argv) > 4 else FPS)
+    print(f"{sys.argv[2]}: {stats['frames']} フレームを {stats['chunks']} "
+          f"チャンクに分けて {stats['seconds']:.2f} 秒で書き出しました")
@@ -0,0 +1,3 @@
+# sort algorithms
+# ソートアルゴリズムの可視化スクリプト
+# (src ディレクトリで python -m sort_algorithm.merge_sort のように実行する)
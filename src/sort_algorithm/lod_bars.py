@@ -0,0 +1,231 @@
+# level-of-detail bar rendering
+# 大規模配列向けの棒グラフ描画（画面のピクセル列ごとに要素を集約）
+# ソートの可視化ステップの記録（step_trace）と再生もここで扱う
+
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
+
+from plotting import pyplot
+
+# 要素数がこの値を超えたら、1要素1本の棒グラフではなく集約描画に切り替える
+LOD_THRESHOLD = 2000
+
+
+def aggregate_columns(arr, n_columns):
+    """
+    配列を n_columns 個の連続区間（列）に分割し、
+    各列の開始インデックス・最小値・最大値・平均値を返す関数
+    """
+    arr = np.asarray(arr)
+    n = len(arr)
+    n_columns = max(1, min(n_columns, n))
+
+    # 各列の開始インデックス（n_columns <= n なので狭義単調増加）
+    starts = (np.arange(n_columns) * n) // n_columns
+    counts = np.diff(np.append(starts, n))
+
+    mins = np.minimum.reduceat(arr, starts)
+    maxs = np.maximum.reduceat(arr, starts)
+    means = np.add.reduceat(arr.astype(np.float64), starts) / counts
+    return starts, mins, maxs, means
+
+
+class LodBarRenderer:
+    """
+    列ごとの最小値〜最大値を縦線 (LineCollection)、平均値を折れ線で描く描画クラス
+    - アーティストは最初に一度だけ作成し、以降は座標と色だけを更新する
+    - 1フレームの描画コストは要素数 N ではなく列数（画面幅）に比例する
+    """
+
+    def __init__(self, ax, arr, n_columns=None):
+        self.ax = ax
+        self.n = len(arr)
+
+        # 列数は Axes の横幅（ピクセル）に合わせる
+        if n_columns is None:
+            n_columns = int(ax.get_window_extent().width)
+        self.starts, mins, maxs, means = aggregate_columns(arr, n_columns)
+        self.n_columns = len(self.starts)
+        self.x = np.arange(self.n_columns)
+
+        self.base_color = np.array(to_rgba('gray'))
+
+        self.bars = LineCollection(self._segments(mins, maxs), linewidths=1)
+        ax.add_collection(self.bars)
+        (self.mean_line,) = ax.plot(self.x, means, color='black',
+                                    linewidth=0.5, alpha=0.6)
+
+        # ソート中は値の集合が変わらないので、軸の範囲は最初に固定する
+        ax.set_xlim(-0.5, self.n_columns - 0.5)
+        ax.set_ylim(min(0, float(mins.min())), float(maxs.max()) * 1.05)
+        ax.set_xticks([])
+
+    def _segments(self, mins, maxs):
+        """
+        列ごとの縦線 (x, min) - (x, max) を (列数, 2, 2) の配列として作成する
+        """
+        segments = np.empty((self.n_columns, 2, 2))
+        segments[:, :, 0] = self.x[:, None]
+        segments[:, 0, 1] = mins
+        segments[:, 1, 1] = maxs
+        return segments
+
+    def columns_of(self, indices):
+        """
+        要素インデックスを、それを含む列の番号に変換する
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        return np.searchsorted(self.starts, indices, side='right') - 1
+
+    def update(self, arr, current_range=None, range_color='skyblue',
+               marks=None, all_color=None):
+        """
+        配列の現在の状態で集約値と列の色を更新する
+        - current_range: (start, end) の半開区間。含まれる列を range_color で塗る
+        - marks: {色: インデックスのリスト} 該当要素を含む列をその色で塗る
+        - all_color: 指定時は全列をこの色で塗る（ソート完了時など）
+        """
+        _, mins, maxs, means = aggregate_columns(arr, self.n_columns)
+        self.bars.set_segments(self._segments(mins, maxs))
+        self.mean_line.set_ydata(means)
+
+        colors = np.tile(self.base_color, (self.n_columns, 1))
+        if all_color is not None:
+            colors[:] = to_rgba(all_color)
+        else:
+            if current_range is not None:
+                start, end = current_range
+                if start < end:
+                    lo, hi = self.columns_of([start, end - 1])
+                    colors[lo:hi + 1] = to_rgba(range_color)
+            for color, indices in (marks or {}).items():
+                indices = [idx for idx in indices if 0 <= idx < self.n]
+                if indices:
+                    colors[self.columns_of(indices)] = to_rgba(color)
+        self.bars.set_color(colors)
+
+
+# 現在の Axes に対応する描画オブジェクト（Axes が変わったら作り直す）
+_renderer = None
+
+
+def draw_bars_lod(arr, current_range=None, range_color='skyblue',
+                  marks=None, all_color=None):
+    """
+    現在の Axes 上で集約棒グラフを更新するヘルパー関数
+    - plt.clf() は呼ばず、既存のアーティストを使い回す
+    """
+    global _renderer
+    ax = pyplot().gca()
+    if _renderer is None or _renderer.ax is not ax or _renderer.n != len(arr):
+        _renderer = LodBarRenderer(ax, arr)
+    _renderer.update(arr, current_range, range_color, marks, all_color)
+    return _renderer
+
+
+# ----------------------------------------------------
+# ステップの記録と再生
+# ----------------------------------------------------
+
+def describe_bars(recorder, arr, range_color, mark_colors, ylim=None):
+    """
+    棒グラフの記録の準備をする関数
+    - 状態: 'value'（配列の値）, 'range'（処理範囲 [start, end)）,
+      'mark'（強調する位置、mark_colors の色で描く）, 'done'（ソート完了）, 'title'
+    """
+    recorder.describe('bars', range_color=range_color,
+                      mark_colors=list(mark_colors), ylim=ylim,
+                      figsize=pyplot().gcf().get_size_inches().tolist())
+    recorder.add_channel('value', arr)
+    recorder.add_channel('range', [0, 0])
+    recorder.add_channel('mark', [-1] * len(mark_colors))
+    recorder.add_channel('done', [0])
+    recorder.add_text_channel('title', [''])
+
+
+def record_values(recorder, arr, *indices):
+    """
+    arr[i] を書き換えたことを記録する
+    """
+    if recorder is not None:
+        for i in indices:
+            recorder.set('value', i, arr[i])
+
+
+def record_bars(recorder, current_range, marks, done, title):
+    """
+    1フレーム分の処理範囲・強調位置・完了フラグ・タイトルを記録する
+    (記録する要素数は強調位置の数 + 4 で一定)
+    """
+    if recorder is None:
+        return
+    start, end = current_range
+    recorder.set('range', 0, start)
+    recorder.set('range', 1, end)
+    for i, index in enumerate(marks):
+        recorder.set('mark', i, index)
+    recorder.set('done', 0, 1 if done else 0)
+    recorder.set_text('title', 0, title)
+
+
+def make_trace_drawer(trace):
+    """
+    describe_bars で記録したステップを、現在の Figure に再生する描画関数を作る
+    - 要素数が LOD_THRESHOLD を超える場合は集約描画を使う
+    """
+    plt = pyplot()
+    ax = plt.gca()
+    meta = trace.meta
+    values = trace.initial[trace.names.index('value')]
+    n = len(values)
+
+    def bar_colors(state):
+        start, end = state['range'].astype(np.int64).tolist()
+        if state['done'][0]:
+            return ['limegreen'] * n
+        colors = ['gray'] * n
+        colors[start:end] = [meta['range_color']] * (end - start)
+        for color, index in zip(meta['mark_colors'],
+                                state['mark'].astype(np.int64).tolist()):
+            if start <= index < end:
+                colors[index] = color
+        return colors
+
+    if n > LOD_THRESHOLD:
+        def draw(state, changed):
+            start, end = state['range'].astype(np.int64).tolist()
+            marks = {}
+            for color, index in zip(meta['mark_colors'],
+                                    state['mark'].astype(np.int64).tolist()):
+                if start <= index < end:
+                    marks.setdefault(color, []).append(index)
+            draw_bars_lod(state['value'], (start, end), meta['range_color'],
+                          marks=marks,
+                          all_color='limegreen' if state['done'][0] else None)
+            ax.set_title(trace.text(state, 'title', 0))
+        return draw
+
+    bars = ax.bar(range(n), values, color='gray')
+    ax.set_xticks([])
+    if meta['ylim']:
+        ax.set_ylim(*meta['ylim'])
+    elif n:
+        # ソート中は値の集合が変わらないので、軸の範囲は最初に固定する
+        ax.set_ylim(0, float(values.max()) * 1.05)
+    current_colors = ['gray'] * n
+
+    def draw(state, changed):
+        if changed is None:
+            positions = range(n)
+        else:
+            positions = changed.get('value', np.zeros(0, np.int64)).tolist()
+        for i in positions:
+            bars[i].set_height(state['value'][i])
+        for i, color in enumerate(bar_colors(state)):
+            if current_colors[i] != color:
+                current_colors[i] = color
+                bars[i].set_facecolor(color)
+        ax.set_title(trace.text(state, 'title', 0))
+
+    return draw
@@ -1,32 +1,48 @@
 # merge sort
 # マージソート
 
-import matplotlib.pyplot as plt
 import numpy as np
+from plotting import pyplot
+from profiling import Profiler
 
-# --- 日本語フォント設定 ---
-plt.rcParams['font.family']\
-      = ['Meiryo', 'MS Gothic', 'Yu Gothic', 'DejaVu Sans']
-plt.rcParams['font.sans-serif']\
-      = ['Meiryo', 'MS Gothic', 'Yu Gothic', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
-# -------------------------
 
-# データ配列の初期化
-N = 30
-data = np.random.randint(1, 100, N)
-
-
-def draw_bars(arr, current_range, highlight_indices=None, process=""):
+def draw_bars(arr, current_range, highlight_indices=None, process="",
+              recorder=None, profiler=None):
     """
     棒グラフを描画するヘルパー関数
+    - recorder: step_trace.StepRecorder を渡すとフレームを記録する
     """
+    if profiler is None:
+        profiler = Profiler()
+    with profiler.phase('draw'):
+        _draw_bars(arr, current_range, highlight_indices, process, recorder)
+    profiler.pause(0.1, recorder)
+
+
+def _draw_bars(arr, current_range, highlight_indices, process, recorder):
+    plt = pyplot()
+    from .lod_bars import LOD_THRESHOLD, draw_bars_lod, record_bars
+
+    start, end = current_range
+    title = ("Merge Sort Visualization | "
+             f"Process: {process}\nRange: [{start} - {end}]")
+    marks = list(highlight_indices or [])
+    record_bars(recorder, current_range, (marks + [-1, -1])[:2],
+                process == "完了", title)
+
+    # 要素数が多い場合はピクセル列ごとの集約描画を使う
+    if len(arr) > LOD_THRESHOLD:
+        draw_bars_lod(arr, current_range, 'skyblue',
+                      marks={'red': highlight_indices or []},
+                      all_color='limegreen' if process == "完了" else None)
+        plt.title(title)
+        return
+
     plt.clf()
 
     colors = ['gray'] * len(arr)
 
     # 現在処理中の範囲を強調
-    start, end = current_range
     for i in range(start, end):
         colors[i] = 'skyblue'
 
@@ -41,103 +57,156 @@ def draw_bars(arr, current_range, highlight_indices=None, process=""):
         colors = ['limegreen'] * len(arr)
 
     plt.bar(range(len(arr)), arr, color=colors)
-    plt.title("Merge Sort Visualization | "
-              f"Process: {process}\nRange: [{start} - {end}]")
+    plt.title(title)
     plt.xticks([])  # X軸のラベルは非表示
     plt.ylim(0, 105)  # Y軸の範囲を固定
-    plt.pause(0.1)
 
 
-def merge_sort_visualized(arr, low, high):
+def merge_sort_visualized(arr, low, high, recorder=None, profiler=None):
     """
     マージソートの本体（可視化ステップを含む）
+    - recorder: step_trace.StepRecorder を渡すと各ステップを記録する
+      (最初の呼び出しの前に sort_algorithm.lod_bars.describe_bars で準備する)
+    - profiler: profiling.Profiler を渡すと、計算・描画・待ち時間を計測する
+      (計測は最初の呼び出しで始まり、profiler.report() / stop() で終わる)
     """
+    if profiler is None:
+        profiler = Profiler()
+    profiler.start()
     if low < high:
         mid = (low + high) // 2
 
         # 1. 分割の可視化 (左側)
-        draw_bars(arr, (low, mid + 1), process="分割 (左側へ)")
-        plt.pause(0.2)
+        draw_bars(arr, (low, mid + 1), process="分割 (左側へ)",
+                  recorder=recorder, profiler=profiler)
+        profiler.pause(0.2, recorder)
 
         # 左側の再帰呼び出し
-        merge_sort_visualized(arr, low, mid)
+        merge_sort_visualized(arr, low, mid, recorder, profiler)
 
         # 1. 分割の可視化 (右側)
-        draw_bars(arr, (mid + 1, high + 1), process="分割 (右側へ)")
-        plt.pause(0.2)
+        draw_bars(arr, (mid + 1, high + 1), process="分割 (右側へ)",
+                  recorder=recorder, profiler=profiler)
+        profiler.pause(0.2, recorder)
 
         # 右側の再帰呼び出し
-        merge_sort_visualized(arr, mid + 1, high)
+        merge_sort_visualized(arr, mid + 1, high, recorder, profiler)
 
         # 2. 併合の実行と可視化
-        merge(arr, low, mid, high)
+        merge(arr, low, mid, high, recorder, profiler)
 
 
-def merge(arr, low, mid, high):
+def merge(arr, low, mid, high, recorder=None, profiler=None):
     """
     併合操作（修正版: 範囲外の要素を保護し、インデックスのズレを解消）
+    - 描画と一時停止を除いた時間を profiler の 'compute' に加える
     """
-    # 処理範囲を一時的にコピーする (マージ後に arr[low:high+1] に書き戻す)
-    # L と R の要素数を正しく定義
-    L = arr[low: mid + 1].tolist()  # リストに変換して操作しやすくする
-    R = arr[mid + 1: high + 1].tolist()
-
-    n1 = len(L)
-    n2 = len(R)
-
-    i = 0  # Lのインデックス
-    j = 0  # Rのインデックス
-    k = low  # arrの書き込み開始インデックス
-
-    # LとRを比較しながら、arrの正しい位置にマージ
-    while i < n1 and j < n2:
-        highlight_indices = [low + i, mid + 1 + j]
-        draw_bars(arr, (low, high + 1), highlight_indices, process="併合中 (比較)")
-        plt.pause(0.05)
-
-        if L[i] <= R[j]:
+    if profiler is None:
+        profiler = Profiler()
+    from .lod_bars import record_values
+
+    with profiler.phase('compute'):
+        # 処理範囲を一時的にコピーする (マージ後に arr[low:high+1] に書き戻す)
+        # L と R の要素数を正しく定義
+        L = arr[low: mid + 1].tolist()  # リストに変換して操作しやすくする
+        R = arr[mid + 1: high + 1].tolist()
+
+        n1 = len(L)
+        n2 = len(R)
+
+        i = 0  # Lのインデックス
+        j = 0  # Rのインデックス
+        k = low  # arrの書き込み開始インデックス
+
+        # LとRを比較しながら、arrの正しい位置にマージ
+        while i < n1 and j < n2:
+            profiler.step()
+            highlight_indices = [low + i, mid + 1 + j]
+            draw_bars(arr, (low, high + 1), highlight_indices,
+                      process="併合中 (比較)", recorder=recorder, profiler=profiler)
+            profiler.pause(0.05, recorder)
+
+            if L[i] <= R[j]:
+                arr[k] = L[i]
+                i += 1
+            else:
+                arr[k] = R[j]
+                j += 1
+            record_values(recorder, arr, k)
+
+            # arr[k]に要素が移動したことを可視化
+            draw_bars(arr, (low, high + 1), [k], process="併合中 (移動)",
+                      recorder=recorder, profiler=profiler)
+            profiler.pause(0.05, recorder)
+
+            k += 1
+
+        # 残りの要素をコピー (ここが最も重要)
+        # Lに残っている要素を、arrの残りの位置にコピー
+        while i < n1:
             arr[k] = L[i]
             i += 1
-        else:
+            record_values(recorder, arr, k)
+            draw_bars(arr, (low, high + 1), [k], process="併合中 (残りを移動)",
+                      recorder=recorder, profiler=profiler)
+            profiler.pause(0.05, recorder)
+            k += 1
+
+        # Rに残っている要素を、arrの残りの位置にコピー
+        while j < n2:
             arr[k] = R[j]
             j += 1
-
-        # arr[k]に要素が移動したことを可視化
-        draw_bars(arr, (low, high + 1), [k], process="併合中 (移動)")
-        plt.pause(0.05)
-
-        k += 1
-
-    # 残りの要素をコピー (ここが最も重要)
-    # Lに残っている要素を、arrの残りの位置にコピー
-    while i < n1:
-        arr[k] = L[i]
-        i += 1
-        draw_bars(arr, (low, high + 1), [k], process="併合中 (残りを移動)")
-        plt.pause(0.05)
-        k += 1
-
-    # Rに残っている要素を、arrの残りの位置にコピー
-    while j < n2:
-        arr[k] = R[j]
-        j += 1
-        draw_bars(arr, (low, high + 1), [k], process="併合中 (残りを移動)")
-        plt.pause(0.05)
-        k += 1
-
-    # 併合完了後の範囲を可視化
-    draw_bars(arr, (low, high + 1), process="併合完了")
-    plt.pause(0.3)
-
-
-# 実行
-plt.figure(figsize=(12, 6))
-print(f"--- マージソート開始: 要素数 {N} ---")
-print(f"初期配列: {data}")
-
-merge_sort_visualized(data, 0, N - 1)
-
-# 最終ソート済みの状態を描画してウィンドウを保持
-draw_bars(data, (0, N), process="完了")
-plt.title(f"Merge Sort Completed | Sorted Array: {data}")
-plt.show()
+            record_values(recorder, arr, k)
+            draw_bars(arr, (low, high + 1), [k], process="併合中 (残りを移動)",
+                      recorder=recorder, profiler=profiler)
+            profiler.pause(0.05, recorder)
+            k += 1
+
+        # 併合完了後の範囲を可視化
+        draw_bars(arr, (low, high + 1), process="併合完了", recorder=recorder,
+                  profiler=profiler)
+        profiler.pause(0.3, recorder)
+
+
+if __name__ == '__main__':
+    import sys
+
+    # データ配列の初期化
+    # (N が LOD_THRESHOLD を超えると、自動的に集約描画に切り替わる)
+    N = 30
+    data = np.random.randint(1, 100, N)
+
+    # 実行
+    plt = pyplot()
+    plt.figure(figsize=(12, 6))
+
+    # 引数に .npz ファイルのパスを渡すと、各ステップを記録して保存する
+    # (python -m step_trace で再生できる)
+    recorder = None
+    if len(sys.argv) > 1:
+        from step_trace import StepRecorder
+        from .lod_bars import describe_bars
+        recorder = StepRecorder()
+        describe_bars(recorder, data, 'skyblue', ['red', 'red'],
+                      ylim=(0, 105))
+
+    # 環境変数 ALGO_PROFILE を設定すると、計算・描画・待ち時間・出力の内訳を表示する
+    # (例: ALGO_PROFILE=1 / ALGO_PROFILE=sampled:5,cprofile)
+    profiler = Profiler.from_env()
+
+    print(f"--- マージソート開始: 要素数 {N} ---")
+    print(f"初期配列: {data}")
+
+    merge_sort_visualized(data, 0, N - 1, recorder, profiler)
+
+    # 最終ソート済みの状態を描画してウィンドウを保持
+    draw_bars(data, (0, N), process="完了", recorder=recorder,
+              profiler=profiler)
+    title = f"Merge Sort Completed | Sorted Array: {data}"
+    plt.title(title)
+    if recorder is not None:
+        recorder.set_text('title', 0, title)
+        recorder.save(sys.argv[1])
+    if profiler is not None:
+        print(profiler.report())
+    plt.show()
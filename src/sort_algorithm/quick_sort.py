@@ -1,27 +1,42 @@
 # quick sort
 # クイックソート
 
-import matplotlib.pyplot as plt
 import numpy as np
+from plotting import pyplot
+from profiling import Profiler
 
-# --- 日本語フォント設定（前回成功した設定を再利用）---
-plt.rcParams['font.family']\
-      = ['Meiryo', 'MS Gothic', 'Yu Gothic', 'DejaVu Sans']
-plt.rcParams['font.sans-serif']\
-      = ['Meiryo', 'MS Gothic', 'Yu Gothic', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
-# --------------------------------------------------------
 
-
-# データ配列を初期化
-N = 30
-data = np.random.randint(1, 100, N)
-
-
-def draw_bars(arr, low, high, pivot_idx, current_idx, is_sorted=False):
+def draw_bars(arr, low, high, pivot_idx, current_idx, is_sorted=False,
+              recorder=None, profiler=None):
     """
     棒グラフを描画するヘルパー関数
+    - recorder: step_trace.StepRecorder を渡すとフレームを記録する
     """
+    if profiler is None:
+        profiler = Profiler()
+    with profiler.phase('draw'):
+        _draw_bars(arr, low, high, pivot_idx, current_idx, is_sorted,
+                   recorder)
+    profiler.pause(0.1, recorder)  # 描画の一時停止 (アニメーション速度)
+
+
+def _draw_bars(arr, low, high, pivot_idx, current_idx, is_sorted, recorder):
+    plt = pyplot()
+    from .lod_bars import LOD_THRESHOLD, draw_bars_lod, record_bars
+
+    title = (f"Quick Sort Visualization\n"
+             f"Elements: {len(arr)} | Comparing: {current_idx}")
+    record_bars(recorder, (low, high + 1), [pivot_idx, current_idx],
+                is_sorted, title)
+
+    # 要素数が多い場合はピクセル列ごとの集約描画を使う
+    if len(arr) > LOD_THRESHOLD:
+        draw_bars_lod(arr, (low, high + 1), 'lightcoral',
+                      marks={'red': [pivot_idx], 'blue': [current_idx]},
+                      all_color='limegreen' if is_sorted else None)
+        plt.title(title)
+        return
+
     plt.clf()
 
     # 基本色を設定（未ソート部分はグレー、最終ソート済部分は緑）
@@ -44,66 +59,111 @@ def draw_bars(arr, low, high, pivot_idx, current_idx, is_sorted=False):
         colors = ['limegreen'] * len(arr)
 
     plt.bar(range(len(arr)), arr, color=colors)
-    plt.title(
-        f"Quick Sort Visualization\n"
-        f"Elements: {len(arr)} | Comparing: {current_idx}"
-        )
+    plt.title(title)
     plt.xticks([])  # X軸のラベルは非表示
-    plt.pause(0.1)  # 描画の一時停止 (アニメーション速度)
 
 
-def quick_sort_visualized(arr, low, high):
+def quick_sort_visualized(arr, low, high, recorder=None, profiler=None):
     """
     クイックソートの本体（可視化ステップを含む）
+    - recorder: step_trace.StepRecorder を渡すと各ステップを記録する
+      (最初の呼び出しの前に sort_algorithm.lod_bars.describe_bars で準備する)
+    - profiler: profiling.Profiler を渡すと、計算・描画・待ち時間を計測する
+      (計測は最初の呼び出しで始まり、profiler.report() / stop() で終わる)
     """
+    if profiler is None:
+        profiler = Profiler()
+    profiler.start()
     if low < high:
         # パーティション実行
-        p_idx = partition(arr, low, high)
+        p_idx = partition(arr, low, high, recorder, profiler)
 
         # パーティション後、ピボット位置で一度描画を停止
-        draw_bars(arr, low, high, p_idx, -1)
-        plt.pause(0.5)
+        draw_bars(arr, low, high, p_idx, -1, recorder=recorder,
+                  profiler=profiler)
+        profiler.pause(0.5, recorder)
 
         # 左側のサブ配列を再帰的にソート
-        quick_sort_visualized(arr, low, p_idx - 1)
+        quick_sort_visualized(arr, low, p_idx - 1, recorder, profiler)
 
         # 右側のサブ配列を再帰的にソート
-        quick_sort_visualized(arr, p_idx + 1, high)
+        quick_sort_visualized(arr, p_idx + 1, high, recorder, profiler)
 
 
-def partition(arr, low, high):
+def partition(arr, low, high, recorder=None, profiler=None):
     """
     パーティション操作（Lomutoパーティションスキームを使用）
+    - 描画と一時停止を除いた時間を profiler の 'compute' に加える
     """
-    pivot = arr[high]  # 配列の最後の要素をピボットとして選択
-    i = low - 1  # 適切な位置に配置されるピボットのインデックス
-
-    # ピボットの選択を可視化
-    draw_bars(arr, low, high, high, -1)
-
-    for j in range(low, high):
-        # 現在比較中のインデックスを可視化
-        draw_bars(arr, low, high, high, j)
-
-        if arr[j] <= pivot:
-            i += 1
-            # スワップが発生した場合は可視化
-            arr[i], arr[j] = arr[j], arr[i]
-            draw_bars(arr, low, high, high, j)
-            plt.pause(0.05)  # スワップが起こるたびに短いポーズ
-
-    # ピボットを最終的な位置に配置
-    arr[i + 1], arr[high] = arr[high], arr[i + 1]
+    if profiler is None:
+        profiler = Profiler()
+    from .lod_bars import record_values
+
+    with profiler.phase('compute'):
+        pivot = arr[high]  # 配列の最後の要素をピボットとして選択
+        i = low - 1  # 適切な位置に配置されるピボットのインデックス
+
+        # ピボットの選択を可視化
+        draw_bars(arr, low, high, high, -1, recorder=recorder,
+                  profiler=profiler)
+
+        for j in range(low, high):
+            profiler.step()
+            # 現在比較中のインデックスを可視化
+            draw_bars(arr, low, high, high, j, recorder=recorder,
+                      profiler=profiler)
+
+            if arr[j] <= pivot:
+                i += 1
+                # スワップが発生した場合は可視化
+                arr[i], arr[j] = arr[j], arr[i]
+                record_values(recorder, arr, i, j)
+                draw_bars(arr, low, high, high, j, recorder=recorder,
+                          profiler=profiler)
+                profiler.pause(0.05, recorder)  # スワップが起こるたびに短いポーズ
+
+        # ピボットを最終的な位置に配置
+        arr[i + 1], arr[high] = arr[high], arr[i + 1]
+        record_values(recorder, arr, i + 1, high)
 
     # ピボットが定位置に置かれた状態を可視化
     return i + 1
 
 
-# 実行
-plt.figure(figsize=(8, 5))
-quick_sort_visualized(data, 0, N - 1)
-
-# 最終ソート済みの状態を描画してウィンドウを保持
-draw_bars(data, 0, 0, -1, -1, is_sorted=True)
-plt.title("Quick Sort Completed")
-plt.show()
+if __name__ == '__main__':
+    import sys
+
+    # データ配列を初期化
+    # (N が LOD_THRESHOLD を超えると、自動的に集約描画に切り替わる)
+    N = 30
+    data = np.random.randint(1, 100, N)
+
+    # 実行
+    plt = pyplot()
+    plt.figure(figsize=(8, 5))
+
+    # 引数に .npz ファイルのパスを渡すと、各ステップを記録して保存する
+    # (python -m step_trace で再生できる)
+    recorder = None
+    if len(sys.argv) > 1:
+        from step_trace import StepRecorder
+        from .lod_bars import describe_bars
+        recorder = StepRecorder()
+        describe_bars(recorder, data, 'lightcoral', ['red', 'blue'])
+
+    # 環境変数 ALGO_PROFILE を設定すると、計算・描画・待ち時間・出力の内訳を表示する
+    # (例: ALGO_PROFILE=1 / ALGO_PROFILE=sampled:5,cprofile)
+    profiler = Profiler.from_env()
+
+    quick_sort_visualized(data, 0, N - 1, recorder, profiler)
+
+    # 最終ソート済みの状態を描画してウィンドウを保持
+    draw_bars(data, 0, 0, -1, -1, is_sorted=True, recorder=recorder,
+              profiler=profiler)
+    plt.title("Quick Sort Completed")
+    if recorder is not None:
+        recorder.set_text('title', 0, "Quick Sort Completed")
+        recorder.save(sys.argv[1])
+    if profiler is not None:
+        print(profiler.report())
+    plt.show()
@@ -0,0 +1,407 @@
+# step traces
+# 可視化のステップの記録・保存・再生
+# - 記録は「操作コード（どの状態配列か）・位置・値」の3列を追記するだけの列形式
+#   (1回の変更は array.array への追記3回なので、記録のコストはステップあたり一定)
+# - plt.pause 1回分を1フレームとし、フレームごとに「終わりの操作数」と表示時間を持つ
+# - 状態はすべて「状態配列の要素への代入」で表すので、任意のフレームの状態は
+#   それまでの代入を NumPy でまとめて適用すれば復元できる（巻き戻し・シーク）
+# - 文字列（タイトル・ラベル・色名）は文字列表の番号を値として記録する
+# 再生: python -m step_trace 記録.npz [再生速度]  (src ディレクトリで実行する)
+# 動画・連番画像への書き出しは render_frames を参照
+
+import json
+import time
+from array import array
+
+import numpy as np
+
+# 記録の種類 -> 再生用の描画関数 make_trace_drawer(trace) を持つモジュール
+DRAWER_MODULES = {
+    'graph': 'graph_algorithm.graph_renderer',
+    'bars': 'sort_algorithm.lod_bars',
+    'knapsack': 'dynamic_programming.knapsack_problem',
+}
+
+_MAX_CHANNELS = 256
+
+
+class StepRecorder:
+    """
+    可視化のステップを記録するクラス
+    - describe(): 記録の種類と、再生時の描画に必要な設定・静的な配列を登録する
+    - add_channel() / add_text_channel(): 状態配列（数値 / 文字列）を追加する
+    - set() / set_text(): 状態配列の1要素を書き換えたことを記録する
+    - frame(): 画面を表示した（plt.pause した）ことを記録する
+    """
+
+    def __init__(self):
+        self.kind = None
+        self.meta = {}
+        self.arrays = {}
+        self._codes = {}
+        self._names = []
+        self._initial = []
+        self._is_text = []
+        self._string_ids = {}
+        self._op = array('B')
+        self._index = array('q')
+        self._value = array('d')
+        self._frame_end = array('q')
+        self._frame_duration = array('d')
+
+    def describe(self, kind, arrays=None, **meta):
+        """
+        - kind: 再生に使う描画の種類（DRAWER_MODULES のキー）
+        - arrays: ノード座標などの静的な配列の辞書
+        - meta: 描画設定（JSON に変換できる値）
+        """
+        self.kind = kind
+        self.arrays.update(arrays or {})
+        self.meta.update(meta)
+
+    def add_channel(self, name, initial):
+        self._add(name, np.array(initial, dtype=np.float64), False)
+
+    def add_text_channel(self, name, initial):
+        self._add(name, np.array([self._string_id(text) for text in initial],
+                                 dtype=np.float64), True)
+
+    def set(self, name, index, value):
+        self._op.append(self._codes[name])
+        self._index.append(index)
+        self._value.append(value)
+
+    def set_text(self, name, index, text):
+        self.set(name, index, self._string_id(text))
+
+    def frame(self, duration):
+        """
+        ここまでの変更を1フレームとして区切る（duration は表示時間 [秒]）
+        """
+        self._frame_end.append(len(self._op))
+        self._frame_duration.append(duration)
+
+    def to_trace(self):
+        frame_end = np.array(self._frame_end, dtype=np.int64)
+        frame_duration = np.array(self._frame_duration, dtype=np.float64)
+        # 最後の区切りより後の変更も1フレームにする
+        if not len(frame_end) or frame_end[-1] < len(self._op):
+            frame_end = np.append(frame_end, len(self._op))
+            frame_duration = np.append(frame_duration, 0.0)
+        strings = sorted(self._string_ids, key=self._string_ids.get)
+        return StepTrace(
+            self.kind, dict(self.meta), list(self._names),
+            [a.copy() for a in self._initial], list(self._is_text), strings,
+            np.array(self._op, dtype=np.uint8),
+            np.array(self._index, dtype=np.int64),
+            np.array(self._value, dtype=np.float64),
+            frame_end, frame_duration, dict(self.arrays))
+
+    def save(self, path):
+        self.to_trace().save(path)
+
+    def __len__(self):
+        return len(self._op)
+
+    def _add(self, name, initial, is_text):
+        if name in self._codes:
+            raise ValueError(f"状態配列 '{name}' は登録済みです")
+        if len(self._names) == _MAX_CHANNELS:
+            raise ValueError(f"状態配列は {_MAX_CHANNELS} 個までです")
+        self._codes[name] = len(self._names)
+        self._names.append(name)
+        self._initial.append(initial)
+        self._is_text.append(is_text)
+
+    def _string_id(self, text):
+        text = str(text)
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = self._string_ids[text] = len(self._string_ids)
+        return string_id
+
+
+class StepTrace:
+    """
+    記録済みのステップ（StepRecorder.to_trace() または StepTrace.load() で作る）
+    - op / index / value: 操作の列（op は状態配列の番号）
+    - frame_end[f]: フレーム f の終わりまでの操作数
+    - frame_duration[f]: フレーム f の表示時間 [秒]
+    - 状態は {状態配列名: float64 の配列} の辞書（文字列の状態配列は文字列表の番号）
+    """
+
+    def __init__(self, kind, meta, names, initial, is_text, strings, op,
+                 index, value, frame_end, frame_duration, arrays):
+        self.kind = kind
+        self.meta = meta
+        self.names = names
+        self.initial = initial
+        self.is_text = is_text
+        self.strings = strings
+        self.op = op
+        self.index = index
+        self.value = value
+        self.frame_end = frame_end
+        self.frame_duration = frame_duration
+        self.arrays = arrays
+
+    @property
+    def num_frames(self):
+        return len(self.frame_end)
+
+    @property
+    def duration(self):
+        return float(self.frame_duration.sum())
+
+    def frame_times(self):
+        """
+        各フレームの表示開始時刻 [秒]
+        """
+        return np.concatenate([[0.0], np.cumsum(self.frame_duration)[:-1]])
+
+    def initial_state(self):
+        return {name: values.copy()
+                for name, values in zip(self.names, self.initial)}
+
+    def state_at(self, frame):
+        """
+        フレーム frame を表示した時点の状態
+        """
+        state = self.initial_state()
+        self.apply(state, 0, frame + 1)
+        return state
+
+    def apply(self, state, start, stop):
+        """
+        フレーム start .. stop-1 の変更を state に適用する
+        - 戻り値: {状態配列名: 変更された位置の配列}
+        """
+        lo = int(self.frame_end[start - 1]) if start > 0 else 0
+        hi = int(self.frame_end[stop - 1]) if stop > 0 else 0
+        op = self.op[lo:hi]
+        changed = {}
+        for code in np.unique(op).tolist():
+            mask = op == code
+            # 同じ位置への代入が複数ある場合は最後の値を使う
+            index = self.index[lo:hi][mask][::-1]
+            value = self.value[lo:hi][mask][::-1]
+            positions, last = np.unique(index, return_index=True)
+            name = self.names[code]
+            state[name][positions] = value[last]
+            changed[name] = positions
+        return changed
+
+    def text(self, state, name, index):
+        return self.strings[int(state[name][index])]
+
+    def texts(self, state, name):
+        return [self.strings[i] for i in state[name].astype(np.int64)]
+
+    # ----------------------------------------------------
+    # 保存・読み込み
+    # ----------------------------------------------------
+    def save(self, path):
+        """
+        .npz 形式で保存する（pickle は使わない）
+        """
+        fits_int32 = not len(self.index) or (
+            self.index.min() >= np.iinfo(np.int32).min
+            and self.index.max() <= np.iinfo(np.int32).max)
+        arrays = {
+            'op': self.op,
+            'index': self.index.astype(np.int32 if fits_int32 else np.int64),
+            'value': self.value,
+            'frame_end': self.frame_end,
+            'frame_duration': self.frame_duration,
+            'strings': np.array(self.strings, dtype=str),
+            'names': np.array(self.names, dtype=str),
+            'is_text': np.array(self.is_text, dtype=bool),
+            'header': np.array(json.dumps(
+                {'kind': self.kind, 'meta': self.meta,
+                 'arrays': list(self.arrays)}, ensure_ascii=False)),
+        }
+        for i, values in enumerate(self.initial):
+            arrays[f'initial_{i}'] = values
+        for i, values in enumerate(self.arrays.values()):
+            arrays[f'array_{i}'] = np.asarray(values)
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            header = json.loads(data['header'].item())
+            names = data['names'].tolist()
+            return cls(
+                header['kind'], header['meta'], names,
+                [data[f'initial_{i}'] for i in range(len(names))],
+                data['is_text'].tolist(), data['strings'].tolist(),
+                data['op'], data['index'].astype(np.int64), data['value'],
+                data['frame_end'], data['frame_duration'],
+                {name: data[f'array_{i}']
+                 for i, name in enumerate(header['arrays'])})
+
+
+class TracePlayer:
+    """
+    記録したステップを再生するクラス
+    - draw(state, changed): 状態を描画する関数
+      changed は {状態配列名: 前回の描画から変わった位置}（None の場合は全て描き直す）
+    - speed: 再生速度の倍率（記録時の表示時間 / speed で各フレームを表示する）
+    - 描画が間に合わない場合は、経過時間に対応するフレームまで飛ばして描画する
+      (飛ばしたフレームの変更も状態には適用される)
+    - キー操作 (connect_keys): space 一時停止 / ← → 1フレーム移動 /
+      ↑ ↓ 速度を2倍・半分 / home end 先頭・末尾へ
+    """
+
+    def __init__(self, trace, draw, speed=1.0, min_interval=1 / 60):
+        self.trace = trace
+        self.draw = draw
+        self.speed = speed
+        self.min_interval = min_interval
+        self.paused = False
+        self.frame = -1
+        self.state = None
+        self.drawn = 0
+        self.dropped = 0
+        self._times = trace.frame_times()
+        self._clock_start = None
+
+    def seek(self, frame):
+        """
+        フレーム frame の状態にして描画する
+        """
+        frame = min(max(int(frame), 0), self.trace.num_frames - 1)
+        if self.state is None or frame < self.frame:
+            # 巻き戻しは先頭から適用し直す（NumPy でまとめて適用するので速い）
+            self.state = self.trace.state_at(frame)
+            changed = None
+        else:
+            changed = self.trace.apply(self.state, self.frame + 1, frame + 1)
+        self.frame = frame
+        self.draw(self.state, changed)
+        self.drawn += 1
+        return self.state
+
+    def step(self, delta=1):
+        self.seek(self.frame + delta)
+        self._restart_clock()
+
+    def set_speed(self, speed):
+        self.speed = speed
+        self._restart_clock()
+
+    def play(self, start=0, stop=None):
+        """
+        frame start から stop-1 までを実時間で再生する
+        - 戻り値: {'drawn': 描画したフレーム数, 'dropped': 飛ばしたフレーム数}
+        """
+        from plotting import pyplot
+        plt = pyplot()
+        stop = self.trace.num_frames if stop is None else stop
+        if stop <= start:
+            return {'drawn': 0, 'dropped': 0}
+        self.seek(start)
+        self._restart_clock()
+
+        while self.frame < stop - 1 or self.paused:
+            if not plt.get_fignums():
+                break  # ウィンドウが閉じられた
+            if self.paused:
+                plt.pause(0.05)
+                self._restart_clock()
+                continue
+
+            # 経過時間に対応するフレーム
+            now = self._times[self.frame] + \
+                (time.perf_counter() - self._clock_start) * self.speed
+            target = min(int(np.searchsorted(self._times, now, 'right')) - 1,
+                         stop - 1)
+            if target > self.frame:
+                self.dropped += target - self.frame - 1
+                clock_frame, clock_start = self.frame, self._clock_start
+                self.seek(target)
+                # 時刻の基準は描画前のフレームのまま進める
+                self._clock_start = clock_start + \
+                    (self._times[target] - self._times[clock_frame]) \
+                    / self.speed
+
+            # 次のフレームの表示時刻まで待つ
+            elapsed = time.perf_counter() - self._clock_start
+            wait = self.trace.frame_duration[self.frame] / self.speed - elapsed
+            plt.pause(max(wait, self.min_interval))
+
+        return {'drawn': self.drawn, 'dropped': self.dropped}
+
+    def connect_keys(self, figure):
+        """
+        figure にキー操作を登録する
+        """
+        def on_key(event):
+            if event.key == ' ':
+                self.paused = not self.paused
+            elif event.key == 'right':
+                self.step(1)
+            elif event.key == 'left':
+                self.step(-1)
+            elif event.key == 'up':
+                self.set_speed(self.speed * 2)
+            elif event.key == 'down':
+                self.set_speed(self.speed / 2)
+            elif event.key == 'home':
+                self.seek(0)
+                self._restart_clock()
+            elif event.key == 'end':
+                self.seek(self.trace.num_frames - 1)
+                self._restart_clock()
+            else:
+                return
+            figure.canvas.draw_idle()
+
+        return figure.canvas.mpl_connect('key_press_event', on_key)
+
+    def _restart_clock(self):
+        self._clock_start = time.perf_counter()
+
+
+def make_drawer(trace):
+    """
+    記録の種類に応じた描画関数 draw(state, changed) を現在の Figure に作る
+    """
+    import importlib
+
+    if trace.kind not in DRAWER_MODULES:
+        raise ValueError(f"再生できない記録の種類です: {trace.kind}")
+    module = importlib.import_module(DRAWER_MODULES[trace.kind])
+    return module.make_trace_drawer(trace)
+
+
+def replay(trace, speed=1.0, block=True):
+    """
+    記録を新しいウィンドウで再生する（記録の種類に応じた描画関数を使う）
+    - trace: StepTrace または .npz ファイルのパス
+    """
+    from plotting import pyplot
+
+    if not isinstance(trace, StepTrace):
+        trace = StepTrace.load(trace)
+
+    plt = pyplot()
+    figure = plt.figure(figsize=trace.meta.get('figsize'))
+    player = TracePlayer(trace, make_drawer(trace), speed)
+    player.connect_keys(figure)
+    stats = player.play()
+    print(f"再生完了: {trace.num_frames} フレーム中 {stats['drawn']} フレームを"
+          f"描画 ({stats['dropped']} フレームを省略)")
+    if block:
+        plt.show()
+    return player
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) < 2:
+        print("使い方: python -m step_trace 記録.npz [再生速度]")
+        sys.exit(1)
+    replay(sys.argv[1], speed=float(sys.argv[2]) if len(sys.argv) > 2
+           else 1.0)